@@ -0,0 +1,54 @@
+import argparse
+import time
+
+from fish_batch import evaluate_batch, features, from_arrays, stack
+from fish_search import evaluate
+from benchmarks.bench_movegen import midgame_positions
+
+# Positions per second for fish_search.evaluate called once per position versus
+# fish_batch.evaluate_batch over the whole batch, at growing batch sizes. The
+# last column casts every ray from bare board arrays (fish_batch.from_arrays),
+# as for positions that don't come with tracked reach.
+# Run from the repo root:  python -m benchmarks.bench_eval [--rows 32 --cols 32]
+
+BATCH_SIZES = (1, 10, 100, 1000, 10000)
+
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched evaluation benchmark")
+    parser.add_argument('--sizes', type=int, nargs='+', default=BATCH_SIZES)
+    parser.add_argument('--rows', type=int, default=8)
+    parser.add_argument('--cols', type=int, default=8)
+    parser.add_argument('--penguins', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    # A pool of distinct positions, cycled to fill the larger batches
+    pool = midgame_positions(min(max(args.sizes), 500), args.seed, args.rows, args.cols, args.penguins)
+    for state, value in zip(pool, evaluate_batch(pool)):
+        assert abs(evaluate(state) - value) < 1e-9
+    print(f"{args.rows}x{args.cols} board, {args.penguins} penguins each, {len(pool)} distinct mid-game positions")
+    print(f"{'batch':>7} {'scalar pos/s':>14} {'batched pos/s':>14} {'speedup':>8} {'ray-cast pos/s':>15}")
+    for size in args.sizes:
+        batch = [pool[i % len(pool)] for i in range(size)]
+        stacked = stack(batch)
+        raw = from_arrays(stacked.rows, stacked.cols, stacked.fish, stacked.holes, stacked.penguins, stacked.current)
+        repeat = args.repeat if size < 1000 else 1
+        scalar = best_time(lambda: [evaluate(s) for s in batch], repeat)
+        batched = best_time(lambda: evaluate_batch(batch), repeat)
+        cast = best_time(lambda: features(raw), repeat)
+        print(f"{size:>7} {size / scalar:>14,.0f} {size / batched:>14,.0f} {scalar / batched:>7.2f}x {size / cast:>15,.0f}")
+
+
+if __name__ == "__main__":
+    main()
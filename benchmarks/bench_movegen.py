@@ -0,0 +1,99 @@
+import argparse
+import random
+import time
+
+from fish_engine import GameState, BOARD_ROWS, BOARD_COLS, PENGUINS_PER_PLAYER, HUMAN, AI
+
+# Compares the precomputed-ray move generator in fish_engine with the original
+# MyGame.get_valid_moves (cube conversion per step over a list of per-cell dicts).
+# Run from the repo root:  python -m benchmarks.bench_movegen
+
+
+def offset_to_cube(row, col):
+    x = col - (row - (row & 1)) / 2; z = row; y = -x - z
+    return x, y, z
+
+
+def cube_to_offset(x, y, z):
+    col = int(x + (z - (z & 1)) / 2); row = int(z)
+    return row, col
+
+
+def legacy_get_valid_moves(board, rows, cols, row, col):
+    moves = []
+    start_cube = offset_to_cube(row, col)
+    directions = [(1, -1, 0), (-1, 1, 0), (1, 0, -1), (-1, 0, 1), (0, 1, -1), (0, -1, 1)]
+    for dx, dy, dz in directions:
+        cur = list(start_cube)
+        while True:
+            cur[0] += dx; cur[1] += dy; cur[2] += dz
+            r, c = cube_to_offset(*cur)
+            if not (0 <= r < rows and 0 <= c < cols): break
+            if board[r][c]['is_hole'] or board[r][c]['penguin']: break
+            moves.append((r, c))
+    return moves
+
+
+def legacy_board(state):
+    names = {HUMAN: 'human', AI: 'ai', None: None}
+    board = [[{} for _ in range(state.cols)] for _ in range(state.rows)]
+    for index in range(state.rows * state.cols):
+        row, col = state.cell(index)
+        board[row][col] = {'fish': state.fish[index], 'penguin': names[state.penguin_at(index)],
+                           'is_hole': state.is_hole(index)}
+    return board
+
+
+def midgame_positions(count, seed, rows=BOARD_ROWS, cols=BOARD_COLS, penguins_per_player=PENGUINS_PER_PLAYER):
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = GameState.new_game(rng, rows, cols, penguins_per_player)
+        target = rng.randint(8, 30)
+        plies = 0
+        while not state.is_terminal() and plies < target:
+            moves = state.legal_moves()
+            if not moves: state.pass_turn(); continue
+            state.apply_move(rng.choice(moves))
+            plies += 1
+        if not state.is_terminal(): positions.append(state)
+    return positions
+
+
+def time_calls(fn, calls, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for args in calls: fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best / len(calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move generation microbenchmark")
+    parser.add_argument('--positions', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    positions = midgame_positions(args.positions, args.seed)
+    legacy_calls, engine_calls = [], []
+    for state in positions:
+        board = legacy_board(state)
+        for player in (HUMAN, AI):
+            for index in state.penguin_cells(player):
+                row, col = state.cell(index)
+                legacy_calls.append((board, state.rows, state.cols, row, col))
+                engine_calls.append((state, index))
+                assert [state.cell(i) for i in state.moves_from(index)] == legacy_get_valid_moves(board, state.rows, state.cols, row, col)
+
+    legacy = time_calls(legacy_get_valid_moves, legacy_calls, args.repeat)
+    engine = time_calls(GameState.moves_from, engine_calls, args.repeat)
+    print(f"{len(engine_calls)} penguins over {len(positions)} mid-game positions")
+    print(f"legacy get_valid_moves : {legacy * 1e6:8.2f} us/call")
+    print(f"ray table moves_from   : {engine * 1e6:8.2f} us/call")
+    print(f"speedup                : {legacy / engine:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
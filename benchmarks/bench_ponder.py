@@ -0,0 +1,76 @@
+import argparse
+import re
+import time
+
+from benchmarks.bench_suite import staged_positions
+from fish_ai import GreedyPlayer, make_player, parse_player
+from fish_engine import BOARD_ROWS, BOARD_COLS, PENGUINS_PER_PLAYER, HUMAN
+from fish_search import zobrist_hash
+
+# What pondering buys the AI: on seeded positions with the human to move, the AI
+# either waits or ponders for --think-time seconds (the human thinking), the human
+# plays greedy's move, and the AI answers with a --move-time budget. Reports how
+# long the answer took, how deep its search went and how often the human's move
+# was one the AI had pondered.
+# Run from the repo root:  python -m benchmarks.bench_ponder [--think-time 5]
+
+STAGES = (('opening', 0.0), ('midgame', 0.33), ('endgame', 0.6))  # fraction of tiles sunk
+
+
+def human_to_move(positions):
+    for state in positions:
+        if state.current != HUMAN:
+            moves = state.legal_moves()
+            if not moves: continue
+            state = state.copy()
+            state.make_move(moves[0])
+        if state.current == HUMAN and not state.is_terminal() and state.legal_moves(): yield state
+
+
+def answer(spec, state, think_time, move_time, ponder):
+    # (seconds to answer, depth searched, pondered reply) for one position, or None when
+    # the human's move leaves the AI nothing to decide
+    name, options = parse_player(spec)
+    player = make_player(name, seed=0, **options)
+    if ponder:
+        stop_at = time.perf_counter() + think_time
+        player.ponder(state, lambda: time.perf_counter() >= stop_at)
+    reply = state.copy()
+    reply.make_move(GreedyPlayer(seed=0).choose_move(state, 0).move)
+    if reply.current == HUMAN or reply.is_terminal(): return None
+    hit = zobrist_hash(reply) in player.pondered
+    start = time.perf_counter()
+    choice = player.choose_move(reply, move_time)
+    elapsed = time.perf_counter() - start
+    return elapsed, int(re.search(r'depth (\d+)', choice.report).group(1)), hit
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI reply time and depth with and without pondering")
+    parser.add_argument('--player', default='alphabeta')
+    parser.add_argument('--positions', type=int, default=4, help="positions per stage")
+    parser.add_argument('--think-time', type=float, default=3.0, help="seconds the human takes per move")
+    parser.add_argument('--move-time', type=float, default=1.5, help="the AI's budget per move")
+    parser.add_argument('--rows', type=int, default=BOARD_ROWS)
+    parser.add_argument('--cols', type=int, default=BOARD_COLS)
+    parser.add_argument('--penguins', type=int, default=PENGUINS_PER_PLAYER)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.player}: human thinks {args.think_time:.1f}s, AI budget {args.move_time:.1f}s")
+    print(f"{'stage':<10} {'mode':<10} {'answer s':>9} {'depth':>6} {'hits':>6}")
+    for stage, sunk in STAGES:
+        positions = list(human_to_move(staged_positions(args.positions, sunk, args.seed,
+                                                        args.rows, args.cols, args.penguins)))
+        for mode, ponder in (('waiting', False), ('pondering', True)):
+            rows = [row for row in (answer(args.player, state, args.think_time, args.move_time, ponder)
+                                    for state in positions) if row is not None]
+            if not rows: continue
+            seconds = sum(row[0] for row in rows) / len(rows)
+            depth = sum(row[1] for row in rows) / len(rows)
+            hits = sum(row[2] for row in rows)
+            print(f"{stage:<10} {mode:<10} {seconds:>9.3f} {depth:>6.1f} {f'{hits}/{len(rows)}' if ponder else '-':>6}")
+
+
+if __name__ == "__main__":
+    main()
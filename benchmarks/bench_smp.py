@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+import time
+
+from benchmarks.bench_suite import staged_positions
+from fish_engine import BOARD_ROWS, BOARD_COLS, PENGUINS_PER_PLAYER
+from fish_search import Searcher
+from fish_smp import ParallelSearcher
+
+# Lazy SMP speedup: time for the parallel alpha-beta search to reach a fixed depth
+# on seeded midgame positions, for each worker count, against one worker. Also
+# reports total nodes/s and how many results came from a helper a ply deeper. Each
+# worker count gets a fresh table and a warm-up search so pool start-up isn't timed.
+# Run from the repo root:  python -m benchmarks.bench_smp [--workers 1 2 4 8] [--depth 5]
+
+SUNK = 0.33
+
+
+def run(workers, positions, depth, tt_bits):
+    searcher = ParallelSearcher(workers, tt_bits) if workers else Searcher(tt_bits)
+    searcher.search(positions[0], 3600, 1)
+    elapsed = nodes = helped = 0
+    for state in positions:
+        start = time.perf_counter()
+        result = searcher.search(state, 3600, depth)
+        elapsed += time.perf_counter() - start
+        nodes += result.nodes
+        if workers and result.depth > searcher.results[0].depth: helped += 1
+    return elapsed, nodes, helped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel alpha-beta (Lazy SMP) speedup by worker count")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--depth', type=int, default=5, help="depth every search must complete")
+    parser.add_argument('--positions', type=int, default=8)
+    parser.add_argument('--tt-bits', type=int, default=18)
+    parser.add_argument('--rows', type=int, default=BOARD_ROWS)
+    parser.add_argument('--cols', type=int, default=BOARD_COLS)
+    parser.add_argument('--penguins', type=int, default=PENGUINS_PER_PLAYER)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('-o', '--output', help="write the curve to this JSON file")
+    args = parser.parse_args()
+
+    positions = staged_positions(args.positions, SUNK, args.seed, args.rows, args.cols, args.penguins)
+    print(f"{args.positions} midgame positions to depth {args.depth} on {os.cpu_count()} cores")
+    elapsed, nodes, _ = run(0, positions, args.depth, args.tt_bits)
+    print(f"{'serial':>8} {elapsed:>9.2f}s {'':>8} {nodes / elapsed:>10.0f} nodes/s")
+    curve = {}
+    base = None
+    for workers in args.workers:
+        elapsed, nodes, helped = run(workers, positions, args.depth, args.tt_bits)
+        base = base or elapsed
+        curve[workers] = {'seconds': round(elapsed, 4), 'speedup': round(base / elapsed, 3), 'nodes_per_s': round(nodes / elapsed)}
+        print(f"{workers:>8} {elapsed:>9.2f}s {base / elapsed:>7.2f}x {nodes / elapsed:>10.0f} nodes/s"
+              f"  ({helped} deeper results from helpers)")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'cores': os.cpu_count(), 'depth': args.depth, 'positions': args.positions, 'curve': curve}, f, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+from fish_ai import make_player, parse_player
+from fish_engine import GameState, BOARD_ROWS, BOARD_COLS, PENGUINS_PER_PLAYER, HUMAN, AI
+from fish_layout import BoardLayout
+
+# The rules, AI move choice and board geometry the game window relies on, timed
+# without a window on seeded boards at three densities (placement just finished,
+# and about a third and three fifths of the tiles sunk). Every case reports the
+# best time per call over --repeat runs; results go to JSON, and --baseline
+# compares against an earlier run and fails on anything slower than --threshold.
+# Run from the repo root:
+#   python -m benchmarks.bench_suite -o before.json
+#   python -m benchmarks.bench_suite -o after.json --baseline before.json
+
+STAGES = (('opening', 0.0), ('midgame', 0.33), ('endgame', 0.6))  # fraction of tiles sunk
+AI_PLAYERS = ('greedy', 'alphabeta:max_depth=2')
+MIN_PASS_TIME = 0.02  # short cases go through their calls several times per pass
+# The 8x8 game window's play area: left, bottom, width, height, largest and smallest tile
+WINDOW_AREA = (100, 60, 1000, 535, 44, 5)
+
+
+def staged_positions(count, sunk, seed, rows, cols, penguins_per_player):
+    # count positions with every penguin placed and at least `sunk` of the tiles gone,
+    # reached by seeded random play
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = GameState.new_game(rng, rows, cols, penguins_per_player)
+        target = sunk * state.size
+        while not state.is_terminal() and (state.unplaced[HUMAN] or state.unplaced[AI] or bin(state.holes).count('1') < target):
+            moves = state.legal_moves()
+            if moves: state.apply_move(rng.choice(moves))
+            else: state.pass_turn()
+        if not state.is_terminal(): positions.append(state)
+    return positions
+
+
+def time_calls(fn, calls, repeat, setup=None):
+    # Best seconds per call; setup() runs untimed before every pass and its result is
+    # passed first to fn (such passes go through the calls once)
+    if setup:
+        best = float('inf')
+        for _ in range(repeat):
+            context = setup()
+            start = time.perf_counter()
+            for args in calls: fn(context, *args)
+            best = min(best, time.perf_counter() - start)
+        return best / len(calls)
+
+    def one_pass(rounds):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for args in calls: fn(*args)
+        return time.perf_counter() - start
+
+    rounds = max(1, int(MIN_PASS_TIME / max(one_pass(1), 1e-9)))
+    return min(one_pass(rounds) for _ in range(repeat)) / (rounds * len(calls))
+
+
+def get_valid_moves(state, row, col):
+    # What MyGame.get_valid_moves does
+    return [state.cell(i) for i in state.moves_from(state.index(row, col))]
+
+
+def ai_case(spec):
+    name, options = parse_player(spec)
+    # A fresh player per pass, so no pass starts from a warmer transposition table
+    return lambda: make_player(name, seed=0, **options), lambda player, state: player.choose_move(state, 3600)
+
+
+def run(args):
+    results = {}
+
+    def record(name, fn, calls, repeat=args.repeat, setup=None):
+        if args.only and not any(part in name for part in args.only): return
+        per_call = time_calls(fn, calls, repeat, setup)
+        results[name] = {'us_per_call': round(per_call * 1e6, 4), 'calls': len(calls)}
+        print(f"{name:<40} {per_call * 1e6:>12.3f} us/call  ({len(calls)} calls)")
+
+    for stage, sunk in STAGES:
+        positions = staged_positions(args.positions, sunk, args.seed, args.rows, args.cols, args.penguins)
+        penguins = [(state, *state.cell(index)) for state in positions
+                    for player in (HUMAN, AI) for index in state.penguin_cells(player)]
+        record(f"get_valid_moves/{stage}", get_valid_moves, penguins)
+        record(f"player_has_moves/{stage}", GameState.player_has_moves,
+               [(state, player) for state in positions for player in (HUMAN, AI)])
+        record(f"check_game_over/{stage}", GameState.is_terminal, [(state,) for state in positions])
+        ai_positions = [(state,) for state in positions[:args.ai_positions]]
+        for spec in AI_PLAYERS:
+            setup, choose = ai_case(spec)
+            record(f"ai_move/{spec}/{stage}", choose, ai_positions, args.ai_repeat, setup)
+
+    layout = BoardLayout.fit(args.rows, args.cols, *WINDOW_AREA)
+    rng = random.Random(args.seed)
+    (left, bottom), (right, top) = layout.hex_center(0, 0), layout.hex_center(args.rows - 1, args.cols - 1)
+    pad = layout.radius
+    points = [(rng.uniform(left - pad, right + pad), rng.uniform(bottom - pad, top + pad)) for _ in range(args.points)]
+    cells = [layout.hex_center(*divmod(i, args.cols)) for i in range(args.rows * args.cols)]
+    record("get_hex_from_mouse", layout.pick, points)
+    record("get_hex_center", layout.hex_center, [divmod(i, args.cols) for i in range(args.rows * args.cols)])
+    record("get_hex_points", layout.hex_points, cells)
+    return results
+
+
+def compare(results, baseline, threshold):
+    # Prints each case against the baseline; returns the names that got slower than threshold
+    regressions = []
+    print(f"\n{'case':<40} {'baseline':>10} {'now':>10} {'change':>8}")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:<40} {'-':>10} {result['us_per_call']:>10.3f}      new")
+            continue
+        change = result['us_per_call'] / old['us_per_call'] - 1
+        slower = change > threshold
+        if slower: regressions.append(name)
+        print(f"{name:<40} {old['us_per_call']:>10.3f} {result['us_per_call']:>10.3f} {change:>+7.1%}{'  REGRESSION' if slower else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks for rules, AI and board geometry")
+    parser.add_argument('-o', '--output', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="JSON results from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10, help="slowdown that counts as a regression (0.10 = 10%%)")
+    parser.add_argument('--only', nargs='+', help="run only cases whose name contains one of these")
+    parser.add_argument('--rows', type=int, default=BOARD_ROWS)
+    parser.add_argument('--cols', type=int, default=BOARD_COLS)
+    parser.add_argument('--penguins', type=int, default=PENGUINS_PER_PLAYER)
+    parser.add_argument('--positions', type=int, default=200, help="positions per stage")
+    parser.add_argument('--ai-positions', type=int, default=10, help="positions per stage the AIs move in")
+    parser.add_argument('--points', type=int, default=10000, help="points picked")
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--ai-repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    results = run(args)
+    report = {'meta': {'python': platform.python_version(), 'machine': platform.machine(),
+                       'platform': platform.platform(), 'board': [args.rows, args.cols, args.penguins],
+                       'seed': args.seed, 'positions': args.positions, 'repeat': args.repeat,
+                       'date': time.strftime('%Y-%m-%dT%H:%M:%S')},
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as f: json.dump(report, f, indent=2)
+        print(f"results written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f: baseline = json.load(f)
+        if baseline['meta'].get('board') != report['meta']['board']:
+            print(f"warning: baseline was run on board {baseline['meta'].get('board')}")
+        regressions = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import gc
+import os
+import sys
+import time
+import weakref
+
+# Restarts the game view over and over, the way a kiosk goes from game over to a
+# new game, and checks that nothing piles up: clock callbacks still scheduled,
+# game views still alive, Python objects, resident memory and the CPU a frame
+# costs should all stay flat. Exits non-zero if any of them grows.
+# Run from the repo root:  python -m benchmarks.soak_restarts [--restarts 1000] [--headless]
+
+FRAMES_PER_GAME = 3
+MEASURE_FRAMES = 60
+OBJECT_GROWTH = 0.05  # more Python objects than this (as a fraction) counts as growth
+CPU_GROWTH = 0.5      # and this much more CPU per frame
+RSS_GROWTH = 0.25     # and this much more resident memory, at its lowest (see below)
+
+
+def rss_mb():
+    # Resident set size where /proc has it, else None
+    try:
+        with open('/proc/self/statm') as f: pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def live_callbacks(clock):
+    # pyglet unschedules a timed callback by swapping in a no-op that stays queued
+    # until it comes due; those are already gone as far as the game is concerned
+    cancelled = lambda item: getattr(item.func, '__qualname__', '').startswith('Clock.unschedule.')
+    return len(clock._schedule_items) + sum(not cancelled(item) for item in clock._schedule_interval_items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game view restart soak test")
+    parser.add_argument('--restarts', type=int, default=1000)
+    parser.add_argument('--every', type=int, default=100, help="measure after this many restarts")
+    parser.add_argument('--headless', action='store_true', help="render offscreen (no display needed)")
+    args = parser.parse_args()
+    if args.headless: os.environ['ARCADE_HEADLESS'] = '1'
+
+    import arcade
+    import pyglet
+    import hey_thatsmyfish as game
+
+    game.RECORD_PATH = None
+    window = arcade.Window(game.SCREEN_WIDTH, game.SCREEN_HEIGHT, game.SCREEN_TITLE)
+    clock = pyglet.clock.get_default()
+    views = weakref.WeakSet()
+
+    def frames(count):
+        for _ in range(count):
+            window.switch_to()
+            window.dispatch_events()
+            window.dispatch_event('on_draw')
+            window.flip()
+            clock.tick()
+            window.dispatch_event('on_update', 1 / 60)
+            # As the run loop does: sounds post their end-of-stream events here
+            pyglet.app.platform_event_loop.dispatch_posted_events()
+
+    def measure(restarts):
+        gc.collect()
+        start = time.process_time()
+        frames(MEASURE_FRAMES)
+        cpu = (time.process_time() - start) / MEASURE_FRAMES
+        scheduled = live_callbacks(clock)
+        rss = rss_mb()
+        row = (restarts, scheduled, len(views), len(gc.get_objects()), rss, cpu)
+        print(f"{restarts:>8} {scheduled:>10} {len(views):>11} {row[3]:>10,} "
+              f"{f'{rss:.1f}' if rss is not None else '-':>8} {cpu * 1000:>11.3f}")
+        return row
+
+    view = game.MyGame()
+    views.add(view)
+    window.show_view(view)
+    frames(FRAMES_PER_GAME)
+    print(f"{'restarts':>8} {'scheduled':>10} {'live games':>11} {'objects':>10} {'RSS MB':>8} {'ms/frame':>11}")
+    rows = [measure(0)]
+    for restart in range(1, args.restarts + 1):
+        window.current_view.end_game()
+        window.current_view.on_mouse_press(0, 0, arcade.MOUSE_BUTTON_LEFT, 0)  # "Click to Restart"
+        views.add(window.current_view)
+        frames(FRAMES_PER_GAME)
+        if restart % args.every == 0: rows.append(measure(restart))
+
+    # The first measurement is before caches (fish art, sounds, atlases) warm up
+    first, last = rows[1] if len(rows) > 2 else rows[0], rows[-1]
+    growing = []
+    if last[1] > first[1]: growing.append("scheduled callbacks")
+    if last[2] > first[2]: growing.append("live game views")
+    if last[3] > first[3] * (1 + OBJECT_GROWTH): growing.append("Python objects")
+    # Resident memory swings by a hundred MB or more between measurements (GL buffers, freed
+    # pages the allocator keeps), but a leak lifts its floor: compare the lowest over the
+    # later half of the run with the lowest over the earlier half
+    rss = [row[4] for row in (rows[1:] if len(rows) > 2 else rows)]
+    if rss[0] is not None and min(rss[len(rss) // 2:]) > min(rss[:len(rss) // 2] or rss) * (1 + RSS_GROWTH):
+        growing.append("resident memory")
+    if last[5] > first[5] * (1 + CPU_GROWTH): growing.append("CPU per frame")
+    window.close()
+    if growing:
+        print(f"GROWING: {', '.join(growing)}")
+        sys.exit(1)
+    print("flat")
+
+
+if __name__ == "__main__":
+    main()
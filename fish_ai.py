@@ -0,0 +1,153 @@
+import random
+from collections import namedtuple
+
+import fish_mcts
+from fish_engine import PLACE, PLACEMENT
+from fish_regions import IslandSolver, island_move
+from fish_search import Searcher, evaluate, zobrist_hash
+from fish_smp import ParallelSearcher
+
+# AI players behind one interface:
+#   choose_move(state, time_budget, on_progress=None, should_stop=None) -> Choice
+# on_progress(Choice) receives the best move found so far; should_stop() lets the
+# caller cancel. MyGame picks one by name through make_player(AI_ENGINE).
+# Players may also have ponder(state, should_stop): think ahead, with the opponent
+# to move in state, until should_stop() returns True.
+
+Choice = namedtuple('Choice', 'move report')
+
+PONDER_REPLIES = 4       # opponent replies searched while pondering, likeliest first
+PONDER_SLICE = 0.1       # seconds per reply in the first round; doubled every round
+PONDER_HIT_TIME = 0.25   # after a pondered reply the search only tops up for this long
+
+
+class GreedyPlayer:
+    # The original one-ply AI: random 1-fish placement, then the move whose
+    # destination tile holds the most fish -- except on a board split into
+    # single-owner islands, where it plays the solver's move.
+    name = 'greedy'
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.islands = IslandSolver()
+
+    def choose_move(self, state, time_budget, on_progress=None, should_stop=None):
+        moves = state.legal_moves()
+        if not moves: return Choice(None, "greedy: no moves")
+        if state.phase == PLACEMENT: return Choice(self.rng.choice(moves), "greedy: random placement")
+        move = island_move(state, self.islands)
+        if move is not None: return Choice(move, "greedy: solved islands")
+        return Choice(max(moves, key=lambda m: state.fish[m[1]]), "greedy: best destination")
+
+
+class AlphaBetaPlayer:
+    name = 'alphabeta'
+
+    # workers > 1 (or 0: every core) searches on that many processes at once; see fish_smp
+    def __init__(self, seed=None, tt_bits=18, max_depth=64, batch_leaves=False, workers=1):
+        if workers == 1: self.searcher = Searcher(tt_bits, batch_leaves=bool(batch_leaves))
+        else: self.searcher = ParallelSearcher(workers, tt_bits, bool(batch_leaves))
+        self.max_depth = max_depth
+        self.pondered = {}  # zobrist hash -> SearchResult, for positions after a pondered reply
+        self.pondered_fish = None  # the deal they were pondered on: hashes leave it out
+
+    def choose_move(self, state, time_budget, on_progress=None, should_stop=None):
+        # A pondered position is answered at once and then only topped up; either way
+        # the search starts from whatever the transposition table kept
+        pondered = self.pondered.get(zobrist_hash(state)) if self.pondered and state.fish == self.pondered_fish else None
+        self.pondered = {}
+        if pondered is not None:
+            if on_progress: on_progress(self._choice(pondered, True))
+            time_budget = min(time_budget, PONDER_HIT_TIME)
+        report = (lambda r: on_progress(self._choice(r))) if on_progress else None
+        result = self.searcher.search(state, time_budget, self.max_depth, report, should_stop)
+        if pondered is not None and pondered.depth > result.depth: return self._choice(pondered, True)
+        return self._choice(result, pondered is not None)
+
+    def ponder(self, state, should_stop):
+        # Searches the positions after the opponent's likeliest replies in turn, a
+        # little longer each round. Results for replies that aren't played are
+        # dropped by the next choose_move.
+        self.pondered = {}
+        self.pondered_fish = state.fish
+        me = 1 - state.current
+        children = []
+        for move in likely_replies(state)[:PONDER_REPLIES]:
+            child = state.copy()
+            child.make_move(move)
+            if child.current == me and not child.is_terminal(): children.append(child)
+        budget = PONDER_SLICE
+        while children:
+            for child in children:
+                if should_stop(): return
+                h = zobrist_hash(child)
+                result = self.searcher.search(child, budget, self.max_depth, None, should_stop)
+                if result.depth and (h not in self.pondered or result.depth >= self.pondered[h].depth):
+                    self.pondered[h] = result
+            # Nothing deeper to find once every reply is searched to max_depth
+            if all(result.depth >= self.max_depth for result in self.pondered.values()) and \
+                    len(self.pondered) == len(children): return
+            budget *= 2
+
+    @staticmethod
+    def _choice(r, pondered=False):
+        return Choice(r.move, f"alphabeta{' (pondered)' if pondered else ''}: depth {r.depth}, {r.nodes} nodes "
+                              f"in {r.elapsed:.2f}s ({r.nps:.0f} nodes/s), value {r.value:+.1f}")
+
+
+def likely_replies(state):
+    # Legal moves for the side to move, best first by one ply and the static evaluation
+    player = state.current
+    scratch = state.copy()
+    ranked = []
+    for move in state.legal_moves():
+        gain = 0 if move[0] == PLACE else state.fish[move[0]]
+        scratch.make_move(move)
+        if scratch.is_terminal(): value = gain
+        elif scratch.current == player: value = gain + evaluate(scratch)
+        else: value = gain - evaluate(scratch)
+        scratch.unmake_move()
+        ranked.append((value, move))
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return [move for _, move in ranked]
+
+
+class MctsPlayer:
+    name = 'mcts'
+
+    def __init__(self, seed=None, workers=None, max_playouts=None):
+        self.rng = random.Random(seed)
+        self.workers = workers
+        self.max_playouts = max_playouts
+
+    def choose_move(self, state, time_budget, on_progress=None, should_stop=None):
+        report = (lambda r: on_progress(self._choice(r))) if on_progress else None
+        return self._choice(fish_mcts.search(state, time_budget, self.workers, self.rng.getrandbits(32),
+                                             report, should_stop, self.max_playouts))
+
+    @staticmethod
+    def _choice(r):
+        return Choice(r.move, f"mcts: {r.playouts} playouts on {r.workers} cores in {r.elapsed:.2f}s "
+                              f"({r.playouts_per_core:.0f} playouts/s/core)")
+
+
+PLAYER_TYPES = {cls.name: cls for cls in (GreedyPlayer, AlphaBetaPlayer, MctsPlayer)}
+
+
+def parse_player(spec):
+    # "alphabeta:max_depth=3,tt_bits=16" -> ('alphabeta', {'max_depth': 3, 'tt_bits': 16})
+    name, _, rest = spec.partition(':')
+    options = {}
+    for item in filter(None, rest.split(',')):
+        key, _, value = item.partition('=')
+        try:
+            options[key] = int(value)
+        except ValueError:
+            options[key] = float(value)
+    return name, options
+
+
+def make_player(name, **options):
+    if name not in PLAYER_TYPES:
+        raise ValueError(f"unknown AI engine {name!r}, expected one of {sorted(PLAYER_TYPES)}")
+    return PLAYER_TYPES[name](**options)
@@ -0,0 +1,52 @@
+import os
+from functools import lru_cache
+
+import arcade
+from PIL import Image
+
+# Image assets, decoded once per process and shared by every game view.
+# The fish art ships as 1024px PNGs but is only ever drawn at tile size, so each
+# image is downscaled once on load and the three results are packed into one
+# small atlas instead of three full-size textures in the default one.
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+FISH_IMAGES = {1: 'fish1.png', 2: 'fish2.png', 3: 'fish3.png'}
+ATLAS_BORDER = 1
+
+_atlases = {}
+
+
+def asset_path(name):
+    return os.path.join(ASSET_DIR, name)
+
+
+def fit_size(width, height, target):
+    # Longest side becomes target, aspect ratio kept
+    if width > height: return round(target), max(1, round(target * height / width))
+    return max(1, round(target * width / height)), round(target)
+
+
+@lru_cache(maxsize=None)
+def fish_textures(target_size):
+    # {fish count: Texture} downscaled so the longest side is target_size pixels
+    textures = {}
+    for count, name in FISH_IMAGES.items():
+        with Image.open(asset_path(name)) as image:
+            image = image.convert('RGBA')
+            image = image.resize(fit_size(image.width, image.height, target_size), Image.LANCZOS)
+        textures[count] = arcade.Texture(image, hash=f"fish{count}-{target_size}")
+    return textures
+
+
+def fish_atlas(target_size, ctx=None):
+    # One atlas per window context and size, holding only the fish textures
+    ctx = ctx or arcade.get_window().ctx
+    key = (id(ctx), target_size)
+    atlas = _atlases.get(key)
+    if atlas is None:
+        textures = list(fish_textures(target_size).values())
+        width = sum(t.width + 2 * ATLAS_BORDER for t in textures)
+        height = max(t.height for t in textures) + 2 * ATLAS_BORDER
+        atlas = _atlases[key] = arcade.DefaultTextureAtlas((width, height), border=ATLAS_BORDER,
+                                                           textures=textures, ctx=ctx)
+    return atlas
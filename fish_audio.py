@@ -0,0 +1,117 @@
+import time
+
+import arcade
+
+from fish_assets import asset_path
+
+# One audio service for the whole process, shared by every view. Effects are
+# decoded on first use and kept; the background music is streamed from disk
+# rather than decoded up front. At most MAX_VOICES effects play at once, and
+# effects of the same group started within MERGE_WINDOW of each other collapse
+# into one voice (the higher-priority sound wins), so a move that also scores
+# plays the coin rather than both sounds on top of each other.
+
+SOUND_FILES = {
+    'move': ":resources:sounds/jump1.wav",
+    'score': ":resources:sounds/coin1.wav",
+    'invalid': ":resources:sounds/error1.wav",
+    'win': ":resources:sounds/upgrade1.wav",
+    'lose': ":resources:sounds/laser1.wav",
+    'click': ":resources:sounds/hit1.wav",
+    'isolated': ":resources:sounds/error2.wav",
+    'select': asset_path("sound.wav"),
+}
+FALLBACK_FILES = {'select': ":resources:sounds/coin2.wav"}
+MUSIC_FILE = ":resources:music/funkyrobot.mp3"
+
+# name -> (group, priority)
+SOUND_GROUPS = {'move': ('move', 0), 'score': ('move', 1)}
+
+MAX_VOICES = 4
+MERGE_WINDOW = 0.1
+
+_audio = None
+
+
+class Voice:
+    __slots__ = ('name', 'group', 'priority', 'started', 'player')
+
+    def __init__(self, name, started, player):
+        self.name = name
+        self.group, self.priority = SOUND_GROUPS.get(name, (name, 0))
+        self.started = started
+        self.player = player
+
+
+class AudioManager:
+    def __init__(self, max_voices=MAX_VOICES, merge_window=MERGE_WINDOW):
+        self.max_voices = max_voices
+        self.merge_window = merge_window
+        self.sounds = {}  # name -> Sound, or None if it couldn't be loaded
+        self.voices = []
+        self.music_player = None
+        self.music_failed = False
+
+    def sound(self, name):
+        if name not in self.sounds:
+            self.sounds[name] = None
+            for path in (SOUND_FILES[name], FALLBACK_FILES.get(name)):
+                if path is None: continue
+                try:
+                    self.sounds[name] = arcade.load_sound(path)
+                    break
+                except Exception as e:
+                    print(f"WARNING: Could not load sound '{name}' from {path}: {e}")
+        return self.sounds[name]
+
+    def play(self, name, volume=1.0):
+        sound = self.sound(name)
+        if sound is None: return None
+        now = time.perf_counter()
+        self._reap()
+        voice = Voice(name, now, None)
+        for other in self.voices:
+            if other.group == voice.group and now - other.started < self.merge_window:
+                if other.priority >= voice.priority: return None
+                self._stop(other)
+                break
+        if len(self.voices) >= self.max_voices: self._stop(self.voices[0])
+        try:
+            voice.player = sound.play(volume=volume)
+        except Exception as e:
+            print(f"ERROR playing sound '{name}': {e}")
+            return None
+        self.voices.append(voice)
+        return voice.player
+
+    def _reap(self):
+        # Free the players of effects that have finished
+        for voice in [v for v in self.voices if not v.player.playing]: self._stop(voice)
+
+    def _stop(self, voice):
+        self.voices.remove(voice)
+        arcade.stop_sound(voice.player)
+
+    def play_music(self, volume=0.4):
+        # Plays once; a streamed source can only back one player, so each start reopens the file
+        if self.music_player is not None or self.music_failed: return
+        try:
+            self.music_player = arcade.load_sound(MUSIC_FILE, streaming=True).play(volume=volume)
+        except Exception as e:
+            print(f"WARNING: Could not start background music: {e}")
+            self.music_failed = True
+
+    def stop_music(self):
+        if self.music_player is not None:
+            arcade.stop_sound(self.music_player)
+            self.music_player = None
+
+    def stop_all(self):
+        for voice in list(self.voices): self._stop(voice)
+        self.stop_music()
+
+
+def shared_audio():
+    global _audio
+    if _audio is None: _audio = AudioManager()
+    return _audio
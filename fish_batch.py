@@ -0,0 +1,177 @@
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from fish_search import REACH_WEIGHT, STUCK_PENGUIN_PENALTY
+
+# Scores many positions in one NumPy pass instead of calling fish_search.evaluate
+# once per leaf. Positions are stacked into (batch, rows, cols) grids and every
+# penguin's rays are cast at once: a direction's frontier steps one tile outwards
+# with two slice copies (one per row parity) and is masked with the open tiles,
+# so the loop runs at most max(rows, cols) times per direction whatever the
+# batch size.
+#
+# Batches stacked from GameStates also carry each penguin's tracked reach, so
+# their features skip the ray casting and only the per-tile sums remain;
+# from_arrays() builds a batch from bare board arrays, which is cast in full.
+# All positions in a batch must share a board size. evaluate_batch() gives the
+# same numbers as fish_search.evaluate().
+
+# reach (batch, 2, cells) bool, moves and stuck (batch, 2): None when not tracked
+PositionBatch = namedtuple('PositionBatch', 'rows cols fish holes penguins current reach moves stuck')
+BatchFeatures = namedtuple('BatchFeatures', 'moves reach_fish contested stuck')
+
+# Upper bound on batch * cells per vectorized pass; bigger batches are split
+CHUNK_CELLS = 1 << 22
+
+
+# Odd-r offset neighbours as (row step, column step on even rows, column step on odd rows)
+HEX_STEPS = ((0, 1, 1), (0, -1, -1), (1, 0, 1), (1, -1, 0), (-1, 0, 1), (-1, -1, 0))
+
+
+@lru_cache(maxsize=None)
+def step_slices(rows, cols):
+    # For each direction, (source, destination) slice pairs over (rows, cols), one pair
+    # per row parity, so a whole grid steps one tile with two slice copies
+    table = []
+    for dr, even_dc, odd_dc in HEX_STEPS:
+        pairs = []
+        for parity, dc in ((0, even_dc), (1, odd_dc)):
+            first = parity if parity + dr >= 0 else parity + 2
+            last = rows - 1 if rows - 1 + dr < rows else rows - 2
+            sources = range(first, last + 1, 2)
+            if not sources: continue
+            src_rows = slice(sources[0], sources[-1] + 1, 2)
+            dst_rows = slice(sources[0] + dr, sources[-1] + dr + 1, 2)
+            src_cols = slice(max(0, -dc), cols - max(0, dc))
+            dst_cols = slice(max(0, dc), cols - max(0, -dc))
+            pairs.append(((Ellipsis, src_rows, src_cols), (Ellipsis, dst_rows, dst_cols)))
+        table.append(pairs)
+    return table
+
+
+def step(grid, pairs):
+    # Every True cell of grid (..., rows, cols) moved one tile along a direction
+    out = np.zeros_like(grid)
+    for source, destination in pairs: out[destination] = grid[source]
+    return out
+
+
+def _unpack(masks, cells):
+    # Bitmasks -> (len(masks), cells) bool
+    width = (cells + 7) // 8
+    raw = np.frombuffer(b''.join(m.to_bytes(width, 'little') for m in masks), dtype=np.uint8)
+    return np.unpackbits(raw.reshape(len(masks), width), axis=1, count=cells, bitorder='little').view(bool)
+
+
+def stack(states):
+    first = states[0]
+    cells = first.size
+    if any(s.size != cells or s.cols != first.cols for s in states):
+        raise ValueError("all positions in a batch must have the same board size")
+    size = len(states)
+    fish = np.frombuffer(b''.join(bytes(s.fish) for s in states), dtype=np.uint8).reshape(size, cells)
+    holes = _unpack([s.holes for s in states], cells)
+    penguins = _unpack([m for s in states for m in s.penguins], cells).reshape(size, 2, cells)
+    current = np.fromiter((s.current for s in states), dtype=np.intp, count=size)
+    unions, moves, stuck = [], [], []
+    for s in states:
+        for reach in s.reach:
+            union = count = blocked = 0
+            for mask in reach.values():
+                union |= mask
+                count += mask.bit_count()
+                blocked += not mask
+            unions.append(union)
+            moves.append(count)
+            stuck.append(blocked)
+    reach = _unpack(unions, cells).reshape(size, 2, cells)
+    moves = np.array(moves, dtype=np.int64).reshape(size, 2)
+    stuck = np.array(stuck, dtype=np.int64).reshape(size, 2)
+    return PositionBatch(first.rows, first.cols, fish, holes, penguins, current, reach, moves, stuck)
+
+
+def from_arrays(rows, cols, fish, holes, penguins, current):
+    # fish (batch, cells) uint8, holes (batch, cells) bool, penguins (batch, 2, cells) bool,
+    # current (batch,) player to move
+    return PositionBatch(rows, cols, np.asarray(fish, dtype=np.uint8), np.asarray(holes, dtype=bool),
+                         np.asarray(penguins, dtype=bool), np.asarray(current, dtype=np.intp), None, None, None)
+
+
+def features(batch):
+    # Per position and player: legal move count, fish on the tiles reachable in one move,
+    # penguins with no move at all; per position: tiles both players can reach.
+    if batch.reach is None: reach, moves, stuck = _cast(batch)
+    else: reach, moves, stuck = batch.reach, batch.moves, batch.stuck
+    reach_fish = (reach * batch.fish[:, None, :]).sum(axis=2, dtype=np.int64)
+    contested = np.count_nonzero(reach[:, 0] & reach[:, 1], axis=1)
+    return BatchFeatures(moves, reach_fish, contested, stuck)
+
+
+def _cast(batch):
+    # Reach, move counts and stuck penguins from the bare board arrays
+    size, rows, cols = len(batch.fish), batch.rows, batch.cols
+    grid = (size, rows, cols)
+    penguins = batch.penguins.reshape(size, 2, rows, cols)
+    open_cells = ~(batch.holes | batch.penguins[:, 0] | batch.penguins[:, 1]).reshape(grid)[:, None]
+
+    reach = np.zeros((size, 2, rows, cols), dtype=bool)
+    moves = np.zeros((size, 2), dtype=np.int64)
+    movable = np.zeros((size, 2, rows, cols), dtype=bool)
+    for pairs in step_slices(rows, cols):
+        frontier = step(penguins, pairs) & open_cells
+        # A penguin can move this way if the first tile is open; step back to mark it
+        movable |= step(frontier, [(d, s) for s, d in pairs])
+        while frontier.any():
+            moves += np.count_nonzero(frontier, axis=(2, 3))
+            reach |= frontier
+            frontier = step(frontier, pairs) & open_cells
+
+    stuck = np.count_nonzero(penguins & ~movable, axis=(2, 3))
+    return reach.reshape(size, 2, rows * cols), moves, stuck
+
+
+def score(batch, feats):
+    # fish_search.evaluate for every position: side to move minus the opponent
+    value = REACH_WEIGHT * feats.reach_fish - STUCK_PENGUIN_PENALTY * feats.stuck
+    rows = np.arange(len(value))
+    return value[rows, batch.current] - value[rows, 1 - batch.current]
+
+
+def evaluate_batch(states):
+    # np.ndarray of evaluate(state) for every state
+    if not states: return np.zeros(0)
+    chunk = max(1, CHUNK_CELLS // states[0].size)
+    parts = []
+    for start in range(0, len(states), chunk):
+        batch = stack(states[start:start + chunk])
+        parts.append(score(batch, features(batch)))
+    return np.concatenate(parts)
+
+
+class LeafQueue:
+    # Collects leaves from a search or self-play loop and scores them together:
+    # submit() returns a ticket, flush() fills in .values for every pending ticket
+    def __init__(self, batch_size=1024):
+        self.batch_size = batch_size
+        self.pending = []
+        self.values = {}
+        self._next = 0
+
+    def submit(self, state):
+        ticket = self._next
+        self._next += 1
+        self.pending.append((ticket, state))
+        if len(self.pending) >= self.batch_size: self.flush()
+        return ticket
+
+    def flush(self):
+        if not self.pending: return
+        tickets, states = zip(*self.pending)
+        self.values.update(zip(tickets, evaluate_batch(list(states)).tolist()))
+        self.pending.clear()
+
+    def value(self, ticket):
+        if ticket not in self.values: self.flush()
+        return self.values.pop(ticket)
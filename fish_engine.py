@@ -0,0 +1,419 @@
+import random
+from functools import lru_cache
+
+import numpy as np
+
+# Headless rules for Hey, That's My Fish! -- no arcade import, safe to use from
+# AI search, simulations and tests.
+
+BOARD_ROWS = 8
+BOARD_COLS = 8
+PENGUINS_PER_PLAYER = 3
+
+# Boards with at least this many cells cast rays and count cells with NumPy instead
+# of per-cell tables, which would take gigabytes at 256x256
+VECTORIZE_CELLS = 1024
+
+HUMAN = 0
+AI = 1
+PLAYERS = ('human', 'ai')
+
+PLACEMENT = 'placement'
+IN_PROGRESS = 'game_in_progress'
+
+# Source cell of a placement move: (PLACE, dest)
+PLACE = -1
+
+# Cube directions, same order as the original get_valid_moves
+CUBE_DIRECTIONS = ((1, -1, 0), (-1, 1, 0), (1, 0, -1), (-1, 0, 1), (0, 1, -1), (0, -1, 1))
+
+
+def deal_fish(rows=BOARD_ROWS, cols=BOARD_COLS, rng=random):
+    # 60% one fish, 30% two fish, rest three fish, laid out like setup_board did
+    total = rows * cols
+    one_fish_count = int(total * 0.6)
+    two_fish_count = int(total * 0.3)
+    three_fish_count = total - one_fish_count - two_fish_count
+    fish_counts = [1] * one_fish_count + [2] * two_fish_count + [3] * three_fish_count
+    rng.shuffle(fish_counts)
+    fish_counts.reverse()
+    return bytearray(fish_counts)
+
+
+def ray_cells(rows, cols, row, col, direction):
+    # Cells walked from (row, col) in one cube direction, nearest first
+    dx, dy, dz = direction
+    x = col - (row - (row & 1)) // 2
+    z = row
+    cells = []
+    while True:
+        x += dx; z += dz
+        r = z
+        c = x + (z - (z & 1)) // 2
+        if not (0 <= r < rows and 0 <= c < cols): break
+        cells.append(r * cols + c)
+    return cells
+
+
+@lru_cache(maxsize=None)
+def ray_table(rows, cols):
+    # For every cell, its six direction rays as tuples of cell indices; built once per board size
+    return tuple(
+        tuple(tuple(ray) for ray in (ray_cells(rows, cols, row, col, d) for d in CUBE_DIRECTIONS) if ray)
+        for row in range(rows) for col in range(cols)
+    )
+
+
+@lru_cache(maxsize=None)
+def ray_mask_table(rows, cols):
+    # For every cell, its rays as (bitmask, ascending): cell indices along a ray only ever
+    # grow or only shrink, so the nearest blocked cell is the lowest or highest set bit
+    return tuple(
+        tuple((sum(1 << c for c in ray), ray[0] > index) for ray in rays)
+        for index, rays in enumerate(ray_table(rows, cols))
+    )
+
+
+@lru_cache(maxsize=None)
+def shadow_table(rows, cols):
+    # shadow[origin][cell]: bitmask of the cells on origin's ray through cell, from cell
+    # outwards -- everything a penguin at origin stops reaching once cell is blocked
+    table = []
+    for rays in ray_table(rows, cols):
+        shadows = {}
+        for ray in rays:
+            mask = 0
+            for cell in reversed(ray):
+                mask |= 1 << cell
+                shadows[cell] = mask
+        table.append(shadows)
+    return tuple(table)
+
+
+@lru_cache(maxsize=1 << 14)
+def ray_arrays(rows, cols, index):
+    # Large-board counterpart of ray_table: one cell's rays as index arrays, cached per cell
+    row, col = divmod(index, cols)
+    rays = (ray_cells(rows, cols, row, col, d) for d in CUBE_DIRECTIONS)
+    return tuple(np.array(ray, dtype=np.intp) for ray in rays if ray)
+
+
+@lru_cache(maxsize=1 << 14)
+def cell_ray_masks(rows, cols, index):
+    # Large-board counterpart of ray_mask_table: one cell's entry, cached per cell
+    row, col = divmod(index, cols)
+    rays = (ray_cells(rows, cols, row, col, d) for d in CUBE_DIRECTIONS)
+    return tuple((sum(1 << c for c in ray), ray[0] > index) for ray in rays if ray)
+
+
+def ray_reach(ray_masks, blocked):
+    # Bitmask of the cells reachable along one cell's ray_mask_table entry
+    mask = 0
+    for ray, ascending in ray_masks:
+        hit = ray & blocked
+        if not hit: mask |= ray
+        elif ascending: mask |= ray & ((hit & -hit) - 1)
+        else: mask |= ray & -(1 << hit.bit_length())
+    return mask
+
+
+def mask_array(mask, size):
+    # Bitmask -> bool array with one entry per cell
+    bits = np.frombuffer(mask.to_bytes((size + 7) // 8, 'little'), dtype=np.uint8)
+    return np.unpackbits(bits, count=size, bitorder='little').view(bool)
+
+
+def array_mask(cells):
+    # Bool array with one entry per cell -> bitmask
+    return int.from_bytes(np.packbits(cells, bitorder='little').tobytes(), 'little')
+
+
+class GameState:
+    # Besides the board, the state keeps every penguin's reachable cells as a bitmask
+    # (reach[player][cell]) and how many of each player's penguins can still move.
+    # Cells only ever go from open to blocked, so a move just trims the rays that pass
+    # through the newly occupied cell; mobility and game-over checks are O(1).
+    # Boards of VECTORIZE_CELLS or more skip the per-cell tables and do the same work
+    # with NumPy over fish_array and unpacked masks.
+    #
+    # make_move()/unmake_move() play and take back moves in place: history holds one
+    # record per move and reach_log the reach entries it overwrote, so search and
+    # undo don't need a copy of the state per move.
+    __slots__ = ('rows', 'cols', 'size', 'vectorized', 'rays', 'ray_masks', 'shadows', 'fish', 'fish_array',
+                 'holes', 'penguins', 'reach', 'mobile', 'scores', 'unplaced', 'current', 'phase',
+                 'history', 'reach_log')
+
+    def __init__(self, fish, rows=BOARD_ROWS, cols=BOARD_COLS, penguins_per_player=PENGUINS_PER_PLAYER):
+        if len(fish) != rows * cols:
+            raise ValueError(f"expected {rows * cols} fish counts, got {len(fish)}")
+        self._set_board(rows, cols, bytearray(fish))
+        self.holes = 0
+        self.penguins = [0, 0]
+        self.reach = [{}, {}]
+        self.mobile = [0, 0]
+        self.scores = [0, 0]
+        self.unplaced = [penguins_per_player, penguins_per_player]
+        self.current = HUMAN
+        self.phase = PLACEMENT
+        self.history = []
+        self.reach_log = []
+
+    def _set_board(self, rows, cols, fish):
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.vectorized = self.size >= VECTORIZE_CELLS
+        if self.vectorized: self.rays = self.ray_masks = self.shadows = None
+        else:
+            self.rays = ray_table(rows, cols)
+            self.ray_masks = ray_mask_table(rows, cols)
+            self.shadows = shadow_table(rows, cols)
+        self.fish = fish
+        self.fish_array = np.frombuffer(fish, dtype=np.uint8)
+
+    @classmethod
+    def new_game(cls, rng=random, rows=BOARD_ROWS, cols=BOARD_COLS, penguins_per_player=PENGUINS_PER_PLAYER):
+        return cls(deal_fish(rows, cols, rng), rows, cols, penguins_per_player)
+
+    def copy(self):
+        other = GameState.__new__(GameState)
+        other.rows = self.rows
+        other.cols = self.cols
+        other.size = self.size
+        other.vectorized = self.vectorized
+        other.rays = self.rays
+        other.ray_masks = self.ray_masks
+        other.shadows = self.shadows
+        other.fish = self.fish  # never mutated once dealt, so copies share it
+        other.fish_array = self.fish_array
+        other.holes = self.holes
+        other.penguins = self.penguins[:]
+        other.reach = [self.reach[0].copy(), self.reach[1].copy()]
+        other.mobile = self.mobile[:]
+        other.scores = self.scores[:]
+        other.unplaced = self.unplaced[:]
+        other.current = self.current
+        other.phase = self.phase
+        other.history = []
+        other.reach_log = []
+        return other
+
+    # Pickled without the lookup tables, which are rebuilt (or found cached) on load,
+    # or the undo history
+    def __getstate__(self):
+        return (self.rows, self.cols, bytes(self.fish), self.holes, self.penguins, self.reach, self.mobile,
+                self.scores, self.unplaced, self.current, self.phase)
+
+    def __setstate__(self, state):
+        rows, cols, fish, *rest = state
+        self._set_board(rows, cols, bytearray(fish))
+        self.holes, self.penguins, self.reach, self.mobile, self.scores, self.unplaced, self.current, self.phase = rest
+        self.history = []
+        self.reach_log = []
+
+    # --- cell queries ---
+
+    def index(self, row, col): return row * self.cols + col
+    def cell(self, index): return divmod(index, self.cols)
+    def is_hole(self, index): return bool(self.holes >> index & 1)
+
+    def penguin_at(self, index):
+        if self.penguins[HUMAN] >> index & 1: return HUMAN
+        if self.penguins[AI] >> index & 1: return AI
+        return None
+
+    def penguin_cells(self, player):
+        mask = self.penguins[player]
+        cells = []
+        while mask:
+            low = mask & -mask
+            cells.append(low.bit_length() - 1)
+            mask ^= low
+        return cells
+
+    def cells_of(self, mask):
+        # Cell indices set in mask, ascending
+        if self.vectorized: return np.flatnonzero(mask_array(mask, self.size)).tolist()
+        cells = []
+        while mask:
+            low = mask & -mask
+            cells.append(low.bit_length() - 1)
+            mask ^= low
+        return cells
+
+    def fish_in(self, mask):
+        # Total fish on the cells of mask
+        if self.vectorized: return int(self.fish_array[mask_array(mask, self.size)].sum(dtype=np.int64))
+        fish = self.fish
+        total = 0
+        while mask:
+            low = mask & -mask
+            total += fish[low.bit_length() - 1]
+            mask ^= low
+        return total
+
+    # --- move generation ---
+
+    def _open_cells(self):
+        return ~mask_array(self.holes | self.penguins[HUMAN] | self.penguins[AI], self.size)
+
+    def _cast(self, index):
+        # Vectorized ray casting: the open prefix of each of index's rays, in ray order
+        open_cells = self._open_cells()
+        runs = []
+        for ray in ray_arrays(self.rows, self.cols, index):
+            hit = open_cells[ray]
+            runs.append(ray if hit.all() else ray[:hit.argmin()])
+        return runs
+
+    def moves_from(self, index):
+        if self.vectorized:
+            runs = self._cast(index)
+            return np.concatenate(runs).tolist() if runs else []
+        blocked = self.holes | self.penguins[HUMAN] | self.penguins[AI]
+        moves = []
+        for ray in self.rays[index]:
+            for cell in ray:
+                if blocked >> cell & 1: break
+                moves.append(cell)
+        return moves
+
+    def reach_mask(self, index):
+        # Bitmask of the cells reachable from index
+        player = self.penguin_at(index)
+        if player is not None: return self.reach[player][index]
+        return self._ray_mask(index)
+
+    def _ray_mask(self, index):
+        if self.vectorized:
+            cells = np.zeros(self.size, dtype=bool)
+            for run in self._cast(index): cells[run] = True
+            return array_mask(cells)
+        return ray_reach(self.ray_masks[index], self.holes | self.penguins[HUMAN] | self.penguins[AI])
+
+    def has_moves_from(self, index):
+        return self.reach_mask(index) != 0
+
+    def placement_cells(self):
+        if self.vectorized: return np.flatnonzero((self.fish_array == 1) & self._open_cells()).tolist()
+        blocked = self.holes | self.penguins[HUMAN] | self.penguins[AI]
+        return [i for i, f in enumerate(self.fish) if f == 1 and not blocked >> i & 1]
+
+    def player_has_moves(self, player):
+        return self.mobile[player] > 0
+
+    def is_legal(self, move):
+        src, dst = move
+        player = self.current
+        if self.phase == PLACEMENT:
+            blocked = self.holes | self.penguins[HUMAN] | self.penguins[AI]
+            return src == PLACE and self.unplaced[player] > 0 and self.fish[dst] == 1 and not blocked >> dst & 1
+        return src in self.reach[player] and bool(self.reach[player][src] >> dst & 1)
+
+    def legal_moves(self):
+        if self.phase == PLACEMENT:
+            if not self.unplaced[self.current]: return []
+            return [(PLACE, cell) for cell in self.placement_cells()]
+        reach = self.reach[self.current]
+        return [(src, dst) for src in self.penguin_cells(self.current) if reach[src] for dst in self.moves_from(src)]
+
+    # --- state transitions ---
+
+    def apply_move(self, move):
+        self._play(move, None)
+
+    def make_move(self, move):
+        # apply_move() that unmake_move() can take back; None passes the turn. The record
+        # keeps the turn and phase before the move, the mobility and unplaced counts, and
+        # where the move's entries in reach_log start.
+        self.history.append((move, self.current, self.phase, self.mobile[HUMAN], self.mobile[AI],
+                             self.unplaced[HUMAN], self.unplaced[AI], len(self.reach_log)))
+        if move is None: self.pass_turn()
+        else: self._play(move, self.reach_log)
+
+    def unmake_move(self):
+        # Takes back the last make_move() and returns its move
+        move, player, phase, human_mobile, ai_mobile, human_unplaced, ai_unplaced, mark = self.history.pop()
+        log = self.reach_log
+        while len(log) > mark:
+            side, cell, mask = log.pop()
+            if mask is None: del self.reach[side][cell]
+            else: self.reach[side][cell] = mask
+        if move is not None:
+            src, dst = move
+            self.penguins[player] ^= 1 << dst
+            if src != PLACE:
+                self.penguins[player] |= 1 << src
+                self.holes ^= 1 << src
+                self.scores[player] -= self.fish[src]
+        self.mobile[HUMAN], self.mobile[AI] = human_mobile, ai_mobile
+        self.unplaced[HUMAN], self.unplaced[AI] = human_unplaced, ai_unplaced
+        self.current = player
+        self.phase = phase
+        return move
+
+    def last_move(self):
+        # (move, player) of the last make_move() still on the undo stack, or None
+        if not self.history: return None
+        return self.history[-1][0], self.history[-1][1]
+
+    def _play(self, move, log):
+        # log: list to record overwritten reach entries in as (player, cell, old mask),
+        # where an old mask of None means the entry didn't exist
+        src, dst = move
+        player = self.current
+        if self.phase == PLACEMENT:
+            self.penguins[player] |= 1 << dst
+            self.unplaced[player] -= 1
+            self._occupy(player, dst, log)
+            self._next_placement_turn()
+            return
+        bit = 1 << src
+        self.scores[player] += self.fish[src]
+        self.penguins[player] ^= bit | (1 << dst)
+        self.holes |= bit
+        mask = self.reach[player].pop(src)
+        if mask: self.mobile[player] -= 1
+        if log is not None: log.append((player, src, mask))
+        self._occupy(player, dst, log)
+        self._next_turn(1 - player)
+
+    def _occupy(self, player, dst, log):
+        # dst has just been blocked (src was already blocked by the penguin leaving it):
+        # cut every penguin's ray through dst, then give the arriving penguin its own reach
+        for side in (HUMAN, AI):
+            reach = self.reach[side]
+            for cell, mask in reach.items():
+                if mask >> dst & 1:
+                    if log is not None: log.append((side, cell, mask))
+                    mask = self._ray_mask(cell) if self.vectorized else mask & ~self.shadows[cell][dst]
+                    reach[cell] = mask
+                    if not mask: self.mobile[side] -= 1
+        mask = self._ray_mask(dst)
+        self.reach[player][dst] = mask
+        if log is not None: log.append((player, dst, None))
+        if mask: self.mobile[player] += 1
+
+    def pass_turn(self):
+        # Turn forfeited, e.g. when the turn clock runs out
+        if self.phase == PLACEMENT: self._next_placement_turn()
+        else: self._next_turn(1 - self.current)
+
+    def _next_placement_turn(self):
+        other = 1 - self.current
+        if not self.placement_cells(): self.unplaced = [0, 0]
+        if self.unplaced[other]: self.current = other
+        elif not self.unplaced[self.current]:
+            self.phase = IN_PROGRESS
+            self._next_turn(HUMAN)
+
+    def _next_turn(self, player):
+        # The player to move skips while stuck; when nobody can move the game is over
+        if self.player_has_moves(player) or not self.player_has_moves(1 - player): self.current = player
+        else: self.current = 1 - player
+
+    def is_terminal(self):
+        return self.phase != PLACEMENT and not self.mobile[HUMAN] and not self.mobile[AI]
+
+    def score(self):
+        return tuple(self.scores)
@@ -0,0 +1,111 @@
+import atexit
+import multiprocessing
+
+from fish_search import Searcher, SOLVED_DEPTH, zobrist_hash
+
+# Move hints for the human. A background process scores every destination of the
+# selected penguin by iterative deepening and streams each score back as it is
+# refined, so the board can show them while the search goes on:
+#   ('score', key, destination, depth, value)
+# depth is SOLVED_DEPTH once the value is exact; values are the fish the human
+# gains from here on minus the AI's, with the move's own tile included.
+#
+# An analysis runs until it is exact, HINT_MAX_TIME passes or the next request
+# arrives, which stops it within a few milliseconds. The process keeps its
+# transposition table between requests, and the window keeps every score it has
+# been sent per (position, penguin), so going back to a penguin shows its scores at
+# once and only deepens them.
+
+HINT_MAX_TIME = 60.0
+HINT_MAX_DEPTH = 64
+CACHE_SIZE = 256  # (position, penguin) pairs remembered
+
+# Spawned rather than forked, so the analyzer never inherits the window's GL state
+_context = multiprocessing.get_context('spawn')
+_analyzer = None
+
+
+def _analyze(conn, tt_bits):
+    searcher = Searcher(tt_bits)  # starts a new table whenever the deal changes
+    try:
+        while True:
+            message = conn.recv()
+            if message[0] == 'close': return
+            if message[0] == 'stop': continue
+            _, key, state, moves = message
+            send = lambda move, depth, value: conn.send(('score', key, move[1], depth, value))
+            searcher.score_moves(state, moves, HINT_MAX_TIME, HINT_MAX_DEPTH, send, conn.poll)
+    except (BrokenPipeError, EOFError, OSError, KeyboardInterrupt):
+        return
+
+
+class HintAnalyzer:
+    def __init__(self, tt_bits=18):
+        self._conn, child_conn = _context.Pipe()
+        self._process = _context.Process(target=_analyze, name="fish-hints", daemon=True, args=(child_conn, tt_bits))
+        self._process.start()
+        child_conn.close()
+        self.cache = {}  # (position hash, penguin cell) -> {destination: (depth, value)}, oldest first
+        self.fish = None
+        self.key = None  # what is being analyzed, if anything
+        self.solved_depth = SOLVED_DEPTH
+
+    def analyze(self, state, src):
+        # Scores for the penguin on src, with the human to move in state: whatever is
+        # cached now, deepened as poll() brings more in
+        if state.fish != self.fish:
+            self.cache.clear()
+            self.fish = state.fish
+        key = (zobrist_hash(state), src)
+        scores = self.cache.pop(key, {})
+        self.cache[key] = scores
+        if len(self.cache) > CACHE_SIZE: del self.cache[next(iter(self.cache))]
+        if key != self.key:
+            self.key = key
+            moves = [(src, dst) for dst in state.moves_from(src) if scores.get(dst, (0,))[0] != SOLVED_DEPTH]
+            if moves: self._conn.send(('analyze', key, state, moves))
+            else: self._conn.send(('stop',))
+        return scores
+
+    def stop(self):
+        if self.key is None: return
+        self.key = None
+        self._conn.send(('stop',))
+
+    def poll(self):
+        # Non-blocking: take in whatever scores have arrived; True if the current ones changed
+        changed = False
+        while self._conn.poll():
+            _, key, dst, depth, value = self._conn.recv()
+            scores = self.cache.get(key)
+            if scores is None or depth < scores.get(dst, (0,))[0]: continue
+            scores[dst] = (depth, value)
+            changed = changed or key == self.key
+        return changed
+
+    def scores(self):
+        return self.cache.get(self.key, {}) if self.key is not None else {}
+
+    def close(self):
+        if self._process.is_alive():
+            try:
+                self._conn.send(('close',))
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.join(timeout=1.0)
+            if self._process.is_alive(): self._process.terminate()
+        self._conn.close()
+
+
+def shared_analyzer():
+    # One analyzer for the whole process; game views come and go around it
+    global _analyzer
+    if _analyzer is None or not _analyzer._process.is_alive(): _analyzer = HintAnalyzer()
+    return _analyzer
+
+
+@atexit.register
+def close_analyzer():
+    global _analyzer
+    if _analyzer is not None: _analyzer.close()
+    _analyzer = None
@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+
+# Board geometry without a window: where every tile sits, the outline of a
+# tile, and which tile a point falls on. Coordinates are board (world) space;
+# the View's camera maps screen points into it before picking.
+#
+# Tiles are pointy-side hexagons in offset rows, odd rows shifted right by half
+# a tile; spacings are multiples of the radius.
+
+HEX_SPACING_X = 1.7
+HEX_SPACING_Y = 1.932
+
+HEX_UNIT = tuple((math.cos(math.radians(60 * i)), math.sin(math.radians(60 * i))) for i in range(6))
+
+
+def hex_points(center_x, center_y, radius):
+    return [(center_x + radius * ux, center_y + radius * uy) for ux, uy in HEX_UNIT]
+
+
+def hex_centers(rows, cols, spacing_x, spacing_y, offset_x, offset_y):
+    # (rows * cols, 2) tile centres in cell index order; odd rows shift right by half a tile
+    row, col = np.divmod(np.arange(rows * cols), cols)
+    x = col * spacing_x + (row % 2) * (spacing_x / 2) + offset_x
+    y = row * (spacing_y * 0.75) + offset_y
+    return np.column_stack((x, y))
+
+
+class BoardLayout:
+    def __init__(self, rows, cols, radius, offset_x, offset_y):
+        # offset: centre of tile (0, 0)
+        self.rows, self.cols = rows, cols
+        self.radius = radius
+        self.spacing_x = radius * HEX_SPACING_X
+        self.spacing_y = radius * HEX_SPACING_Y
+        self.offset_x, self.offset_y = offset_x, offset_y
+        self.fit_radius = radius
+
+    @classmethod
+    def fit(cls, rows, cols, left, bottom, width, height, max_radius, min_radius=1):
+        # The largest tiles, up to max_radius, at which the board fits the area, centred in
+        # it; never below min_radius (fit_radius keeps what would have fitted)
+        by_width = width / (cols * HEX_SPACING_X + 1)
+        by_height = height / ((rows - 1) * HEX_SPACING_Y * 0.75 + 2)
+        fit = min(max_radius, by_width, by_height)
+        radius = max(fit, min_radius)
+        board_width = cols * radius * HEX_SPACING_X + radius
+        board_height = (rows - 1) * radius * HEX_SPACING_Y * 0.75 + 2 * radius
+        layout = cls(rows, cols, radius, left + (width - board_width) / 2, bottom + (height - board_height) / 2 + radius)
+        layout.fit_radius = fit
+        return layout
+
+    def hex_center(self, row, col):
+        x = col * self.spacing_x
+        y = row * self.spacing_y * 0.75
+        if row % 2 == 1: x += self.spacing_x / 2
+        return x + self.offset_x, y + self.offset_y
+
+    def centers(self):
+        return hex_centers(self.rows, self.cols, self.spacing_x, self.spacing_y, self.offset_x, self.offset_y)
+
+    def hex_points(self, center_x, center_y, radius=None):
+        return hex_points(center_x, center_y, radius or self.radius)
+
+    def pick(self, x, y):
+        # (row, col) of the tile under a board point, or (-1, -1) between or off the tiles
+        row = round((y - self.offset_y) / (self.spacing_y * 0.75))
+        col = round((x - self.offset_x - (self.spacing_x / 2 if row % 2 else 0)) / self.spacing_x)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            hex_x, hex_y = self.hex_center(row, col)
+            if (x - hex_x) ** 2 + (y - hex_y) ** 2 < self.radius ** 2: return row, col
+        return -1, -1
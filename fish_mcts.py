@@ -0,0 +1,149 @@
+import math
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_EXCEPTION, wait
+
+# Monte Carlo Tree Search over fish_engine.GameState: UCT selection, uniformly
+# random playouts, and root parallelism -- every worker process grows its own
+# tree from the same root and the root visit counts are summed at the end.
+
+UCT_C = 1.4
+PROGRESS_INTERVAL = 0.1
+
+MctsResult = namedtuple('MctsResult', 'move visits playouts elapsed workers playouts_per_core')
+
+_pool = None
+_pool_workers = 0
+
+
+class Node:
+    __slots__ = ('move', 'parent', 'player', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move, parent, player, untried):
+        self.move = move
+        self.parent = parent
+        self.player = player  # who made self.move
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+
+
+def outcome(state, player):
+    mine, theirs = state.scores[player], state.scores[1 - player]
+    if mine > theirs: return 1.0
+    if mine < theirs: return 0.0
+    return 0.5
+
+
+def playout(state, rng):
+    while True:
+        moves = state.legal_moves()
+        if not moves: return
+        state.apply_move(moves[rng.randrange(len(moves))])
+
+
+def run_mcts(state, time_budget, seed=None, on_progress=None, should_stop=None, max_playouts=None):
+    # One tree, one process. Returns ({root move: (visits, wins)}, playouts).
+    # on_progress(stats, playouts) is called every PROGRESS_INTERVAL seconds.
+    # With max_playouts the search is reproducible for a given seed.
+    rng = random.Random(seed)
+    root = Node(None, None, None, state.legal_moves())
+    now = time.perf_counter()
+    deadline = now + time_budget
+    next_progress = now + PROGRESS_INTERVAL
+    log, sqrt = math.log, math.sqrt
+    playouts = 0
+    while now < deadline and playouts != max_playouts:
+        if now >= next_progress:
+            if should_stop and should_stop(): break
+            if on_progress: on_progress({c.move: (c.visits, c.wins) for c in root.children}, playouts)
+            next_progress = now + PROGRESS_INTERVAL
+        node = root
+        s = state.copy()
+        while not node.untried and node.children:
+            scale = UCT_C * sqrt(log(node.visits))
+            node = max(node.children, key=lambda c: c.wins / c.visits + scale / sqrt(c.visits))
+            s.apply_move(node.move)
+        if node.untried:
+            move = node.untried.pop(rng.randrange(len(node.untried)))
+            mover = s.current
+            s.apply_move(move)
+            child = Node(move, node, mover, s.legal_moves())
+            node.children.append(child)
+            node = child
+        playout(s, rng)
+        playouts += 1
+        results = (outcome(s, 0), outcome(s, 1))
+        while node is not root:
+            node.visits += 1
+            node.wins += results[node.player]
+            node = node.parent
+        root.visits += 1
+        now = time.perf_counter()
+    return {c.move: (c.visits, c.wins) for c in root.children}, playouts
+
+
+def _get_pool(workers):
+    # One pool per process, shared by every game view and reused across restarts
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None: _pool.shutdown(cancel_futures=True)
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def _merge(runs):
+    visits = {}
+    playouts = 0
+    for stats, count in runs:
+        playouts += count
+        for move, (n, w) in stats.items():
+            total = visits.get(move, (0, 0.0))
+            visits[move] = (total[0] + n, total[1] + w)
+    return visits, playouts
+
+
+def _result(visits, playouts, start, workers):
+    best = max(visits, key=lambda m: visits[m][0]) if visits else None
+    elapsed = time.perf_counter() - start
+    per_core = playouts / elapsed / workers if elapsed > 0 else 0.0
+    return MctsResult(best, visits, playouts, elapsed, workers, per_core)
+
+
+def search(state, time_budget, workers=None, seed=None, on_progress=None, should_stop=None, max_playouts=None):
+    # on_progress(MctsResult) reports the best move so far; with a process pool only the
+    # single-process path can report partial trees, so progress comes from the final merge.
+    workers = workers or os.cpu_count() or 1
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    moves = state.legal_moves()
+    if len(moves) <= 1:
+        return MctsResult(moves[0] if moves else None, {}, 0, 0.0, workers, 0.0)
+    seeds = [rng.getrandbits(32) for _ in range(workers)]
+    if workers == 1:
+        report = None
+        if on_progress:
+            report = lambda stats, count: on_progress(_result(stats, count, start, 1))
+        runs = [run_mcts(state, time_budget, seeds[0], report, should_stop, max_playouts)]
+    else:
+        # Leave a little of the budget for pickling the trees' root statistics back.
+        # A cancelled search stops waiting; the workers finish on their own clock.
+        pool = _get_pool(workers)
+        futures = [pool.submit(run_mcts, state, time_budget * 0.9, s, None, None, max_playouts) for s in seeds]
+        pending = futures
+        while pending:
+            if should_stop and should_stop(): return _result({}, 0, start, workers)
+            _, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_EXCEPTION)
+        runs = [f.result() for f in futures]
+    return _result(*_merge(runs), start, workers)
@@ -0,0 +1,244 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+import time
+from collections import namedtuple
+
+from fish_engine import GameState, HUMAN, AI, PLACE
+
+# Compact game records: python fish_record.py [games.fishrec]   (replays and summarises)
+#
+# A record file starts with MAGIC and holds any number of games back to back, so
+# a writer only ever appends. A game is a header -- board size, penguins per
+# player, and either the seed its fish were dealt from or the fish themselves at
+# two bits a tile -- then one entry per move, then an end entry. An entry is two
+# cell indices of 1, 2 or 4 bytes each depending on the board size (two bytes a
+# move on the default board); the top few index values are codes for placement,
+# pass, undo and end. The end entry says whether the game was played out,
+# abandoned or decided early -- ended once the islands were settled, with the final
+# scores that implies following it; a game cut short by a crash is closed as
+# abandoned the next time a writer opens the file.
+
+MAGIC = b'FISHREC1'
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'games.fishrec')
+GAME = struct.Struct('<BHHBB')  # tag, rows, cols, penguins per player, flags
+GAME_TAG = ord('G')
+EXPLICIT_FISH = 1  # flag: fish follow the header instead of a seed
+SEED = struct.Struct('<Q')
+SCORES = struct.Struct('<II')  # after a settled game's end entry: human, AI
+ENTRY = {1: struct.Struct('<BB'), 2: struct.Struct('<HH'), 4: struct.Struct('<II')}
+
+# Entry codes, counted down from the largest index value
+PLACE_CODE, PASS_CODE, UNDO_CODE, END_CODE = 0, 1, 2, 3
+UNDO = 'undo'  # in GameRecord.moves
+ABANDONED, PLAYED_OUT, SETTLED = 0, 1, 2  # end entry values
+
+# seed None when fish holds the deal; finished False for abandoned games; settled the
+# final (human, AI) scores of a game ended once its islands were settled, else None
+GameRecord = namedtuple('GameRecord', 'rows cols penguins seed fish moves finished settled')
+
+
+def cell_width(cells):
+    for width in (1, 2, 4):
+        if cells < (1 << 8 * width) - 4: return width
+    raise ValueError(f"board of {cells} cells is too large to record")
+
+
+def pack_fish(fish):
+    out = bytearray((len(fish) + 3) // 4)
+    for i, count in enumerate(fish): out[i >> 2] |= count << (i & 3) * 2
+    return bytes(out)
+
+
+def unpack_fish(data, cells):
+    return bytearray(data[i >> 2] >> (i & 3) * 2 & 3 for i in range(cells))
+
+
+def _parse(data, path):
+    # (GameRecord, end offset, entry struct) for every game in data; the last may be
+    # unterminated, with end at its last whole entry
+    if data[:len(MAGIC)] != MAGIC: raise ValueError(f"{path} is not a fish game record file")
+    pos = len(MAGIC)
+    size = len(data)
+    while size - pos >= GAME.size:
+        tag, rows, cols, penguins, flags = GAME.unpack_from(data, pos)
+        if tag != GAME_TAG: raise ValueError(f"{path}: corrupt record at byte {pos}")
+        pos += GAME.size
+        cells = rows * cols
+        seed = fish = None
+        if flags & EXPLICIT_FISH:
+            fish = unpack_fish(data[pos:pos + (cells + 3) // 4], cells)
+            pos += (cells + 3) // 4
+        else:
+            seed, = SEED.unpack_from(data, pos)
+            pos += SEED.size
+        entry = ENTRY[cell_width(cells)]
+        top = (1 << 4 * entry.size) - 1
+        unpack = entry.unpack_from
+        moves = []
+        finished = settled = None
+        while pos + entry.size <= size:
+            a, b = unpack(data, pos)
+            pos += entry.size
+            if a < cells: moves.append((a, b))
+            elif a == top - PLACE_CODE: moves.append((PLACE, b))
+            elif a == top - PASS_CODE: moves.append(None)
+            elif a == top - UNDO_CODE: moves.append(UNDO)
+            elif a == top - END_CODE:
+                if b == SETTLED:
+                    # Scores not written in full: still open, as if the end wasn't there
+                    if pos + SCORES.size > size:
+                        pos -= entry.size
+                        break
+                    settled = SCORES.unpack_from(data, pos)
+                    pos += SCORES.size
+                finished = b != ABANDONED
+                break
+            else: raise ValueError(f"{path}: corrupt move at byte {pos - entry.size}")
+        yield GameRecord(rows, cols, penguins, seed, fish, moves, finished, settled), pos, entry
+        if finished is None: return
+
+
+def read_games(path=DEFAULT_PATH):
+    # Streams every GameRecord in the file; a game still being written has finished None
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0: raise ValueError(f"{path} is not a fish game record file")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for record, _, _ in _parse(mm, path): yield record
+
+
+class RecordWriter:
+    # Appends games to path as they are played, flushed after every entry so a crash
+    # loses at most the move being written
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.entry = None
+        self.top = 0
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self.file = open(path, 'wb')
+            self.file.write(MAGIC)
+            self.file.flush()
+        else:
+            self._close_crashed()
+            self.file = open(path, 'ab')
+
+    def _close_crashed(self):
+        # A game left open by a crash is cut back to its last whole entry and ended
+        last = None
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for last in _parse(data, self.path): pass
+        if last is None:
+            if len(data) > len(MAGIC): os.truncate(self.path, len(MAGIC))
+            return
+        record, end, entry = last
+        if record.finished is not None and end == len(data): return
+        with open(self.path, 'r+b') as f:
+            f.truncate(end)
+            f.seek(end)
+            if record.finished is None: f.write(entry.pack((1 << 4 * entry.size) - 1 - END_CODE, ABANDONED))
+
+    def begin(self, state, seed=None):
+        # state: the freshly dealt position; without a seed its fish are stored instead.
+        # A game still open is ended as abandoned.
+        if self.entry is not None: self.end(False)
+        self.entry = ENTRY[cell_width(state.size)]
+        self.top = (1 << 4 * self.entry.size) - 1
+        flags = EXPLICIT_FISH if seed is None else 0
+        self.file.write(GAME.pack(GAME_TAG, state.rows, state.cols, state.unplaced[HUMAN], flags))
+        self.file.write(pack_fish(state.fish) if seed is None else SEED.pack(seed))
+        self.file.flush()
+
+    def _write(self, a, b):
+        self.file.write(self.entry.pack(a, b))
+        self.file.flush()
+
+    def move(self, move):
+        # move None is a pass
+        if move is None: self._write(self.top - PASS_CODE, 0)
+        elif move[0] == PLACE: self._write(self.top - PLACE_CODE, move[1])
+        else: self._write(*move)
+
+    def undo(self):
+        self._write(self.top - UNDO_CODE, 0)
+
+    def end(self, finished=True, settled=None):
+        # settled: the final (human, AI) scores when the game ended on settled islands
+        if self.entry is None: return
+        if settled is None: self._write(self.top - END_CODE, PLAYED_OUT if finished else ABANDONED)
+        else:
+            self.file.write(self.entry.pack(self.top - END_CODE, SETTLED) + SCORES.pack(*settled))
+            self.file.flush()
+        self.entry = None
+
+    def on_game_event(self, event):
+        # fish_session.GameSession listener
+        if self.entry is None: return
+        if event.kind == 'undone': self.undo()
+        else: self.move(event.move)
+
+    def close(self):
+        if self.entry is not None: self.end(False)
+        self.file.close()
+
+
+_writers = {}
+
+
+def shared_writer(path=DEFAULT_PATH):
+    # One writer per file for the whole process, so every game view appends to it
+    writer = _writers.get(path)
+    if writer is None: writer = _writers[path] = RecordWriter(path)
+    return writer
+
+
+def initial_state(record):
+    if record.fish is not None: return GameState(bytearray(record.fish), record.rows, record.cols, record.penguins)
+    return GameState.new_game(random.Random(record.seed), record.rows, record.cols, record.penguins)
+
+
+def replay(record, on_position=None):
+    # The final GameState of a record; on_position(state) is called after every entry
+    state = initial_state(record)
+    for move in record.moves:
+        if move == UNDO: state.unmake_move()
+        else: state.make_move(move)
+        if on_position: on_position(state)
+    return state
+
+
+def summarize(path):
+    start = time.perf_counter()
+    games = finished = settled = moves = undos = fish = 0
+    wins = [0, 0]
+    for record in read_games(path):
+        state = replay(record)
+        # A game decided early scores what its islands were settled at, as the window showed
+        scores = record.settled or state.scores
+        games += 1
+        finished += bool(record.finished)
+        settled += record.settled is not None
+        moves += len(record.moves)
+        undos += record.moves.count(UNDO)
+        fish += scores[HUMAN] + scores[AI]
+        if scores[HUMAN] != scores[AI]: wins[scores[AI] > scores[HUMAN]] += 1
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(f"{games} games ({finished} played out, {settled} of them decided early), {moves} entries ({undos} undos), "
+          f"{os.path.getsize(path):,} bytes")
+    if games:
+        print(f"human wins {wins[HUMAN]}, AI wins {wins[AI]}, draws {games - sum(wins)}, "
+              f"{fish / games:.1f} fish collected per game")
+    print(f"replayed in {elapsed:.2f}s: {games / elapsed:,.0f} games/s, {moves / elapsed:,.0f} moves/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded games headlessly and summarise them.")
+    parser.add_argument('path', nargs='?', default=DEFAULT_PATH)
+    args = parser.parse_args()
+    summarize(args.path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+from collections import namedtuple
+from functools import lru_cache
+
+from fish_engine import HUMAN, AI, IN_PROGRESS, ray_mask_table, cell_ray_masks, ray_reach
+from fish_tablebase import shared_tablebase
+
+# Late in a game the ice breaks up into islands. A penguin only ever moves across
+# open tiles next to it, so the penguins that share a patch of open ice -- and only
+# they -- can reach its tiles. An island whose penguins all belong to one player is
+# that player's to clear whenever they like: nobody else can take from it, and the
+# game goes on until they can't move, so its fish are theirs whatever happens
+# elsewhere.
+#
+# regions() flood-fills the board over the hex adjacency with bitmask shifts.
+# IslandSolver finds the most fish a player can collect from an island they hold
+# alone, by exhaustive search memoised on (open tiles, penguins); once what is left
+# of an island is small enough it is read from the fish_tablebase table, if built.
+
+# owner: HUMAN or AI, or None when both players have penguins there
+Region = namedtuple('Region', 'cells penguins owner')
+# What divide() makes of a position: credit[player] is what player collects from the
+# islands they hold alone that solve, retired the penguins on those islands, decided
+# whether that covers every region, and contested the cells of the regions both
+# players share (all of them when it didn't have to look)
+Division = namedtuple('Division', 'credit retired decided contested')
+
+# The six hex directions in order around a cell
+RING_DIRECTIONS = ((1, -1, 0), (1, 0, -1), (0, 1, -1), (-1, 1, 0), (-1, 0, 1), (0, -1, 1))
+
+# Islands that need more positions than this are left to the search
+ISLAND_NODE_LIMIT = 100_000
+# ...as are islands with more open tiles than this: the solve recurses once per move
+# and would run out of Python stack before its node limit
+ISLAND_CELL_LIMIT = 400
+MEMO_LIMIT = 1 << 20
+
+
+class IslandTooBig(Exception):
+    pass
+
+
+@lru_cache(maxsize=None)
+def shift_masks(rows, cols):
+    row = (1 << cols) - 1
+    full = (1 << rows * cols) - 1
+    first = sum(1 << r * cols for r in range(rows))
+    last = first << (cols - 1)
+    even = sum(row << r * cols for r in range(0, rows, 2))
+    return full, full ^ first, full ^ last, even & ~first, (full ^ even) & ~last
+
+
+def dilate(mask, rows, cols):
+    # mask plus every hex neighbour of its cells (odd-r offset layout)
+    full, not_first, not_last, even_inner, odd_inner = shift_masks(rows, cols)
+    grown = mask | (mask & not_last) << 1 | (mask & not_first) >> 1 | mask << cols | mask >> cols
+    even, odd = mask & even_inner, mask & odd_inner
+    grown |= even << (cols - 1) | even >> (cols + 1) | odd << (cols + 1) | odd >> (cols - 1)
+    return grown & full
+
+
+def regions(state):
+    # Every group of penguins that can still meet, with the ice they share. Penguins
+    # with no open tile next to them get a region of their own.
+    rows, cols = state.rows, state.cols
+    penguins = state.penguins[HUMAN] | state.penguins[AI]
+    open_cells = ~(state.holes | penguins) & shift_masks(rows, cols)[0]
+    found = []
+    left = penguins
+    while left:
+        cells = left & -left
+        while True:
+            grown = cells | dilate(cells, rows, cols) & open_cells | dilate(cells & open_cells, rows, cols) & penguins
+            if grown == cells: break
+            cells = grown
+        left &= ~cells
+        human, ai = state.penguins[HUMAN] & cells, state.penguins[AI] & cells
+        found.append(Region(cells, (human, ai), None if human and ai else HUMAN if human else AI))
+    return found
+
+
+class IslandSolver:
+    # Memo entries are only valid for one deal of the fish, so the solver forgets
+    # them when it is handed a state from another game. An island that runs out of
+    # positions isn't tried again until new_search(). tablebase defaults to the
+    # shared one (None when it hasn't been built).
+    def __init__(self, node_limit=ISLAND_NODE_LIMIT, tablebase=None):
+        self.node_limit = node_limit
+        self.tablebase = tablebase or shared_tablebase()
+        self.memo = {}
+        self.islands = {}  # cells -> [(part, Tablebase.locate of part)] for table lookups
+        self.gave_up = set()  # (open tiles, penguins) of islands too big to solve
+        self.fish = None
+        self.nodes = 0
+
+    def _reset(self, state):
+        # States arrive pickled from the AI worker's caller: compare the deals, not the lists
+        if state.fish != self.fish or len(self.memo) > MEMO_LIMIT:
+            self.memo.clear()
+            self.islands.clear()
+            self.gave_up.clear()
+            self.fish = bytes(state.fish)
+        self.state = state
+        self.ray_masks = None if state.vectorized else ray_mask_table(state.rows, state.cols)
+        self.nodes = 0
+
+    def _rays(self, index):
+        if self.ray_masks is not None: return self.ray_masks[index]
+        return cell_ray_masks(self.state.rows, self.state.cols, index)
+
+    def new_search(self):
+        # Give the islands given up on another try; the memo keeps what they got to
+        self.gave_up.clear()
+
+    def solve(self, state, region):
+        # Most fish region.owner can still collect there, or None if the island is too big
+        self._reset(state)
+        if region.owner is None: raise ValueError("region is contested")
+        pengs = region.penguins[region.owner]
+        key = (region.cells & ~pengs, pengs)
+        if key in self.gave_up: return None
+        try:
+            self._check_size(key[0])
+            return self._best(key[0], pengs, self._bound(region.cells, pengs))
+        except IslandTooBig:
+            self.gave_up.add(key)
+            return None
+
+    def best_move(self, state, region):
+        # (move, fish collected from here on) for region.owner, or None if the island is
+        # too big or its penguins are stuck
+        self._reset(state)
+        pengs = region.penguins[region.owner]
+        open_cells = region.cells & ~pengs
+        fish = state.fish
+        bound = self._bound(region.cells, pengs)
+        best = None
+        try:
+            self._check_size(open_cells)
+            for src, dst in self._moves(open_cells, pengs):
+                gain = fish[src]
+                value = gain + self._best(open_cells ^ 1 << dst, pengs ^ (1 << src | 1 << dst), bound - gain)
+                if best is None or value > best[1]: best = ((src, dst), value)
+        except IslandTooBig:
+            return None
+        return best
+
+    @staticmethod
+    def _check_size(open_cells):
+        if open_cells.bit_count() > ISLAND_CELL_LIMIT: raise IslandTooBig()
+
+    def _moves(self, open_cells, pengs):
+        blocked = ~open_cells
+        while pengs:
+            low = pengs & -pengs
+            pengs ^= low
+            src = low.bit_length() - 1
+            reach = ray_reach(self._rays(src), blocked)
+            while reach:
+                bit = reach & -reach
+                reach ^= bit
+                yield src, bit.bit_length() - 1
+
+    def _bound(self, cells, pengs):
+        # Every tile can be collected except the one each penguin ends on
+        return self.state.fish_in(cells) - pengs.bit_count()
+
+    def _best(self, open_cells, pengs, bound):
+        # bound: _bound() of the cells left, passed down since a move only takes away
+        # the tile the penguin leaves
+        key = (open_cells, pengs)
+        value = self.memo.get(key)
+        if value is not None: return value
+        table = self.tablebase
+        if table is not None and (open_cells | pengs).bit_count() <= table.max_tiles:
+            value = self._lookup(open_cells | pengs, pengs)
+            if value is not None:
+                self.memo[key] = value
+                return value
+        self.nodes += 1
+        if self.nodes > self.node_limit: raise IslandTooBig()
+        fish = self.state.fish
+        best = 0
+        for src, dst in self._moves(open_cells, pengs):
+            gain = fish[src]
+            value = gain + self._best(open_cells ^ 1 << dst, pengs ^ (1 << src | 1 << dst), bound - gain)
+            if value > best:
+                best = value
+                if best >= bound: break
+        self.memo[key] = best
+        return best
+
+    def _lookup(self, cells, pengs):
+        # Table value of what is left: moves may have split it, so sum its parts
+        parts = self.islands.get(cells)
+        if parts is None: parts = self.islands[cells] = self._locate(cells)
+        total = 0
+        for part, located in parts:
+            if part & pengs:
+                value = self.tablebase.value(located, pengs)
+                if value is None: return None
+                total += value
+        return total
+
+    def _locate(self, cells):
+        state = self.state
+        parts = []
+        while cells:
+            part = cells & -cells
+            while True:
+                grown = dilate(part, state.rows, state.cols) & cells
+                if grown == part: break
+                part = grown
+            cells &= ~part
+            parts.append((part, self.tablebase.locate(state, part)))
+        return parts
+
+
+def reach_union(state, player):
+    seen = 0
+    for mask in state.reach[player].values(): seen |= mask
+    return seen
+
+
+def divide(state, solver=None):
+    # The Division of an IN_PROGRESS state. Contested regions and islands too big to
+    # solve are what is still being played for.
+    credit = [0, 0]
+    # A penguin shares its region if the other side reaches a tile it reaches; when
+    # every penguin that can move does, there is nothing to credit without the flood fill
+    unions = reach_union(state, HUMAN), reach_union(state, AI)
+    if unions[HUMAN] & unions[AI] and not any(mask and not mask & unions[1 - player]
+                                            for player in (HUMAN, AI) for mask in state.reach[player].values()):
+        return Division(credit, 0, False, shift_masks(state.rows, state.cols)[0])
+    solver = solver or IslandSolver()
+    retired, decided, contested = 0, True, 0
+    for region in regions(state):
+        if region.owner is None:
+            decided = False
+            contested |= region.cells
+            continue
+        if region.cells == region.penguins[region.owner]: continue  # stuck: nothing to collect
+        value = solver.solve(state, region)
+        if value is None:
+            decided = False
+            continue
+        credit[region.owner] += value
+        retired |= region.penguins[region.owner]
+    return Division(credit, retired, decided, contested)
+
+
+def carry(division, state):
+    # state's Division from its parent's when the move just made can't have changed the
+    # regions, else None. A move in a contested region blocks the tile moved onto; that
+    # only splits the region if the open tiles around it fall apart or a penguin is left
+    # with no tile to move to.
+    move, _, _, human_mobile, ai_mobile = state.history[-1][:5]
+    if move is None: return division
+    src, dst = move
+    if not division.contested >> src & 1: return None
+    if state.mobile[HUMAN] != human_mobile or state.mobile[AI] != ai_mobile: return None
+    blocked = state.holes | state.penguins[HUMAN] | state.penguins[AI]
+    ring = [cell is not None and not blocked >> cell & 1 for cell in ring_cells(state.rows, state.cols, dst)]
+    if sum(ring[i] and not ring[i - 1] for i in range(6)) > 1: return None
+    return division._replace(contested=division.contested & ~(1 << src))
+
+
+@lru_cache(maxsize=1 << 14)
+def ring_cells(rows, cols, index):
+    # A cell's six neighbours in order around it, None off the board
+    row, col = divmod(index, cols)
+    x = col - (row - (row & 1)) // 2
+    ring = []
+    for dx, _, dz in RING_DIRECTIONS:
+        r = row + dz
+        c = x + dx + (r - (r & 1)) // 2
+        ring.append(r * cols + c if 0 <= r < rows and 0 <= c < cols else None)
+    return tuple(ring)
+
+
+def settle(state, solver=None):
+    # Final scores once no region is contested and every island solves, else None:
+    # from then on each player just collects their islands, so the game is decided.
+    if state.phase != IN_PROGRESS: return None
+    division = divide(state, solver)
+    if not division.decided: return None
+    return state.scores[HUMAN] + division.credit[HUMAN], state.scores[AI] + division.credit[AI]
+
+
+def island_move(state, solver=None):
+    # The current player's best move once no region is contested, else None
+    if state.phase != IN_PROGRESS: return None
+    found = regions(state)
+    if any(region.owner is None for region in found): return None
+    solver = solver or IslandSolver()
+    for region in found:
+        if region.owner != state.current: continue
+        best = solver.best_move(state, region)
+        if best is not None: return best[0]
+    return None
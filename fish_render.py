@@ -0,0 +1,219 @@
+import time
+
+import arcade
+import numpy as np
+from arcade.gl import BufferDescription
+from arcade.gl.geometry import quad_2d_fs
+from arcade.shape_list import ShapeElementList, create_polygon, create_ellipse_filled, create_ellipse_outline
+from pyglet.graphics import Batch
+
+from fish_layout import HEX_UNIT, hex_points
+
+# Retained-mode board drawing. Hex geometry is computed once per layout and the
+# tiles, penguins and move highlights each live in one ShapeElementList, so a
+# frame costs one draw call per layer. A layer is rebuilt from its prebuilt
+# shapes only when the engine state it shows actually changes. The tiles are one
+# vertex buffer built with NumPy, so boards of any size cost the same to draw and a
+# tile that sinks is just zeroed in place.
+
+# Sizes below are for a tile of BASE_RADIUS and scale with the actual radius
+BASE_RADIUS = 44
+TILE_GAP = 2
+HIGHLIGHT_INSET = 4
+PENGUIN_RADIUS = 12
+CIRCLE_SEGMENTS = 32
+HINT_FONT_SIZE = 11
+HINT_GLYPHS = "+-.0123456789=d"  # every character a hint label uses
+# Move hints shade from GOOD for the best-scored destination to BAD for one this many
+# fish worse or more; destinations not scored yet keep the plain highlight colour
+HINT_SPREAD = 6.0
+HINT_GOOD = arcade.color.LIME_GREEN
+HINT_BAD = arcade.color.RED
+
+# A hexagon as four triangles fanned from its first corner
+HEX_FAN = (0, 1, 2, 0, 2, 3, 0, 3, 4, 0, 4, 5)
+
+
+def hint_color(value, best):
+    t = min(max((best - value) / HINT_SPREAD, 0.0), 1.0)
+    return tuple(round(good + (bad - good) * t) for good, bad in zip(HINT_GOOD, HINT_BAD))
+
+
+def hint_label(depth, value, solved_depth):
+    # "+2.5" over "d6", or over "=" once the value is exact
+    return f"{value:+.1f}", "=" if depth == solved_depth else f"d{depth}"
+
+
+def penguin_shapes(x, y, color, radius=PENGUIN_RADIUS, outline=2):
+    size = radius * 2
+    return (create_ellipse_filled(x, y, size, size, color, num_segments=CIRCLE_SEGMENTS),
+            create_ellipse_outline(x, y, size, size, arcade.color.BLACK, outline, num_segments=CIRCLE_SEGMENTS))
+
+
+class TileBatch:
+    # Every tile's triangles in one vertex buffer (the same 2f position + 4f colour layout
+    # ShapeElementList uses, drawn with its program); hide() degenerates a tile's triangles
+    VERTICES = len(HEX_FAN)
+    VERTEX_SIZE = 4 * 6
+
+    def __init__(self, ctx, centers, radius, color):
+        unit = np.array(HEX_UNIT, dtype='f4')[list(HEX_FAN)]
+        data = np.empty((len(centers), self.VERTICES, 6), dtype='f4')
+        data[:, :, :2] = centers[:, None, :] + radius * unit[None, :, :]
+        data[:, :, 2:] = tuple(color)
+        self.ctx = ctx
+        self.data = data
+        self.buffer = ctx.buffer(data=data.tobytes())
+        self.geometry = ctx.geometry([BufferDescription(self.buffer, '2f 4f', ['in_vert', 'in_color'])],
+                                     mode=ctx.TRIANGLES)
+        self.program = ctx.shape_element_list_program
+        self.hidden = np.zeros(self.VERTICES * self.VERTEX_SIZE, dtype=np.uint8).tobytes()
+
+    def hide(self, index):
+        self.buffer.write(self.hidden, offset=index * self.VERTICES * self.VERTEX_SIZE)
+
+    def show(self, index):
+        self.buffer.write(self.data[index].tobytes(), offset=index * self.VERTICES * self.VERTEX_SIZE)
+
+    def draw(self):
+        self.program['Position'] = 0.0, 0.0
+        self.program['Angle'] = 0.0
+        self.geometry.render(self.program)
+
+
+class BoardRenderer:
+    def __init__(self, centers, radius, penguin_colors):
+        # centers: (cells, 2) array from fish_layout.hex_centers
+        scale = radius / BASE_RADIUS
+        self.centers = centers.tolist()
+        self.penguin_colors = penguin_colors
+        self.tile_radius = radius - TILE_GAP * scale
+        self.move_radius = radius - HIGHLIGHT_INSET * scale
+        self.penguin_radius = max(PENGUIN_RADIUS * scale, self.tile_radius * 0.6)  # still visible on tiny tiles
+        self.outline = max(1.0, 2 * scale)
+        self.font_size = max(6.0, HINT_FONT_SIZE * scale)
+
+        self.tiles = TileBatch(arcade.get_window().ctx, centers, self.tile_radius, arcade.color.POWDER_BLUE)
+        self.holes = 0
+
+        self.penguins = ShapeElementList()
+        self.penguin_masks = None
+
+        self.highlights = ShapeElementList()
+        self.highlight_key = None
+        self.hint_labels = Batch()
+        self.hint_texts = []
+
+    def sync(self, state):
+        # Hide tiles that have become holes (or show them again if the state went back), and
+        # rebuild the penguin layer when anyone moved. (ShapeElementList.remove can't drop a
+        # shape that hasn't been drawn yet, so that layer is rebuilt rather than patched.)
+        if state.holes != self.holes:
+            for index in state.cells_of(state.holes & ~self.holes): self.tiles.hide(index)
+            for index in state.cells_of(self.holes & ~state.holes): self.tiles.show(index)
+            self.holes = state.holes
+
+        masks = tuple(state.penguins)
+        if masks != self.penguin_masks:
+            self.penguin_masks = masks
+            self.penguins = ShapeElementList()
+            for player, color in enumerate(self.penguin_colors):
+                for index in state.penguin_cells(player):
+                    for shape in penguin_shapes(*self.centers[index], color, self.penguin_radius, self.outline):
+                        self.penguins.append(shape)
+
+    def set_highlight(self, selected, moves, hints=None, solved_depth=None):
+        # hints: {destination: (depth, value)} to shade and label the destinations by
+        key = (selected, tuple(moves), tuple(hints.items()) if hints else ())
+        if key == self.highlight_key: return
+        self.highlight_key = key
+        self.highlights = ShapeElementList()
+        self.hint_labels = Batch()
+        self.hint_texts = []
+        if selected is None: return
+        self.highlights.append(create_polygon(hex_points(*self.centers[selected], self.tile_radius), arcade.color.YELLOW_ORANGE))
+        best = max((value for _, value in hints.values()), default=0.0) if hints else 0.0
+        for index in moves:
+            hint = hints.get(index) if hints else None
+            color = hint_color(hint[1], best) if hint else arcade.color.LIME_GREEN
+            self.highlights.append(create_polygon(hex_points(*self.centers[index], self.move_radius), color))
+            if hint is None: continue
+            x, y = self.centers[index]
+            value, depth = hint_label(*hint, solved_depth)
+            for text, anchor_y in ((value, "bottom"), (depth, "top")):
+                self.hint_texts.append(arcade.Text(text, x, y, arcade.color.BLACK, self.font_size,
+                                                   anchor_x="center", anchor_y=anchor_y, batch=self.hint_labels))
+
+    def warm_hints(self):
+        # Lays out every glyph the labels use, so building the font's texture atlas (slow
+        # on some drivers) happens now rather than while scores are streaming in
+        arcade.Text(HINT_GLYPHS, 0, 0, arcade.color.BLACK, self.font_size)
+
+    def draw_tiles(self): self.tiles.draw()
+    def draw_penguins(self): self.penguins.draw()
+    def draw_highlights(self): self.highlights.draw()
+    def draw_hints(self): self.hint_labels.draw()
+
+
+class CachedLayer:
+    # Offscreen, opaque snapshot of everything that only changes with the board.
+    # Redrawn into its framebuffer when the version changes, otherwise put on
+    # screen as a single full-window textured quad. Drawing goes through a
+    # multisampled buffer that is resolved into the texture, so edges stay
+    # antialiased like the rest of the window.
+
+    def __init__(self, window, background=arcade.color.BLACK, samples=4):
+        ctx = window.ctx
+        size = window.get_framebuffer_size()
+        self.ctx = ctx
+        self.background = background
+        self.texture = ctx.texture(size, components=4)
+        self.fbo = ctx.framebuffer(color_attachments=[self.texture])
+        self.msaa_fbo = ctx.framebuffer(color_attachments=[ctx.texture(size, components=4, samples=samples)])
+        self.quad = quad_2d_fs()
+        self.version = None
+        self.redraws = 0
+
+    def update(self, version, draw):
+        if version == self.version: return
+        self.version = version
+        self.redraws += 1
+        with self.msaa_fbo.activate():
+            self.msaa_fbo.clear(color=self.background)
+            draw()
+        self.ctx.copy_framebuffer(self.msaa_fbo, self.fbo)
+        # The blit rebinds GL framebuffers behind arcade's back; put the active one back
+        self.ctx.active_framebuffer.use(force=True)
+
+    def draw(self):
+        self.texture.use(0)
+        self.ctx.disable(self.ctx.BLEND)
+        self.quad.render(self.ctx.utility_textured_quad_program)
+        self.ctx.enable(self.ctx.BLEND)
+
+
+class FrameStats:
+    # Draw-rate and draw-time counters, reported once per interval
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self.reset(time.perf_counter())
+
+    def reset(self, now):
+        self.started = now
+        self.frames = 0
+        self.draw_time = 0.0
+        self.worst = 0.0
+        self.layer_redraws = 0
+
+    def record(self, draw_seconds, layer_redrawn=False):
+        self.frames += 1
+        self.draw_time += draw_seconds
+        self.worst = max(self.worst, draw_seconds)
+        self.layer_redraws += layer_redrawn
+        now = time.perf_counter()
+        if now - self.started < self.interval: return None
+        span = now - self.started
+        report = (f"frames: {self.frames / span:.1f} fps drawn, avg draw {self.draw_time / self.frames * 1000:.2f} ms, "
+                  f"worst {self.worst * 1000:.2f} ms, board layer redrawn {self.layer_redraws}x")
+        self.reset(now)
+        return report
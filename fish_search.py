@@ -0,0 +1,369 @@
+import random
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from fish_engine import PLACE, PLACEMENT, AI
+from fish_regions import IslandSolver, carry, divide
+
+# Negamax alpha-beta over fish_engine.GameState with iterative deepening,
+# a Zobrist-hashed transposition table and killer/history move ordering.
+#
+# Values are the fish the side to move will still collect minus what the
+# opponent will still collect, so they don't depend on the scores so far and
+# transposition entries are valid whatever path reached the position.
+# An island that belongs to one player is theirs to clear whenever they like:
+# what fish_regions solves it to is banked for them, and the tree only branches
+# on moves in the contested regions. Once none is left the value is exact and
+# the subtree isn't searched.
+
+INF = float('inf')
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+REACH_WEIGHT = 0.3
+STUCK_PENGUIN_PENALTY = 1.0
+MAX_UNPLACED = 64
+# Nodes with fewer children than this score them one by one even with batch_leaves:
+# below it a fish_batch pass costs more than it saves
+BATCH_MIN_LEAVES = 64
+# Stored as the depth of entries whose subtree was searched to the end of the game
+SOLVED_DEPTH = 1 << 16
+# Island solver positions an island gets per search before it is left to the tree;
+# what the solver finds is kept for the next search
+SEARCH_ISLAND_NODES = 1000
+# A node costs about as much as the board has cells: the clock is checked every
+# CLOCK_CELLS // cells nodes (at most every 1024), so big boards don't overrun
+CLOCK_CELLS = 1 << 16
+
+SearchResult = namedtuple('SearchResult', 'move value depth nodes elapsed nps')
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(cells):
+    rng = random.Random(0x5EA1 + cells)
+    rand64 = lambda: rng.getrandbits(64)
+    holes = [rand64() for _ in range(cells)]
+    penguins = [[rand64() for _ in range(cells)] for _ in range(2)]
+    unplaced = [[rand64() for _ in range(MAX_UNPLACED + 1)] for _ in range(2)]
+    side = rand64()
+    return holes, penguins, unplaced, side
+
+
+def zobrist_hash(state):
+    holes, penguins, unplaced, side = zobrist_keys(len(state.fish))
+    h = 0
+    for cell in state.cells_of(state.holes): h ^= holes[cell]
+    for player in (0, 1):
+        for cell in state.penguin_cells(player): h ^= penguins[player][cell]
+        h ^= unplaced[player][state.unplaced[player]]
+    if state.current == AI: h ^= side
+    return h
+
+
+def child_hash(h, child, move, player, placing):
+    # Incremental update of a position's zobrist_hash h to zobrist_hash(child), the
+    # position after player made move with placing penguins still unplaced
+    holes, penguins, unplaced, side = zobrist_keys(len(child.fish))
+    src, dst = move
+    if src == PLACE:
+        h ^= unplaced[player][placing] ^ unplaced[player][child.unplaced[player]]
+    else:
+        h ^= penguins[player][src] ^ holes[src]
+    h ^= penguins[player][dst]
+    if child.current != player: h ^= side
+    return h
+
+
+def evaluate(state, retired=0):
+    # Static guess at the fish still to come, from the side to move's point of view:
+    # fish reachable in one move by each side, and penguins that are already stuck.
+    # What the penguins in retired reach is on banked islands and isn't counted.
+    value = [0.0, 0.0]
+    for player in (0, 1):
+        seen = 0
+        for cell, mask in state.reach[player].items():
+            if not mask: value[player] -= STUCK_PENGUIN_PENALTY
+            elif not retired >> cell & 1: seen |= mask
+        value[player] += REACH_WEIGHT * state.fish_in(seen)
+    me = state.current
+    return value[me] - value[1 - me]
+
+
+class TranspositionTable:
+    # Fixed-size, always-allocated table indexed by the low bits of the hash.
+    # Replacement: keep the deeper entry unless it is from an older search.
+    # probe() returns (value, depth, flag, move), or None on a miss.
+
+    def __init__(self, bits=18):
+        self.mask = (1 << bits) - 1
+        self.clear()
+
+    def clear(self):
+        size = self.mask + 1
+        self.keys = [None] * size
+        self.values = [0.0] * size
+        self.depths = [-1] * size
+        self.flags = [EXACT] * size
+        self.moves = [None] * size
+        self.ages = [0] * size
+        self.generation = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def probe(self, h):
+        slot = h & self.mask
+        if self.keys[slot] == h: return self.values[slot], self.depths[slot], self.flags[slot], self.moves[slot]
+        return None
+
+    def store(self, h, depth, value, flag, move):
+        slot = h & self.mask
+        if self.keys[slot] != h and self.ages[slot] == self.generation and self.depths[slot] > depth: return
+        self.keys[slot] = h
+        self.values[slot] = value
+        self.depths[slot] = depth
+        self.flags[slot] = flag
+        self.moves[slot] = move
+        self.ages[slot] = self.generation
+
+
+class Searcher:
+    # batch_leaves: at depth 1, score all of a wide node's children with one fish_batch
+    # pass instead of searching them one by one (no pruning there, but no per-leaf overhead).
+    # table: a transposition table to use instead of a private one (see fish_smp)
+    def __init__(self, tt_bits=18, max_ply=128, batch_leaves=False, table=None):
+        self.tt = table if table is not None else TranspositionTable(tt_bits)
+        self.owns_table = table is None
+        self.fish = None  # the deal the table, killers and history were filled on
+        self.islands = IslandSolver(SEARCH_ISLAND_NODES)
+        self.max_ply = max_ply
+        self.evaluate_batch = None
+        if batch_leaves:
+            from fish_batch import evaluate_batch
+            self.evaluate_batch = evaluate_batch
+        self.killers = [[None, None] for _ in range(max_ply)]
+        self.divisions = [None] * max_ply  # fish_regions.Division of the node at each ply
+        self.history = [{}, {}]
+        self.nodes = 0
+        self.deadline = INF
+        self.should_stop = None
+        self.clock_mask = 1023
+        self.hit_horizon = False
+        self.root_best = None
+
+    def search(self, state, time_budget, max_depth=64, on_progress=None, should_stop=None, first_depth=1):
+        # on_progress(SearchResult) is called after every completed depth; should_stop()
+        # is polled alongside the clock and ends the search early when it returns True.
+        # Iterative deepening starts at first_depth.
+        start = time.perf_counter()
+        self._begin(state, start, time_budget, should_stop)
+        root_moves = state.legal_moves()
+        if not root_moves: return SearchResult(None, 0.0, 0, 0, 0.0, 0.0)
+        # The tree is walked with make_move/unmake_move on one private copy; a timeout
+        # unwinds without taking its moves back, so that copy is dropped with it
+        state = state.copy()
+        root_hash = zobrist_hash(state)
+        # An earlier search of this position (e.g. while pondering) knows a better first
+        # move; without one the move ordering's favourite stands in until a depth completes
+        entry = self.tt.probe(root_hash)
+        tt_move = entry[3] if entry is not None and entry[3] in root_moves else None
+        best_move, best_value, depth_reached = self._order(state, root_moves, tt_move, 0)[0], 0.0, 0
+        for depth in range(min(first_depth, max_depth), max_depth + 1):
+            self.hit_horizon = False
+            try:
+                value, move = self._root(state, root_hash, depth, root_moves, best_move)
+            except SearchTimeout:
+                # Out of time before any depth completed: the best of the root moves searched
+                if not depth_reached and self.root_best is not None: best_move = self.root_best
+                break
+            best_move, best_value, depth_reached = move, value, depth
+            if on_progress:
+                elapsed = time.perf_counter() - start
+                on_progress(SearchResult(move, value, depth, self.nodes, elapsed, self.nodes / max(elapsed, 1e-9)))
+            # Without a horizon leaf the whole game tree was searched and the value is exact
+            if len(root_moves) == 1 or not self.hit_horizon: break
+            if time.perf_counter() >= self.deadline: break
+        elapsed = time.perf_counter() - start
+        nps = self.nodes / elapsed if elapsed > 0 else 0.0
+        return SearchResult(best_move, best_value, depth_reached, self.nodes, elapsed, nps)
+
+    def score_moves(self, state, moves, time_budget, max_depth=64, on_score=None, should_stop=None):
+        # Every one of moves' own value, not just the best one's: iterative deepening with
+        # a full window per move, so no move is cut off by another. on_score(move, depth,
+        # value) is called as each move completes a depth, with SOLVED_DEPTH once its value
+        # is exact (it isn't searched again). Returns {move: (depth, value)}.
+        self._begin(state, time.perf_counter(), time_budget, should_stop)
+        state = state.copy()
+        h = zobrist_hash(state)
+        scores = {}
+        pending = list(moves)
+        for depth in range(1, max_depth + 1):
+            for move in list(pending):
+                self.hit_horizon = False
+                try:
+                    value = self._child_value(state, h, move, depth, -INF, INF, 0)
+                except SearchTimeout:
+                    return scores
+                if not self.hit_horizon: pending.remove(move)
+                scores[move] = (depth if self.hit_horizon else SOLVED_DEPTH, value)
+                if on_score: on_score(move, *scores[move])
+            if not pending: break
+            pending.sort(key=lambda move: scores[move][1], reverse=True)
+        return scores
+
+    def _begin(self, state, start, time_budget, should_stop):
+        self.deadline = start + time_budget
+        self.should_stop = should_stop
+        self.nodes = 0
+        self.clock_mask = (1 << min(10, max(0, (CLOCK_CELLS // state.size).bit_length() - 1))) - 1
+        # Hashes leave the fish out, so nothing learnt on another deal carries over.
+        # States arrive pickled from other processes: compare the deals, not the lists.
+        if state.fish != self.fish:
+            if self.owns_table: self.tt.clear()
+            self.history = [{}, {}]
+            self.fish = state.fish
+        self.tt.new_search()
+        self.islands.new_search()
+        self.killers = [[None, None] for _ in range(self.max_ply)]
+        self.divisions = [None] * self.max_ply
+        for table in self.history:
+            for key in table: table[key] >>= 2
+
+    def _root(self, state, h, depth, moves, first):
+        ordered = [first] + [m for m in moves if m != first]
+        alpha, best_move = -INF, first
+        self.root_best = None
+        for move in ordered:
+            if self.root_best is not None: self._check_time()
+            value = self._child_value(state, h, move, depth, alpha, INF, 0)
+            if value > alpha: alpha, best_move = value, move
+            self.root_best = best_move
+        self.tt.store(h, depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def _child_value(self, state, h, move, depth, alpha, beta, ply):
+        player = state.current
+        placing = state.unplaced[player]
+        gain = 0 if move[0] == PLACE else state.fish[move[0]]
+        state.make_move(move)
+        ch = child_hash(h, state, move, player, placing)
+        if state.current == player: value = gain + self._negamax(state, ch, depth - 1, alpha - gain, beta - gain, ply + 1)
+        else: value = gain - self._negamax(state, ch, depth - 1, gain - beta, gain - alpha, ply + 1)
+        state.unmake_move()
+        return value
+
+    def _negamax(self, state, h, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & self.clock_mask: self._check_time()
+
+        tt = self.tt
+        tt_move = None
+        entry = tt.probe(h)
+        if entry is not None:
+            value, stored_depth, flag, tt_move = entry
+            if stored_depth >= depth:
+                if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                    if stored_depth != SOLVED_DEPTH: self.hit_horizon = True
+                    return value
+
+        banked, retired = 0.0, 0
+        if state.phase == PLACEMENT: self.divisions[ply] = None
+        else:
+            # Most moves leave the regions as they were; otherwise a solve can take
+            # thousands of island positions: check the clock after one
+            parent = self.divisions[ply - 1] if ply else None
+            division = carry(parent, state) if parent else None
+            if division is None:
+                self.islands.nodes = 0
+                division = divide(state, self.islands)
+                if self.islands.nodes: self._check_time()
+            self.divisions[ply] = division
+            credit, retired = division.credit, division.retired
+            banked = float(credit[state.current] - credit[1 - state.current])
+            if division.decided:
+                tt.store(h, SOLVED_DEPTH, banked, EXACT, None)
+                return banked
+
+        moves = state.legal_moves()
+        if not moves: return 0.0
+        # Banked islands aren't played out here, not even as waiting moves
+        if retired: moves = [move for move in moves if not retired >> move[0] & 1]
+        if depth <= 0 or ply >= self.max_ply - 1:
+            self.hit_horizon = True
+            return banked + evaluate(state, retired)
+        if not moves:
+            # Nothing left to play for but banked islands: pass to the other side, who
+            # still has an unsolved region of their own
+            state.make_move(None)
+            value = -self._negamax(state, h ^ zobrist_keys(len(state.fish))[3], depth, -beta, -alpha, ply + 1)
+            state.unmake_move()
+            return value
+        if depth == 1 and self.evaluate_batch and not retired and len(moves) >= BATCH_MIN_LEAVES:
+            return self._frontier(state, h, moves)
+
+        alpha_orig = alpha
+        outer_horizon, self.hit_horizon = self.hit_horizon, False
+        best_value, best_move = -INF, None
+        for move in self._order(state, moves, tt_move, ply):
+            value = self._child_value(state, h, move, depth, alpha, beta, ply)
+            if value > best_value:
+                best_value, best_move = value, move
+                if value > alpha: alpha = value
+                if alpha >= beta:
+                    self._record_cutoff(state.current, move, depth, ply)
+                    break
+
+        if best_value <= alpha_orig: flag = UPPER
+        elif best_value >= beta: flag = LOWER
+        else: flag = EXACT
+        tt.store(h, depth if self.hit_horizon else SOLVED_DEPTH, best_value, flag, best_move)
+        self.hit_horizon = self.hit_horizon or outer_horizon
+        return best_value
+
+    def _check_time(self):
+        if time.perf_counter() > self.deadline or (self.should_stop and self.should_stop()): raise SearchTimeout()
+
+    def _frontier(self, state, h, moves):
+        children = []
+        for move in moves:
+            child = state.copy()
+            child.apply_move(move)
+            children.append(child)
+        self.nodes += len(children)
+        self._check_time()
+        best_value, best_move, solved = -INF, None, True
+        for move, child, value in zip(moves, children, self.evaluate_batch(children).tolist()):
+            if child.is_terminal(): value = 0.0
+            else: solved = False
+            gain = 0 if move[0] == PLACE else state.fish[move[0]]
+            value = gain + value if child.current == state.current else gain - value
+            if value > best_value: best_value, best_move = value, move
+        if not solved: self.hit_horizon = True
+        self.tt.store(h, 1 if not solved else SOLVED_DEPTH, best_value, EXACT, best_move)
+        return best_value
+
+    def _order(self, state, moves, tt_move, ply):
+        killers = self.killers[ply]
+        history = self.history[state.current]
+        fish = state.fish
+
+        def key(move):
+            if move == tt_move: return 1 << 30
+            if move == killers[0]: return 1 << 29
+            if move == killers[1]: return 1 << 28
+            return history.get(move, 0) + (fish[move[0]] if move[0] != PLACE else 0)
+
+        return sorted(moves, key=key, reverse=True)
+
+    def _record_cutoff(self, player, move, depth, ply):
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        history = self.history[player]
+        history[move] = history.get(move, 0) + depth * depth
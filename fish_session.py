@@ -0,0 +1,73 @@
+from collections import namedtuple
+
+from fish_engine import PLACE
+
+# A game as the window plays it: one GameState moved forward and back with
+# make_move/unmake_move, plus a redo stack, reporting every change as a
+# GameEvent so the View can play sounds and update sprites without the rules
+# knowing about either. Listeners are called as listener(event).
+#
+# kind: 'placed', 'moved' or 'passed' when a move is played (again, on redo),
+# 'undone' when one is taken back. fish is what the move collected.
+
+GameEvent = namedtuple('GameEvent', 'kind player move fish')
+
+
+class GameSession:
+    def __init__(self, state):
+        self.state = state
+        self.redo_stack = []  # (move, player) taken back, most recent last
+        self.listeners = []
+
+    def _emit(self, event):
+        for listener in self.listeners: listener(event)
+
+    def play(self, move):
+        # move None passes the turn
+        self.redo_stack.clear()
+        self._play(move)
+
+    def pass_turn(self):
+        self.play(None)
+
+    def _play(self, move):
+        state = self.state
+        player = state.current
+        fish = 0 if move is None or move[0] == PLACE else state.fish[move[0]]
+        state.make_move(move)
+        kind = 'passed' if move is None else 'placed' if move[0] == PLACE else 'moved'
+        self._emit(GameEvent(kind, player, move, fish))
+
+    def can_undo(self): return bool(self.state.history)
+    def can_redo(self): return bool(self.redo_stack)
+
+    def undo(self):
+        # Takes back the last move; returns it (None if there was nothing to undo)
+        if not self.state.history: return None
+        move, player = self.state.last_move()
+        fish = 0 if move is None or move[0] == PLACE else self.state.fish[move[0]]
+        self.state.unmake_move()
+        self.redo_stack.append((move, player))
+        self._emit(GameEvent('undone', player, move, fish))
+        return move
+
+    def redo(self):
+        if not self.redo_stack: return None
+        move, _ = self.redo_stack.pop()
+        self._play(move)
+        return move
+
+    def undo_turn(self, player):
+        # Takes back player's last move and everything played since; False if player
+        # hasn't moved yet
+        if not any(record[1] == player for record in self.state.history): return False
+        while self.state.last_move()[1] != player: self.undo()
+        self.undo()
+        return True
+
+    def redo_turn(self, player):
+        # Replays player's next move and the moves after it, up to player's next turn
+        if not self.redo_stack: return False
+        self.redo()
+        while self.redo_stack and self.redo_stack[-1][1] != player: self.redo()
+        return True
@@ -0,0 +1,152 @@
+import os
+import struct
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+from fish_search import Searcher
+
+# Lazy SMP: several processes run the same iterative-deepening alpha-beta search
+# on the same root, sharing one transposition table in shared memory, and the
+# deepest completed result wins. Nothing else passes between them: what one
+# stores in the table reorders and cuts the others' trees, and helpers with odd
+# ids start a ply deeper so they don't all walk the tree in step.
+#
+# The table takes no locks. An entry is three 8-byte words -- check, value, data
+# -- with check the position's hash XORed with the raw bits of the other two, so
+# an entry torn by two processes writing at once fails its check and reads as a
+# miss. data packs the depth, bound flag, search generation and best move.
+# Two control words in front of the entries hold the current generation and the
+# last generation told to stop.
+#
+# Hashes leave the fish out, so a new deal gets a new table: helpers see its name
+# change and start over on it.
+
+CONTROL_WORDS = 2
+GENERATION, STOPPED = 0, 1
+DEPTH_BITS = 17  # enough for SOLVED_DEPTH
+FLAG_SHIFT, HAS_MOVE, AGE_SHIFT, MOVE_SHIFT = 17, 1 << 19, 20, 26
+AGE_MASK = 0x3F
+CELL_BITS = 19  # per end of the move
+CELL_MASK = (1 << CELL_BITS) - 1
+MAX_CELLS = CELL_MASK  # a placement's source is stored as PLACE + 1 = 0
+HELPER_GRACE = 0.05  # seconds helpers get to report once the main search is done
+
+_ENTRY = struct.Struct('<QdQ')   # check, value, data
+_WORDS = struct.Struct('<QQQ')   # the same entry as raw words
+_BITS = struct.Struct('<Q')
+_VALUE = struct.Struct('<d')
+
+
+def _pack(depth, flag, age, move):
+    data = depth | flag << FLAG_SHIFT | (age & AGE_MASK) << AGE_SHIFT
+    if move is not None: data |= HAS_MOVE | (move[0] + 1) << MOVE_SHIFT | move[1] << MOVE_SHIFT + CELL_BITS
+    return data
+
+
+class SharedTable:
+    # fish_search.TranspositionTable in shared memory. The process that creates it
+    # owns (and unlinks) it; others attach by name.
+    def __init__(self, bits=18, name=None):
+        size = 1 << bits
+        self.mask = size - 1
+        nbytes = 8 * (CONTROL_WORDS + 3 * size)
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=nbytes)
+        self.owner = name is None
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+        self.generation = 0
+
+    def _control(self, word): return _BITS.unpack_from(self.buf, 8 * word)[0]
+
+    def begin(self):
+        # Start a new search for every process sharing the table; returns its generation
+        generation = self._control(GENERATION) + 1
+        _BITS.pack_into(self.buf, 8 * GENERATION, generation)
+        return generation
+
+    def stop(self, generation):
+        _BITS.pack_into(self.buf, 8 * STOPPED, generation)
+
+    def stopped(self, generation):
+        return self._control(STOPPED) >= generation
+
+    def new_search(self):
+        self.generation = self._control(GENERATION)
+
+    def probe(self, h):
+        offset = 8 * (CONTROL_WORDS + 3 * (h & self.mask))
+        raw = bytes(self.buf[offset:offset + 24])
+        check, bits, data = _WORDS.unpack(raw)
+        if check ^ bits ^ data != h: return None
+        move = ((data >> MOVE_SHIFT & CELL_MASK) - 1, data >> MOVE_SHIFT + CELL_BITS) if data & HAS_MOVE else None
+        return _VALUE.unpack_from(raw, 8)[0], data & ((1 << DEPTH_BITS) - 1), data >> FLAG_SHIFT & 3, move
+
+    def store(self, h, depth, value, flag, move):
+        offset = 8 * (CONTROL_WORDS + 3 * (h & self.mask))
+        check, bits, data = _WORDS.unpack_from(self.buf, offset)
+        if check ^ bits ^ data != h and data >> AGE_SHIFT & AGE_MASK == self.generation & AGE_MASK \
+                and data & ((1 << DEPTH_BITS) - 1) > depth: return
+        data = _pack(depth, flag, self.generation, move)
+        bits = _BITS.unpack(_VALUE.pack(value))[0]
+        _ENTRY.pack_into(self.buf, offset, h ^ bits ^ data, value, data)
+
+    def close(self):
+        if self.buf is None: return
+        self.buf = None
+        self.shm.close()
+        if self.owner: self.shm.unlink()
+
+
+_helper = None  # (table name, Searcher) in a helper process, kept between searches
+
+
+def _help(name, bits, batch_leaves, state, time_budget, max_depth, first_depth, generation):
+    global _helper
+    if _helper is None or _helper[0] != name:
+        if _helper is not None: _helper[1].tt.close()
+        _helper = (name, Searcher(batch_leaves=batch_leaves, table=SharedTable(bits, name)))
+    searcher = _helper[1]
+    table = searcher.tt
+    return searcher.search(state, time_budget, max_depth, None, lambda: table.stopped(generation), first_depth)
+
+
+def _release(pool, tables):
+    if pool is not None: pool.shutdown(cancel_futures=True)
+    for table in tables: table.close()
+
+
+class ParallelSearcher:
+    # Searcher.search() on `workers` processes, this one included (0 or None: every core)
+    def __init__(self, workers=None, tt_bits=18, batch_leaves=False):
+        self.workers = workers or os.cpu_count() or 1
+        self.bits = tt_bits
+        self.batch_leaves = batch_leaves
+        self.tt = SharedTable(tt_bits)
+        self.tables = [self.tt]  # the live table, for the finalizer
+        self.fish = None
+        self.searcher = Searcher(batch_leaves=batch_leaves, table=self.tt)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers - 1) if self.workers > 1 else None
+        self.results = []  # every process's result from the last search, this one's first
+        weakref.finalize(self, _release, self.pool, self.tables)
+
+    def search(self, state, time_budget, max_depth=64, on_progress=None, should_stop=None):
+        if state.size > MAX_CELLS: raise ValueError(f"board of {state.size} cells is too large for the shared table")
+        if self.fish is not None and state.fish != self.fish:
+            # Helpers still finishing the last search write to the old table, not this one
+            self.tt.close()
+            self.tt = self.tables[0] = self.searcher.tt = SharedTable(self.bits)
+        self.fish = state.fish
+        start = time.perf_counter()
+        generation = self.tt.begin()
+        helpers = [self.pool.submit(_help, self.tt.name, self.bits, self.batch_leaves, state, time_budget, max_depth,
+                                    1 + i % 2, generation) for i in range(1, self.workers)]
+        result = self.searcher.search(state, time_budget, max_depth, on_progress, should_stop)
+        self.tt.stop(generation)
+        done, _ = wait(helpers, timeout=HELPER_GRACE)
+        self.results = [result] + [f.result() for f in helpers if f in done and f.exception() is None]
+        best = max(self.results, key=lambda r: r.depth)  # ties go to this process's result
+        nodes = sum(r.nodes for r in self.results)
+        elapsed = time.perf_counter() - start
+        return best._replace(nodes=nodes, elapsed=elapsed, nps=nodes / elapsed if elapsed > 0 else 0.0)
@@ -0,0 +1,62 @@
+import multiprocessing
+import random
+
+from fish_ai import make_player, parse_player
+from fish_engine import GameState
+
+# AI-vs-AI games for the spectator view, played back to back in a background
+# process at full engine speed and streamed to the window move by move:
+#   ('game', index, seed)   a new game, dealt from seed like every other game
+#   ('move', move)          the next move (None passes)
+#   ('end', scores)         the final (first seat, second seat) scores
+# The pipe's buffer is the only backpressure: a slow viewer just lets the
+# simulation run a few dozen games ahead. Player specs are as for tournament.py;
+# the first plays the seat that places first.
+
+# Spawned rather than forked, so the simulation never inherits the window's GL state
+_context = multiprocessing.get_context('spawn')
+
+
+def _simulate(conn, specs, board, first_seed, move_time):
+    index = 0
+    try:
+        while True:
+            seed = first_seed + index
+            rng = random.Random(seed)
+            state = GameState.new_game(rng, *board)
+            players = []
+            for spec in specs:
+                name, options = parse_player(spec)
+                if name == 'mcts': options.setdefault('workers', 1)  # the window needs a core too
+                players.append(make_player(name, seed=rng.getrandbits(32), **options))
+            conn.send(('game', index, seed))
+            while not state.is_terminal():
+                move = players[state.current].choose_move(state, move_time).move
+                state.make_move(move)
+                conn.send(('move', move))
+            conn.send(('end', tuple(state.scores)))
+            index += 1
+    except (BrokenPipeError, EOFError, OSError, KeyboardInterrupt):
+        return
+
+
+class MatchStream:
+    def __init__(self, specs, board, first_seed=0, move_time=0.05):
+        self._conn, child_conn = _context.Pipe(duplex=False)
+        self._process = _context.Process(target=_simulate, name="fish-spectate", daemon=True,
+                                         args=(child_conn, tuple(specs), tuple(board), first_seed, move_time))
+        self._process.start()
+        child_conn.close()
+
+    def poll(self):
+        # Whether a message is waiting (never blocks)
+        return self._conn.poll()
+
+    def recv(self):
+        return self._conn.recv()
+
+    def close(self):
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join(timeout=1.0)
+        self._conn.close()
@@ -0,0 +1,357 @@
+import argparse
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+from functools import lru_cache
+from itertools import combinations
+
+import numpy as np
+
+# Endgame tablebase: the most fish one player's penguins can collect from every
+# small island, looked up instead of searched.
+#
+#   python fish_tablebase.py --max-tiles 6      # builds islands.fishtb next to the game
+#
+# An island's value only depends on its shape, its fish and where the penguins
+# stand, not on where it lies on the board, so shapes are stored in axial hex
+# coordinates shifted to the origin. Every shape up to max_tiles tiles is listed
+# with every placement of 1..max_penguins penguins and every 1-3 fish layout, and
+# gets one byte. Islands are solved smallest first: after a move the rest of an
+# island is one or more smaller islands that are already in the table, so each
+# shape is a handful of NumPy gathers over all of its fish layouts at once.
+#
+# File layout: header, shape keys (sorted), per-shape offsets, then the values.
+# The table is read through mmap and indexed in place; the loader never copies it.
+# The builder writes into the same file and logs finished shapes next to it, so an
+# interrupted build picks up where it stopped.
+
+MAGIC = b'FISHTB01'
+HEADER = struct.Struct('<8sIIII')  # magic, max_tiles, max_penguins, shapes, complete
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'islands.fishtb')
+MAX_TILES = 6
+MAX_PENGUINS = 3
+FISH_KINDS = 3  # tiles hold 1-3 fish
+
+# (dq, dr) steps in axial coordinates; straight lines, like fish_engine.CUBE_DIRECTIONS
+AXIAL_DIRECTIONS = ((1, 0), (-1, 0), (1, -1), (-1, 1), (0, -1), (0, 1))
+
+_shared = None
+_worker = None
+
+
+def axial(row, col):
+    # Odd-r offset cell -> axial (q, r)
+    return col - (row - (row & 1)) // 2, row
+
+
+def normalize(cells):
+    # (q, r) cells -> shape: (r, q) tuples shifted to the origin, sorted
+    min_q = min(q for q, r in cells)
+    min_r = min(r for q, r in cells)
+    return tuple(sorted((r - min_r, q - min_q) for q, r in cells))
+
+
+def shape_key(shape, width):
+    return sum(1 << (r * width + q) for r, q in shape)
+
+
+@lru_cache(maxsize=None)
+def polyhexes(max_tiles):
+    # Every hex-connected shape of 1..max_tiles tiles, by size
+    level = {normalize([(0, 0)])}
+    sizes = [sorted(level)]
+    for _ in range(max_tiles - 1):
+        grown = set()
+        for shape in level:
+            cells = {(q, r) for r, q in shape}
+            for q, r in cells:
+                for dq, dr in AXIAL_DIRECTIONS:
+                    if (q + dq, r + dr) not in cells: grown.add(normalize(cells | {(q + dq, r + dr)}))
+        level = grown
+        sizes.append(sorted(level))
+    return tuple(tuple(shapes) for shapes in sizes)
+
+
+@lru_cache(maxsize=None)
+def penguin_sets(tiles, max_penguins):
+    # Penguin placements on a shape's tiles as bitmasks over its sorted tiles, and their ranks
+    sets = [sum(1 << i for i in chosen) for count in range(1, min(tiles, max_penguins) + 1)
+            for chosen in combinations(range(tiles), count)]
+    return sets, {mask: rank for rank, mask in enumerate(sets)}
+
+
+@lru_cache(maxsize=None)
+def fish_digits(tiles):
+    # (FISH_KINDS ** tiles, tiles) array: every fish layout, in table order
+    index = np.arange(FISH_KINDS ** tiles)
+    return np.stack([index // FISH_KINDS ** i % FISH_KINDS + 1 for i in range(tiles)], axis=1).astype(np.int64)
+
+
+class Layout:
+    # Where every shape's block of values starts; the same for builder and reader
+    def __init__(self, max_tiles, max_penguins):
+        self.max_tiles = max_tiles
+        self.max_penguins = max_penguins
+        self.shapes = [shape for shapes in polyhexes(max_tiles) for shape in shapes]
+        self.offsets = []
+        total = 0
+        for shape in self.shapes:
+            self.offsets.append(total)
+            total += self.block_size(len(shape))
+        self.size = total
+        self.keys = [shape_key(shape, max_tiles) for shape in self.shapes]
+        self.order = sorted(range(len(self.shapes)), key=self.keys.__getitem__)
+
+    def block_size(self, tiles):
+        return len(penguin_sets(tiles, self.max_penguins)[0]) * FISH_KINDS ** tiles
+
+    def data_start(self):
+        return HEADER.size + 16 * len(self.shapes)
+
+
+class Tablebase:
+    def __init__(self, path=DEFAULT_PATH):
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.max_tiles, self.max_penguins, shapes, complete = HEADER.unpack_from(self.mm)
+        if magic != MAGIC: raise ValueError(f"{path} is not a fish tablebase")
+        if not complete: raise ValueError(f"{path} is only partly built, rerun fish_tablebase.py to finish it")
+        self.keys = np.frombuffer(self.mm, dtype='<u8', count=shapes, offset=HEADER.size)
+        self.offsets = np.frombuffer(self.mm, dtype='<u8', count=shapes, offset=HEADER.size + 8 * shapes)
+        self.values = np.frombuffer(self.mm, dtype=np.uint8, offset=HEADER.size + 16 * shapes)
+        self.bases = {}  # shape key -> offset, for the shapes looked up so far
+
+    def key_base(self, key):
+        base = self.bases.get(key)
+        if base is None:
+            slot = int(np.searchsorted(self.keys, key))
+            if slot == len(self.keys) or int(self.keys[slot]) != key: raise KeyError(key)
+            base = self.bases[key] = int(self.offsets[slot])
+        return base
+
+    def locate(self, state, cells):
+        # (start, order) for one hex-connected island (a bitmask over the state's board):
+        # where its values for the state's fish begin, and its cells in table order.
+        # Depends only on the cells and the fish, so callers can keep it for the game.
+        if cells.bit_count() > self.max_tiles: return None
+        # Board order is already the shape's (r, q) order: rows first, and q grows with
+        # the column within a row
+        order = state.cells_of(cells)
+        coords = [axial(*state.cell(i)) for i in order]
+        min_q = min(q for q, _ in coords)
+        min_r = coords[0][1]
+        width = self.max_tiles
+        key = fish_index = 0
+        fish = state.fish
+        for position, ((q, r), i) in enumerate(zip(coords, order)):
+            key |= 1 << ((r - min_r) * width + q - min_q)
+            fish_index += (fish[i] - 1) * FISH_KINDS ** position
+        return self.key_base(key) + fish_index, tuple(order)
+
+    def value(self, located, penguins):
+        # Most fish the penguins (a bitmask over the board) can collect from a located
+        # island, or None if there are more of them than the table covers
+        start, order = located
+        mask = 0
+        for position, i in enumerate(order):
+            if penguins >> i & 1: mask |= 1 << position
+        rank = penguin_sets(len(order), self.max_penguins)[1].get(mask)
+        if rank is None: return None
+        return int(self.values[start + rank * FISH_KINDS ** len(order)])
+
+    def lookup(self, state, cells, penguins):
+        located = self.locate(state, cells)
+        return None if located is None else self.value(located, penguins)
+
+    def close(self):
+        self.values = self.keys = self.offsets = None
+        self.mm.close()
+        self.file.close()
+
+
+def shared_tablebase(path=DEFAULT_PATH):
+    # The process-wide table, or None if it hasn't been built
+    global _shared
+    if _shared is None:
+        _shared = False
+        if os.path.exists(path):
+            try:
+                _shared = Tablebase(path)
+            except ValueError as e:
+                print(f"WARNING: {e}")
+    return _shared or None
+
+
+# --- building ---
+
+def solve_shape(table, shape):
+    # Every value of one shape, from the smaller shapes already in the table
+    tiles = len(shape)
+    position = {cell: i for i, cell in enumerate(shape)}
+    sets, _ = penguin_sets(tiles, table.max_penguins)
+    digits = fish_digits(tiles)
+    block = np.zeros((len(sets), FISH_KINDS ** tiles), dtype=np.uint8)
+    for rank, placed in enumerate(sets):
+        best = np.zeros(FISH_KINDS ** tiles, dtype=np.int64)
+        for src in range(tiles):
+            if not placed >> src & 1: continue
+            r, q = shape[src]
+            for dq, dr in AXIAL_DIRECTIONS:
+                cell = (r + dr, q + dq)
+                while cell in position and not placed >> position[cell] & 1:
+                    dst = position[cell]
+                    value = digits[:, src].copy()
+                    for island, penguins in split(shape, position, (1 << tiles) - 1 ^ 1 << src, placed ^ 1 << src ^ 1 << dst):
+                        value += table_values(table, shape, island, penguins, digits)
+                    np.maximum(best, value, out=best)
+                    cell = (cell[0] + dr, cell[1] + dq)
+        block[rank] = best
+    return block.tobytes()
+
+
+def split(shape, position, cells, penguins):
+    # The hex-connected parts of cells (a bitmask over shape) that hold penguins
+    parts = []
+    while cells:
+        part = frontier = cells & -cells
+        while frontier:
+            low = frontier & -frontier
+            frontier ^= low
+            r, q = shape[low.bit_length() - 1]
+            for dq, dr in AXIAL_DIRECTIONS:
+                i = position.get((r + dr, q + dq))
+                if i is not None and cells >> i & 1 and not part >> i & 1:
+                    part |= 1 << i
+                    frontier |= 1 << i
+        cells &= ~part
+        if part & penguins: parts.append((part, penguins & part))
+    return parts
+
+
+def table_values(table, shape, island, penguins, digits):
+    # Value of a smaller island (bitmasks over shape) for every fish layout of shape
+    members = [i for i in range(len(shape)) if island >> i & 1]
+    sub = normalize([(shape[i][1], shape[i][0]) for i in members])
+    mask = sum(1 << j for j, i in enumerate(members) if penguins >> i & 1)
+    rank = penguin_sets(len(members), table.max_penguins)[1][mask]
+    index = (digits[:, members] - 1) @ (FISH_KINDS ** np.arange(len(members)))
+    return table.values[table.base(sub) + rank * FISH_KINDS ** len(members) + index]
+
+
+class _BuildTable:
+    # A reader over a table that is still being written: the builder finishes every
+    # smaller shape before handing out a bigger one, so the entries looked up are final
+    def __init__(self, path, layout):
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.max_tiles = layout.max_tiles
+        self.max_penguins = layout.max_penguins
+        self.layout = layout
+        self.values = np.frombuffer(self.mm, dtype=np.uint8, offset=layout.data_start())
+        self.bases = dict(zip(map(tuple, layout.shapes), layout.offsets))
+
+    def base(self, shape):
+        return self.bases[shape]
+
+
+def _init_worker(path, max_tiles, max_penguins):
+    global _worker
+    _worker = _BuildTable(path, Layout(max_tiles, max_penguins))
+
+
+def _solve(index):
+    return index, solve_shape(_worker, _worker.layout.shapes[index])
+
+
+def _create(path, layout):
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, layout.max_tiles, layout.max_penguins, len(layout.shapes), 0))
+        f.write(np.array([layout.keys[i] for i in layout.order], dtype='<u8').tobytes())
+        f.write(np.array([layout.offsets[i] for i in layout.order], dtype='<u8').tobytes())
+        f.truncate(layout.data_start() + layout.size)
+
+
+def _resumable(path, layout):
+    # Shapes already written by an interrupted build of the same table, or None
+    if not os.path.exists(path): return None
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size: return None
+    magic, max_tiles, max_penguins, shapes, complete = HEADER.unpack(header)
+    if (magic, max_tiles, max_penguins, shapes) != (MAGIC, layout.max_tiles, layout.max_penguins, len(layout.shapes)):
+        return None
+    if complete: return set(range(len(layout.shapes)))
+    done = set()
+    if os.path.exists(path + '.progress'):
+        with open(path + '.progress') as f:
+            done = {int(line) for line in f if line.strip()}
+    return done
+
+
+def build(path=DEFAULT_PATH, max_tiles=MAX_TILES, max_penguins=MAX_PENGUINS, workers=None, report_every=5.0):
+    if max_tiles * max_tiles > 64: raise ValueError("max_tiles above 8 doesn't fit the 64-bit shape keys")
+    layout = Layout(max_tiles, max_penguins)
+    done = _resumable(path, layout)
+    if done is None:
+        _create(path, layout)
+        done = set()
+        if os.path.exists(path + '.progress'): os.remove(path + '.progress')
+    elif len(done) == len(layout.shapes):
+        print(f"{path} is already built")
+        return
+    else:
+        print(f"Resuming {path}: {len(done)} of {len(layout.shapes)} shapes already solved")
+
+    workers = workers or os.cpu_count() or 1
+    start = last_report = time.perf_counter()
+    positions = shapes_solved = 0
+    with open(path, 'r+b') as f, mmap.mmap(f.fileno(), 0) as mm, open(path + '.progress', 'a') as progress, \
+            multiprocessing.Pool(workers, _init_worker, (path, max_tiles, max_penguins)) as pool:
+        data = layout.data_start()
+        for tiles, shapes in enumerate(polyhexes(max_tiles), 1):
+            first = layout.shapes.index(shapes[0])
+            todo = [i for i in range(first, first + len(shapes)) if i not in done]
+            pending = []
+            for index, block in pool.imap_unordered(_solve, todo, chunksize=max(1, len(todo) // (workers * 16))):
+                offset = data + layout.offsets[index]
+                mm[offset:offset + len(block)] = block
+                pending.append(index)
+                positions += len(block)
+                shapes_solved += 1
+                now = time.perf_counter()
+                if now - last_report >= report_every:
+                    _checkpoint(mm, progress, pending)
+                    print(f"{tiles} tiles: {len(done) + shapes_solved} of {len(layout.shapes)} shapes, "
+                          f"{positions / (now - start):,.0f} positions/s", flush=True)
+                    last_report = now
+            # Bigger shapes read these values back, so they must be on disk first
+            _checkpoint(mm, progress, pending)
+        HEADER.pack_into(mm, 0, MAGIC, max_tiles, max_penguins, len(layout.shapes), 1)
+        mm.flush()
+    os.remove(path + '.progress')
+    elapsed = time.perf_counter() - start
+    print(f"Built {path}: {len(layout.shapes)} shapes, {layout.size:,} positions, "
+          f"{positions:,} solved in {elapsed:.1f}s ({positions / max(elapsed, 1e-9):,.0f} positions/s)")
+
+
+def _checkpoint(mm, progress, pending):
+    mm.flush()
+    progress.write(''.join(f"{i}\n" for i in pending))
+    progress.flush()
+    pending.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the endgame tablebase for small single-owner islands.")
+    parser.add_argument('-o', '--output', default=DEFAULT_PATH)
+    parser.add_argument('--max-tiles', type=int, default=MAX_TILES)
+    parser.add_argument('--max-penguins', type=int, default=MAX_PENGUINS)
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: all cores)")
+    args = parser.parse_args()
+    build(args.output, args.max_tiles, args.max_penguins, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import arcade
+
+# Timers that belong to one view. A view arms them while it is shown and calls
+# release() when it is hidden, so nothing it scheduled keeps running -- or keeps
+# the view alive -- once another view has taken the window. Callbacks take no
+# arguments; arming a callback that is already armed replaces its timer.
+
+
+class ViewTimers:
+    def __init__(self):
+        self.armed = {}  # callback -> the function handed to the clock
+
+    def every(self, interval, callback):
+        self._arm(callback, lambda dt: callback(), interval, arcade.schedule)
+
+    def once(self, delay, callback):
+        def fire(dt):
+            self.armed.pop(callback, None)
+            callback()
+        self._arm(callback, fire, delay, arcade.schedule_once)
+
+    def _arm(self, callback, tick, seconds, schedule):
+        self.cancel(callback)
+        self.armed[callback] = tick
+        schedule(tick, seconds)
+
+    def cancel(self, callback):
+        tick = self.armed.pop(callback, None)
+        if tick is not None: arcade.unschedule(tick)
+
+    def is_armed(self, callback): return callback in self.armed
+
+    def release(self):
+        for tick in self.armed.values(): arcade.unschedule(tick)
+        self.armed.clear()
+
+    def __len__(self): return len(self.armed)
@@ -0,0 +1,109 @@
+import json
+import os
+import time
+from array import array
+from contextlib import nullcontext
+
+# Timing for the game loop and the AI. A step is timed with
+#   with TRACER.span('on_draw'): ...
+# which, while the tracer is disabled, is one attribute test and a shared no-op
+# context manager. Enabled, every named step keeps its last RING_SIZE calls
+# (start and duration) in fixed ring buffers, so a long session never grows;
+# percentiles for the overlay come from those, and export() writes them as
+# Chrome trace-event JSON (chrome://tracing or https://ui.perfetto.dev).
+
+RING_SIZE = 4096
+GAME_LOOP, AI_THREAD = 0, 1  # trace "threads": the window's loop and the AI's searches
+THREAD_NAMES = {GAME_LOOP: 'game loop', AI_THREAD: 'AI'}
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'trace.json')
+
+_NOTHING = nullcontext()
+
+
+class Timings:
+    # The last `size` calls of one step; also its own context manager (steps don't nest
+    # inside themselves, so one start slot is enough)
+    def __init__(self, name, tid=GAME_LOOP, size=RING_SIZE):
+        self.name = name
+        self.tid = tid
+        self.size = size
+        self.starts = array('d', bytes(8 * size))
+        self.durations = array('d', bytes(8 * size))
+        self.count = 0
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.add(self._start, time.perf_counter() - self._start)
+
+    def add(self, start, duration):
+        i = self.count % self.size
+        self.starts[i] = start
+        self.durations[i] = duration
+        self.count += 1
+
+    def __len__(self): return min(self.count, self.size)
+
+    def percentiles(self, *qs):
+        # Durations at each quantile q in [0, 1] of the calls kept; None if there are none
+        values = sorted(self.durations[:len(self)])
+        if not values: return tuple(None for _ in qs)
+        return tuple(values[min(len(values) - 1, int(q * len(values)))] for q in qs)
+
+    def calls(self):
+        # (start, duration) of the calls kept, oldest first
+        n = len(self)
+        first = self.count - n
+        for k in range(first, self.count):
+            i = k % self.size
+            yield self.starts[i], self.durations[i]
+
+
+class Tracer:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.timings = {}
+        self.origin = time.perf_counter()
+
+    def timings_for(self, name, tid=GAME_LOOP):
+        timings = self.timings.get(name)
+        if timings is None: timings = self.timings[name] = Timings(name, tid)
+        return timings
+
+    def span(self, name):
+        if not self.enabled: return _NOTHING
+        timings = self.timings.get(name)
+        return timings if timings is not None else self.timings_for(name)
+
+    def add(self, name, start, duration, tid=GAME_LOOP):
+        # A span measured elsewhere, e.g. an AI search from request to answer
+        if self.enabled: self.timings_for(name, tid).add(start, duration)
+
+    def percentiles(self, name, *qs):
+        timings = self.timings.get(name)
+        return timings.percentiles(*qs) if timings is not None else tuple(None for _ in qs)
+
+    def clear(self):
+        self.timings.clear()
+
+    def trace_events(self):
+        pid = os.getpid()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                  for tid, name in THREAD_NAMES.items()]
+        for timings in self.timings.values():
+            for start, duration in timings.calls():
+                events.append({'name': timings.name, 'ph': 'X', 'pid': pid, 'tid': timings.tid,
+                               'ts': round((start - self.origin) * 1e6, 1), 'dur': round(duration * 1e6, 1)})
+        return events
+
+    def export(self, path=DEFAULT_PATH):
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, f)
+        return path
+
+
+# The process-wide tracer every view times itself with
+TRACER = Tracer()
@@ -0,0 +1,142 @@
+import atexit
+import multiprocessing
+import time
+
+from fish_ai import make_player, parse_player
+from fish_regions import IslandSolver, settle
+
+# Runs an AI player in a background process so the window keeps drawing while it
+# thinks. The View asks for a move with think(), then polls the returned request
+# once per frame; the best move found so far is streamed back as the search
+# deepens, so a deadline can always fall back on it. During the other side's turn
+# watch() lets the player ponder; that sends no moves back and stops as soon as
+# the next message arrives. Either way the worker first checks whether the islands
+# already decide the game, off the window's thread, and reports the final scores.
+
+# Spawned rather than forked, so the worker never inherits the window's GL state
+_context = multiprocessing.get_context('spawn')
+_workers = {}
+
+# Island solver positions per turn spent checking whether the game is already decided
+SETTLE_NODES = 20_000
+
+
+class ThinkRequest:
+    def __init__(self, request_id, started):
+        self.id = request_id
+        self.started = started
+        self.best = None      # best Choice reported so far
+        self.result = None    # final Choice once the search has finished
+        self.checked = False  # the worker has checked whether the game is decided
+        self.settled = None   # final (human, AI) scores when it is: nothing is searched
+        self.cancelled = False
+
+    @property
+    def done(self): return self.result is not None
+
+    def elapsed(self): return time.perf_counter() - self.started
+
+
+def _serve(conn, cancelled_upto, engine, options):
+    player = make_player(engine, **options)
+    islands = IslandSolver(SETTLE_NODES)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message[0] == 'close': return
+        kind, request_id, state, arg = message
+        started = time.perf_counter()
+        islands.new_search()
+        final = settle(state, islands)
+        conn.send(('settled', request_id, final))
+        if final is not None or cancelled_upto.value >= request_id: continue
+        if kind == 'watch':
+            ponder = getattr(player, 'ponder', None)
+            if arg and ponder: ponder(state, lambda: cancelled_upto.value >= request_id or conn.poll())
+            continue
+        # The check came out of this move's time
+        time_budget = max(0.0, arg - (time.perf_counter() - started))
+        should_stop = lambda: cancelled_upto.value >= request_id
+        on_progress = lambda choice: conn.send(('progress', request_id, choice))
+        choice = player.choose_move(state, time_budget, on_progress, should_stop)
+        conn.send(('done', request_id, choice))
+
+
+class AIWorker:
+    def __init__(self, engine, **options):
+        self.engine = engine
+        self._conn, child_conn = _context.Pipe()
+        # Highest request id the View no longer wants; compared, never reset, so a
+        # cancel can't be lost by racing the next think()
+        self._cancelled_upto = _context.Value('q', 0, lock=False)
+        self._process = _context.Process(target=_serve, name=f"fish-ai-{engine}",
+                                         args=(child_conn, self._cancelled_upto, engine, options))
+        self._process.start()
+        child_conn.close()
+        self._next_id = 0
+        self.request = None
+
+    def think(self, state, time_budget):
+        return self._send('think', state, time_budget)
+
+    def watch(self, state, ponder=True):
+        # state has the opponent to move; the request only ever gets checked (and
+        # settled). Pondering runs until the next think() or watch().
+        return self._send('watch', state, ponder)
+
+    def _send(self, kind, state, arg):
+        self.cancel()
+        self._next_id += 1
+        self.request = ThinkRequest(self._next_id, time.perf_counter())
+        self._conn.send((kind, self._next_id, state, arg))
+        return self.request
+
+    def cancel(self):
+        if self.request and not self.request.done:
+            self.request.cancelled = True
+            self._cancelled_upto.value = self.request.id
+        self.request = None
+
+    def poll(self):
+        # Non-blocking: drain whatever the worker has sent since the last frame
+        while self._conn.poll():
+            kind, request_id, reply = self._conn.recv()
+            request = self.request
+            if request is None or request.id != request_id: continue
+            if kind == 'settled':
+                request.checked = True
+                request.settled = reply
+                continue
+            choice = reply
+            if choice.move is not None: request.best = choice
+            if kind == 'done': request.result = choice
+        return self.request
+
+    def close(self):
+        self.cancel()
+        if self._process.is_alive():
+            try:
+                self._conn.send(('close',))
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.join(timeout=1.0)
+            if self._process.is_alive(): self._process.terminate()
+        self._conn.close()
+
+
+def shared_worker(engine):
+    # One worker per engine for the whole process; game views come and go around it.
+    # engine may carry options as for tournament.py, e.g. 'alphabeta:workers=4'.
+    worker = _workers.get(engine)
+    if worker is None or not worker._process.is_alive():
+        name, options = parse_player(engine)
+        worker = _workers[engine] = AIWorker(name, **options)
+    return worker
+
+
+@atexit.register
+def close_workers():
+    for worker in _workers.values(): worker.close()
+    _workers.clear()
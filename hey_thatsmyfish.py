@@ -1,93 +1,178 @@
-import arcade
+import time
+# Taken before the other imports (arcade's above all) so startup timing includes them
+STARTED = time.perf_counter()  # time to first frame and to interactive are counted from here
+import argparse
 import random
-import math
-from arcade.gui import UIManager, UIFlatButton, UIBoxLayout
+import threading
+import arcade
+from pyglet.graphics import Batch
+from arcade.shape_list import ShapeElementList, create_rectangle_filled, create_ellipse_filled
+from fish_engine import GameState, BOARD_ROWS, BOARD_COLS, PENGUINS_PER_PLAYER, HUMAN, AI, PLAYERS, PLACEMENT, IN_PROGRESS, PLACE
+from fish_session import GameSession
+from fish_record import DEFAULT_PATH as DEFAULT_RECORD_PATH, shared_writer
+from fish_trace import TRACER, AI_THREAD, DEFAULT_PATH as DEFAULT_TRACE_PATH
+from fish_render import BoardRenderer, CachedLayer, FrameStats
+from fish_layout import BoardLayout
+from fish_timers import ViewTimers
+from fish_assets import ASSET_DIR, fish_atlas, fish_textures
+from fish_audio import SOUND_FILES, shared_audio
 
 
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 675
 SCREEN_TITLE = "Hey, That's My Fish!"
 
+# Tile size (spacing is in fish_layout). Boards are shrunk to fit the play area, down to
+# MIN_HEX_RADIUS; beyond that the view pans (arrow keys or right-drag) and zooms (mouse wheel).
 HEX_RADIUS = 44
-HEX_SPACING_X = HEX_RADIUS * 1.7
-HEX_SPACING_Y = HEX_RADIUS * 1.932
+MIN_HEX_RADIUS = 5
+SIDE_MARGIN = 100
+PAN_STEP = 60
+ZOOM_STEP = 1.15
 
-BOARD_ROWS = 8
-BOARD_COLS = 8
 TURN_TIME_LIMIT = 30.0
+AI_THINK_TIME = TURN_TIME_LIMIT * 0.05
+AI_ENGINE = 'alphabeta'  # 'greedy', 'alphabeta' or 'mcts', with options e.g. 'alphabeta:workers=4'
+AI_MIN_DELAY = 0.5  # the AI never answers faster than this
+AI_DEADLINE_GRACE = 0.5  # past AI_THINK_TIME + this, play the best move found so far
+AI_POLL_INTERVAL = 1 / 30  # how often the AI's worker is checked for an answer during its turn
+AI_PONDER = True  # let the AI think ahead during the human's turn
+# H turns move hints on and off: the selected penguin's destinations are shaded and
+# labelled with what a background search expects each to be worth (see fish_hints)
+HINTS = False
+HINT_POLL_INTERVAL = 1 / 15
 BLINK_TIME = 0.4  
+# Games are appended here as they are played (None: don't record); see fish_record
+RECORD_PATH = DEFAULT_RECORD_PATH
 
 
 TOP_BAR_HEIGHT = 80
 BOTTOM_BAR_HEIGHT = 60 
 
+# Redraw slowly while the human has been idle on their own turn
+ACTIVE_DRAW_RATE = 1 / 60
+IDLE_DRAW_RATE = 1 / 10
+IDLE_AFTER = 2.0
+SHOW_FRAME_STATS = False
+
+# Spectator mode (--spectate): AI against AI, simulated in the background at full speed.
+# At 1x a move takes SPECTATE_MOVE_TIME; the board on screen moves on in samples of
+# --sample-every moves and is drawn at SPECTATE_FPS, whatever the playback speed.
+SPECTATE_PLAYERS = ('greedy', 'alphabeta:max_depth=2')
+SPECTATE_SPEEDS = (1, 2, 4, 8, 16, 64, None)  # None: as fast as the simulation plays
+SPECTATE_MOVE_TIME = 0.75
+SPECTATE_AI_TIME = 0.05  # per move, for players bounded by the clock rather than depth
+SPECTATE_FPS = 30
+SPECTATE_RESULT_TIME = 2.0  # the final position stays up this long at 1x
+PLAYBACK_TICK = 1 / 120
+PLAYBACK_SLICE = 0.004  # most time one tick spends applying moves, so frames never stall
+# F3 turns step timing and its overlay on and off, F4 writes the timings as a Chrome trace
+TRACE_PATH = DEFAULT_TRACE_PATH
+TRACE_OVERLAY_REFRESH = 0.5
+
+def board_layout(rows, cols):
+    return BoardLayout.fit(rows, cols, SIDE_MARGIN, BOTTOM_BAR_HEIGHT, SCREEN_WIDTH - 2 * SIDE_MARGIN,
+                           SCREEN_HEIGHT - TOP_BAR_HEIGHT - BOTTOM_BAR_HEIGHT, HEX_RADIUS, MIN_HEX_RADIUS)
+
+
+def fish_size(radius): return max(1, round(radius * 1.5))
+
+
+class HeadlessUI:
+    # What a game view's widgets come down to when pyglet runs headless (offscreen runs
+    # such as benchmarks.soak_restarts): arcade.gui pulls in pyglet's input devices,
+    # which don't load there, and nothing can be clicked anyway
+    def enable(self): pass
+    def disable(self): pass
+    def draw(self): pass
+    def on_mouse_press(self, x, y, button, modifiers): return False
+
+
 class MyGame(arcade.View):
-    def __init__(self): 
+    def __init__(self, rows=BOARD_ROWS, cols=BOARD_COLS, penguins_per_player=PENGUINS_PER_PLAYER, seed=None):
         super().__init__()
         arcade.set_background_color(arcade.color.BLACK)
 
-        # Game state variables
-        self.board = []
+        # Game state variables (rules live in fish_engine.GameState)
+        self.state = None
         self.selected_penguin = None
-        self.current_player = 'human'
         self.placement_selected = False
-        self.human_score = 0
-        self.ai_score = 0
-        self.turn_timer = TURN_TIME_LIMIT
-        self.game_phase = 'placement'
-        self.unplaced_human_penguins = 3
-        self.unplaced_ai_penguins = 3
-        self.offset_x, self.offset_y = self.calculate_board_offset()
+        self.game_over = False
+        self.ai_request = None
+        self.setup_players()
+        self.shown = False
+        self.hints = HINTS
+        self.hint_analyzer = None  # started the first time hints are shown
+        self.hint_request = None  # (board_version, selected_penguin) being analyzed
+
+        # Everything time-driven -- turn clock, AI polling and deadline, blinking, going
+        # idle -- runs on timers armed while the view is shown and released when it's hidden
+        self.timers = ViewTimers()
+        self.turn_deadline = None  # perf_counter() time the turn runs out, while shown
+        self.turn_left = TURN_TIME_LIMIT  # what was left of the turn when last hidden
+
+        # The deal comes from seed (a fresh one per game unless given) so a recorded game
+        # can be dealt again
+        self.seed = seed
+
+        # Board layout, sized to the window for this board
+        self.board_config = (rows, cols, penguins_per_player)
+        self.rows, self.cols, self.penguins_per_player = self.board_config
+        self.layout = board_layout(rows, cols)
+        self.fit = self.layout.fit_radius
+        self.radius = self.layout.radius
+        self.spacing_x, self.spacing_y = self.layout.spacing_x, self.layout.spacing_y
+        self.offset_x, self.offset_y = self.layout.offset_x, self.layout.offset_y
+        self.camera = arcade.Camera2D()
+        self.home = tuple(self.camera.position)
+        self.min_zoom = min(1.0, self.fit / self.radius)
+        self.max_zoom = max(1.0, HEX_RADIUS / self.radius)
+        self.unplaced_spacing = min(30, (SCREEN_HEIGHT - TOP_BAR_HEIGHT - 120) / max(1, penguins_per_player))
 
         # blinking time
-        self.highlight_blink_timer = 0.0
         self.show_highlight = True
 
-        # Fish sprites list
+        # Fish sprites list and retained-mode board layers (built in setup_board)
         self.fish_sprite_list = arcade.SpriteList()
+        self.fish_sprites = {}
+        self.renderer = None
+        self.bars = ShapeElementList()
+        self.bars.append(create_rectangle_filled(SCREEN_WIDTH / 2, SCREEN_HEIGHT - TOP_BAR_HEIGHT / 2, SCREEN_WIDTH, TOP_BAR_HEIGHT, arcade.color.BLACK))
+        self.bars.append(create_rectangle_filled(SCREEN_WIDTH / 2, BOTTOM_BAR_HEIGHT / 2, SCREEN_WIDTH, BOTTOM_BAR_HEIGHT, arcade.color.BLACK))
+        self.unplaced_shapes = ShapeElementList()
+        self.unplaced_key = None
+
+        # Board tiles and fish are cached offscreen and only redrawn when board_version changes
+        self.board_version = 0
+        self.board_layer = None
+        self.idle = False
+        self.frame_stats = FrameStats()
+        self.startup = None  # (script start, loading screen's first frame) until this view's first frame
+
+        # HUD text is laid out once and only updated when what it shows changes
+        self.hud_batch = Batch()
+        self.human_score_text = arcade.Text("", 100, SCREEN_HEIGHT - 30, arcade.color.WHITE, 16, anchor_x="center", batch=self.hud_batch)
+        self.ai_score_text = arcade.Text("", SCREEN_WIDTH - 100, SCREEN_HEIGHT - 30, arcade.color.WHITE, 16, anchor_x="center", batch=self.hud_batch)
+        self.turn_text = arcade.Text("", SCREEN_WIDTH / 2, SCREEN_HEIGHT - 30, arcade.color.WHITE, 18, anchor_x="center", batch=self.hud_batch)
+        self.timer_text = arcade.Text("", SCREEN_WIDTH / 2, SCREEN_HEIGHT - 60, arcade.color.WHITE, 14, anchor_x="center", batch=self.hud_batch)
+        self.hud_key = None
+        self.trace_text = arcade.Text("", SCREEN_WIDTH - 10, BOTTOM_BAR_HEIGHT + 10, arcade.color.LIGHT_GRAY, 11,
+                                      anchor_x="right", multiline=True, width=320, align="right")
+        self.trace_refreshed = 0.0
+
+        # Sounds are loaded on first use and shared with every other view
+        self.audio = shared_audio()
+
+        self.setup_ui()
+        self.setup_board()
 
-        #Loading Sound Effects
-        try:
-            self.move_sound = arcade.load_sound(":resources:sounds/jump1.wav")
-            self.score_sound = arcade.load_sound(":resources:sounds/coin1.wav")
-            self.invalid_sound = arcade.load_sound(":resources:sounds/error1.wav")
-            self.win_sound = arcade.load_sound(":resources:sounds/upgrade1.wav")
-            self.lose_sound = arcade.load_sound(":resources:sounds/laser1.wav")
-            self.button_click_sound = arcade.load_sound(":resources:sounds/hit1.wav")
-            self.isolated_sound = arcade.load_sound(":resources:sounds/error2.wav")
-            self.background_music = arcade.load_sound(":resources:music/funkyrobot.mp3")
-            self.current_music_player = None
-
-            #Loading clicking_coin.wav
-            try:
-                self.select_sound = arcade.load_sound("sound.wav")
-                print("Loaded custom 'clicking_coin.wav' successfully")
-            except Exception as select_e:
-                print(f"!!! WARNING: Could not load clicking_coin.wav ({select_e}). Using default coin sound. !!!")
-                self.select_sound = arcade.load_sound(":resources:sounds/coin2.wav") 
-            print("Sounds and Music loaded successfully")
-            
-        except Exception as e:
-            print(f"WARNING: Could not load some sounds/music: {e}")
-            self.move_sound = None
-            self.score_sound = None
-            self.invalid_sound = None
-            self.win_sound = None
-            self.select_sound = None
-            self.lose_sound = None
-            self.button_click_sound = None
-            self.isolated_sound = None
-            self.background_music = None
-            self.current_music_player = None
-
-        if self.background_music:
-            try:
-                 self.current_music_player = arcade.play_sound(self.background_music, volume=0.4) # Plays once
-                 print("Background music started (will play once)")
-            except Exception as e:
-                 print(f"ERROR starting background music: {e}")
-                 self.current_music_player = None
-
+    def setup_ui(self):
+        if arcade.headless:
+            self.ui_manager = HeadlessUI()
+            return
+        # The GUI widgets aren't needed for the loading screen, so they are imported here
+        # (already loaded by then, off the main thread)
+        from arcade.gui import UIManager, UIFlatButton
         self.ui_manager = UIManager()
         self.ui_manager.enable()
         self.exit_button = UIFlatButton( text="Exit", width=80, height=30 )
@@ -97,356 +182,706 @@ class MyGame(arcade.View):
         self.exit_button.on_click = self.exit_game
         self.ui_manager.add(self.exit_button)
 
-        self.setup_board()
-        arcade.schedule(self.on_update, 1 / 60)
+    def setup_players(self):
+        # The AI opponent (with greedy to fall back on) and the record file every move is
+        # appended to. The AI stack isn't needed for the loading screen either, so it is
+        # imported here.
+        from fish_ai import GreedyPlayer
+        from fish_worker import shared_worker
+        self.ai_worker = shared_worker(AI_ENGINE)
+        self.fallback_player = GreedyPlayer()
+        self.recorder = shared_writer(RECORD_PATH) if RECORD_PATH else None
+
+    def view_options(self):
+        # Keyword arguments (beyond the board and seed) that set up another view like this one
+        return {}
 
     def on_show_view(self):
+        self.shown = True
         self.ui_manager.enable()
-        if self.background_music and not self.current_music_player:
-             try:
-                 self.current_music_player = arcade.play_sound(self.background_music, volume=0.4)
-             except Exception as e:
-                 print(f"ERROR restarting background music: {e}")
-                 self.current_music_player = None
+        self.audio.play_music()
+        self.timers.every(BLINK_TIME, self.blink)
+        if self.hints: self.timers.every(HINT_POLL_INTERVAL, self.update_hints)
+        self.arm_turn_clock(self.turn_left)
+        self.wake()
+        self.begin_ai_turn()
 
     def on_hide_view(self):
-        if hasattr(self, 'current_music_player') and self.current_music_player:
-            arcade.stop_sound(self.current_music_player)
-            self.current_music_player = None
-
-    def calculate_board_offset(self):
-        board_width = BOARD_COLS * HEX_SPACING_X + HEX_RADIUS
-        board_height = (BOARD_ROWS - 1) * HEX_SPACING_Y * 0.75 + (2 * HEX_RADIUS)
-        offset_x = (SCREEN_WIDTH - board_width) / 2
-        playable_area_height = SCREEN_HEIGHT - TOP_BAR_HEIGHT - BOTTOM_BAR_HEIGHT
-        vertical_padding = (playable_area_height - board_height) / 2
-        offset_y = BOTTOM_BAR_HEIGHT + vertical_padding + HEX_RADIUS
-        return offset_x, offset_y
+        # The turn clock stops while another view is up; nothing of this view keeps running
+        self.turn_left = self.turn_timer
+        self.turn_deadline = None
+        self.shown = False
+        self.timers.release()
+        self.cancel_ai()
+        self.stop_hints()
+        self.set_idle(False)
+        self.ui_manager.disable()
+        self.audio.stop_music()
+
+    @property
+    def turn_timer(self):
+        # Seconds left in the current turn
+        if self.turn_deadline is None: return self.turn_left
+        return max(0.0, self.turn_deadline - time.perf_counter())
+
+    def arm_turn_clock(self, seconds):
+        self.turn_left = seconds
+        self.turn_deadline = None
+        if not self.shown or self.game_over: return
+        self.turn_deadline = time.perf_counter() + seconds
+        self.timers.once(seconds, self.turn_expired)
+
+    def turn_expired(self):
+        self.turn_deadline = None
+        self.turn_left = 0.0
+        self.switch_turn()
+
+    def blink(self):
+        self.show_highlight = not self.show_highlight
+
+    @property
+    def current_player(self): return PLAYERS[self.state.current]
+    @property
+    def game_phase(self): return self.state.phase
+    @property
+    def human_score(self): return self.state.scores[HUMAN]
+    @property
+    def ai_score(self): return self.state.scores[AI]
+    @property
+    def unplaced_human_penguins(self): return self.state.unplaced[HUMAN]
+    @property
+    def unplaced_ai_penguins(self): return self.state.unplaced[AI]
 
     def setup_board(self):
-        self.board = [[{} for _ in range(BOARD_COLS)] for _ in range(BOARD_ROWS)]
+        if self.seed is None: self.seed = random.getrandbits(63)
+        self.state = GameState.new_game(random.Random(self.seed), self.rows, self.cols, self.penguins_per_player)
+        self.session = GameSession(self.state)
+        self.session.listeners.append(self.on_game_event)
+        if self.recorder:
+            self.recorder.begin(self.state, self.seed)
+            self.session.listeners.append(self.recorder.on_game_event)
         self.fish_sprite_list = arcade.SpriteList()
+        self.renderer = BoardRenderer(self.layout.centers(), self.radius, (arcade.color.DARK_BLUE, arcade.color.GREEN))
+        centers = self.renderer.centers
 
-        base_path = "/Users/mayur/Desktop/fish_game/"
-        fish_image_paths = {
-            1: base_path + "fish1.png",
-            2: base_path + "fish2.png",
-            3: base_path + "fish3.png",
-        }
-
-        one_fish_count = int((BOARD_ROWS * BOARD_COLS) * 0.6)
-        two_fish_count = int((BOARD_ROWS * BOARD_COLS) * 0.3)
-        three_fish_count = (BOARD_ROWS * BOARD_COLS) - one_fish_count - two_fish_count
-        fish_counts = ([1] * one_fish_count +
-                       [2] * two_fish_count +
-                       [3] * three_fish_count)
-        random.shuffle(fish_counts)
-
-        target_sprite_size = HEX_RADIUS * 1.5
-
-        for row in range(BOARD_ROWS):
-            for col in range(BOARD_COLS):
-                if not fish_counts: fish_count = 1
-                else: fish_count = fish_counts.pop()
-
-                self.board[row][col]['fish'] = fish_count
-                self.board[row][col]['penguin'] = None
-                self.board[row][col]['is_hole'] = False
-
-                if fish_count in fish_image_paths:
-                    image_path = fish_image_paths[fish_count]
-                    try:
-                        fish_sprite = arcade.Sprite(image_path)
-                        aspect_ratio = fish_sprite.texture.width / fish_sprite.texture.height
-                        if aspect_ratio > 1:
-                            fish_sprite.width = target_sprite_size
-                            fish_sprite.height = target_sprite_size / aspect_ratio
-                        else:
-                            fish_sprite.height = target_sprite_size
-                            fish_sprite.width = target_sprite_size * aspect_ratio
-                        fish_sprite.center_x, fish_sprite.center_y = self.get_hex_center(row, col)
-                        fish_sprite.properties['grid_row'] = row
-                        fish_sprite.properties['grid_col'] = col
-                        self.fish_sprite_list.append(fish_sprite)
-                    except FileNotFoundError:
-                        print(f"!!! CRITICAL ERROR: Fish image not found for count {fish_count}. Check path: '{image_path}'. !!!")
-                    except Exception as e:
-                         print(f"!!! WARNING: Error creating fish sprite for count {fish_count}: {e} !!!")
+        size = fish_size(self.radius)
+        try:
+            textures = fish_textures(size)
+            self.fish_sprite_list = arcade.SpriteList(atlas=fish_atlas(size, self.window.ctx))
+        except FileNotFoundError as e:
+            print(f"!!! CRITICAL ERROR: Fish image not found ({e}). Check '{ASSET_DIR}'. !!!")
+            textures = {}
+
+        # Tile index -> fish sprite, so a move removes its sprite without searching the list
+        # (and an undo can put it back)
+        self.fish_sprites = {}
+        for index, fish_count in enumerate(self.state.fish):
+            if fish_count in textures:
+                fish_sprite = arcade.Sprite(textures[fish_count], center_x=centers[index][0], center_y=centers[index][1])
+                self.fish_sprites[index] = fish_sprite
+                self.fish_sprite_list.append(fish_sprite)
 
     def on_draw(self):
-        self.clear()
-        self.draw_hex_grid()
-        self.fish_sprite_list.draw()
-        self.draw_highlights()
-        self.draw_penguins()
-        self.draw_ui()
-        self.draw_unplaced_penguins()
-        self.ui_manager.draw()
+        with TRACER.span('on_draw'):
+            start = time.perf_counter()
+            self.renderer.sync(self.state)
+            if self.board_layer is None: self.board_layer = CachedLayer(self.window)
+            redraws = self.board_layer.redraws
+            self.board_layer.update((self.board_version, *self.camera.position, self.camera.zoom), self.draw_board)
+            self.board_layer.draw()
+            with self.camera.activate():
+                with TRACER.span('draw_highlights'): self.draw_highlights()
+                with TRACER.span('draw_penguins'): self.draw_penguins()
+            with TRACER.span('draw_ui'): self.draw_ui()
+            self.draw_unplaced_penguins()
+            with TRACER.span('ui_manager.draw'): self.ui_manager.draw()
+            report = self.frame_stats.record(time.perf_counter() - start, self.board_layer.redraws != redraws)
+            if report and SHOW_FRAME_STATS: print(report)
+        if TRACER.enabled: self.draw_trace_overlay()
+        if self.startup: self.report_startup()
+
+    def report_startup(self):
+        started, first_frame = self.startup
+        self.startup = None
+        interactive = time.perf_counter()
+        TRACER.add('startup: first frame', started, first_frame - started)
+        TRACER.add('startup: interactive', started, interactive - started)
+        print(f"Startup: first frame after {first_frame - started:.2f}s, interactive after {interactive - started:.2f}s")
+
+    def draw_board(self):
+        # Only runs when the cached board layer is redrawn
+        with self.camera.activate():
+            with TRACER.span('draw_hex_grid'): self.draw_hex_grid()
+            with TRACER.span('fish_sprite_list.draw'): self.fish_sprite_list.draw()
+
+    def draw_trace_overlay(self):
+        now = time.perf_counter()
+        if now - self.trace_refreshed >= TRACE_OVERLAY_REFRESH:
+            self.trace_refreshed = now
+            lines = []
+            for label, name in (("frame", 'on_draw'), ("AI poll", 'execute_ai_turn'), ("AI think", 'ai_think')):
+                p50, p99 = TRACER.percentiles(name, 0.5, 0.99)
+                lines.append(f"{label}: p50 {p50 * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms" if p50 is not None else f"{label}: -")
+            self.trace_text.text = "\n".join(lines)
+        self.trace_text.draw()
+
+    def toggle_trace(self):
+        TRACER.enabled = not TRACER.enabled
+        if TRACER.enabled: TRACER.clear()
+        self.trace_refreshed = 0.0
+
+    def export_trace(self):
+        if not TRACER.timings: return
+        print(f"Trace written to {TRACER.export(TRACE_PATH)}")
 
     def draw_unplaced_penguins(self):
-        start_x = 50
-        start_y = 100
-        for i in range(self.unplaced_human_penguins):
-            color = arcade.color.YELLOW_ORANGE if self.placement_selected and i == self.unplaced_human_penguins - 1 else arcade.color.DARK_BLUE
-            arcade.draw_circle_filled(start_x, start_y + i * 30, 10, color)
-        for i in range(self.unplaced_ai_penguins):
-            arcade.draw_circle_filled(SCREEN_WIDTH - start_x, start_y + i * 30, 10, arcade.color.GREEN)
-
-    def on_update(self, delta_time):
-        self.highlight_blink_timer += delta_time
-        if self.highlight_blink_timer > BLINK_TIME:
-            self.show_highlight = not self.show_highlight
-            self.highlight_blink_timer = 0.0
-
-        self.turn_timer -= delta_time
-        if self.turn_timer <= 0: self.switch_turn()
-
-        if self.current_player == 'ai' and self.game_phase in ['placement', 'game_in_progress']:
-            if self.turn_timer < (TURN_TIME_LIMIT - 0.5): self.execute_ai_turn()
-
-        if self.game_phase == 'placement' and self.unplaced_human_penguins == 0 and self.unplaced_ai_penguins == 0:
-            self.game_phase = 'game_in_progress'
-            self.current_player = 'human'
-            self.turn_timer = TURN_TIME_LIMIT
+        key = (self.unplaced_human_penguins, self.unplaced_ai_penguins, self.placement_selected)
+        if key != self.unplaced_key:
+            self.unplaced_key = key
+            self.unplaced_shapes = ShapeElementList()
+            start_x = 50
+            start_y = 100
+            for i in range(self.unplaced_human_penguins):
+                color = arcade.color.YELLOW_ORANGE if self.placement_selected and i == self.unplaced_human_penguins - 1 else arcade.color.DARK_BLUE
+                self.unplaced_shapes.append(create_ellipse_filled(start_x, start_y + i * self.unplaced_spacing, 20, 20, color, num_segments=32))
+            for i in range(self.unplaced_ai_penguins):
+                self.unplaced_shapes.append(create_ellipse_filled(SCREEN_WIDTH - start_x, start_y + i * self.unplaced_spacing, 20, 20, arcade.color.GREEN, num_segments=32))
+        self.unplaced_shapes.draw()
+
+    def set_idle(self, idle):
+        if idle == self.idle: return
+        self.idle = idle
+        self.window.set_draw_rate(IDLE_DRAW_RATE if idle else ACTIVE_DRAW_RATE)
+
+    def wake(self):
+        # Input (or a new turn) redraws at full rate until IDLE_AFTER passes without any
+        self.set_idle(False)
+        if self.shown: self.timers.once(IDLE_AFTER, self.fall_idle)
+
+    def fall_idle(self):
+        if self.current_player == 'human' and not self.game_over: self.set_idle(True)
+
+    def on_mouse_motion(self, x, y, dx, dy):
+        self.wake()
+
+    def pan(self, dx, dy):
+        # Keep the view centre over the board (or where it started, if that's off the board)
+        (left, bottom), (right, top) = self.board_bounds()
+        x = min(max(self.camera.position[0] + dx, min(left, self.home[0])), max(right, self.home[0]))
+        y = min(max(self.camera.position[1] + dy, min(bottom, self.home[1])), max(top, self.home[1]))
+        self.camera.position = (x, y)
+
+    def zoom(self, factor):
+        self.camera.zoom = min(max(self.camera.zoom * factor, self.min_zoom), self.max_zoom)
+        self.pan(0, 0)
+
+    def board_bounds(self):
+        return self.get_hex_center(0, 0), self.get_hex_center(self.rows - 1, self.cols - 1)
+
+    def on_key_press(self, symbol, modifiers):
+        self.wake()
+        step = PAN_STEP / self.camera.zoom
+        moves = {arcade.key.LEFT: (-step, 0), arcade.key.RIGHT: (step, 0), arcade.key.UP: (0, step), arcade.key.DOWN: (0, -step)}
+        if symbol in moves: self.pan(*moves[symbol])
+        elif symbol in (arcade.key.PLUS, arcade.key.EQUAL, arcade.key.NUM_ADD): self.zoom(ZOOM_STEP)
+        elif symbol in (arcade.key.MINUS, arcade.key.NUM_SUBTRACT): self.zoom(1 / ZOOM_STEP)
+        elif symbol == arcade.key.Z: self.undo_turn()
+        elif symbol == arcade.key.Y: self.redo_turn()
+        elif symbol == arcade.key.F3: self.toggle_trace()
+        elif symbol == arcade.key.F4: self.export_trace()
+        elif symbol == arcade.key.H: self.toggle_hints()
+
+    def on_mouse_drag(self, x, y, dx, dy, buttons, modifiers):
+        self.wake()
+        if buttons & arcade.MOUSE_BUTTON_RIGHT: self.pan(-dx / self.camera.zoom, -dy / self.camera.zoom)
+
+    def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
+        self.wake()
+        if scroll_y: self.zoom(ZOOM_STEP ** scroll_y)
 
     def on_mouse_press(self, x, y, button, modifiers):
+        self.wake()
         if self.ui_manager.on_mouse_press(x, y, button, modifiers): return
         if self.current_player != 'human': return
 
         dest_row, dest_col = self.get_hex_from_mouse(x, y)
         is_on_board = (dest_row != -1)
 
-        if self.game_phase == 'placement':
-            if not is_on_board:
-                if self.get_unplaced_penguin_at_mouse(x, y): self.placement_selected = True
+        if self.game_phase == PLACEMENT:
+            # Checked first: on big boards the penguin stacks overlap the board
+            if self.get_unplaced_penguin_at_mouse(x, y):
+                self.placement_selected = True
                 return
+            if not is_on_board: return
 
             if is_on_board and self.placement_selected:
-                if self.board[dest_row][dest_col]['penguin'] is None and self.board[dest_row][dest_col]['fish'] == 1:
-                    self.board[dest_row][dest_col]['penguin'] = 'human'
-                    self.unplaced_human_penguins -= 1
+                dest = self.state.index(dest_row, dest_col)
+                if self.state.is_legal((PLACE, dest)):
                     self.placement_selected = False
-                    self.switch_turn()
+                    self.apply_move((PLACE, dest))
                 else:
                     self.placement_selected = False
-                    if self.invalid_sound: arcade.play_sound(self.invalid_sound, volume=1.0)
+                    self.audio.play('invalid')
                 return
 
-        if self.game_phase == 'game_in_progress' and is_on_board:
+        if self.game_phase == IN_PROGRESS and is_on_board:
             if self.selected_penguin:
-                 valid_moves = self.get_valid_moves(*self.selected_penguin)
-                 if (dest_row, dest_col) in valid_moves:
+                 reachable = self.state.reach_mask(self.state.index(*self.selected_penguin))
+                 if reachable >> self.state.index(dest_row, dest_col) & 1:
                      self.move_penguin(self.selected_penguin, (dest_row, dest_col))
-                 elif self.board[dest_row][dest_col]['penguin'] == 'human':
-                     if not self.get_valid_moves(dest_row, dest_col):
-                         if self.isolated_sound: arcade.play_sound(self.isolated_sound, volume=1.0)
+                 elif self.state.penguin_at(self.state.index(dest_row, dest_col)) == HUMAN:
+                     if not self.state.has_moves_from(self.state.index(dest_row, dest_col)):
+                         self.audio.play('isolated')
                      else:
                          self.selected_penguin = (dest_row, dest_col)
-                         if self.select_sound: arcade.play_sound(self.select_sound, volume=1.0)
+                         self.audio.play('select')
                  else:
-                     if self.invalid_sound: arcade.play_sound(self.invalid_sound, volume=1.0)
+                     self.audio.play('invalid')
                      self.selected_penguin = None
             else:
-                if self.board[dest_row][dest_col]['penguin'] == 'human':
-                    if not self.get_valid_moves(dest_row, dest_col):
-                        if self.isolated_sound: arcade.play_sound(self.isolated_sound, volume=1.0)
+                if self.state.penguin_at(self.state.index(dest_row, dest_col)) == HUMAN:
+                    if not self.state.has_moves_from(self.state.index(dest_row, dest_col)):
+                        self.audio.play('isolated')
                     else:
                         self.selected_penguin = (dest_row, dest_col)
-                        if self.select_sound: arcade.play_sound(self.select_sound, volume=1.0)
+                        self.audio.play('select')
                 else:
-                    if self.invalid_sound: arcade.play_sound(self.invalid_sound, volume=1.0)
-
-    def execute_ai_turn(self):
-        if self.game_phase == 'placement' and self.unplaced_ai_penguins > 0:
-            valid = [(r, c) for r in range(BOARD_ROWS) for c in range(BOARD_COLS)
-                     if self.board[r][c]['penguin'] is None and self.board[r][c]['fish'] == 1]
-            if valid:
-                r, c = random.choice(valid)
-                self.board[r][c]['penguin'] = 'ai'
-                self.unplaced_ai_penguins -= 1
-                self.switch_turn()
-            else: self.switch_turn()
+                    self.audio.play('invalid')
+
+    def begin_ai_turn(self):
+        # Start a background search, then poll it every AI_POLL_INTERVAL until it answers
+        # or its deadline passes. On the human's turn the AI ponders instead, until the
+        # human's move cancels it. Either way the worker first checks whether the islands
+        # already decide the game, and the game ends on the scores it reports.
+        if self.game_over or not self.shown or self.ai_request is not None: return
+        if self.current_player != 'ai':
+            self.ai_request = self.ai_worker.watch(self.state.copy(), AI_PONDER)
+            self.timers.every(AI_POLL_INTERVAL, self.execute_ai_turn)
             return
-
-        if self.game_phase == 'game_in_progress' and self.current_player == 'ai':
-            all_moves = []
-            ai_penguins = [(r, c) for r in range(BOARD_ROWS) for c in range(BOARD_COLS)
-                           if self.board[r][c]['penguin'] == 'ai']
-            for r, c in ai_penguins:
-                for move in self.get_valid_moves(r, c):
-                    er, ec = move
-                    score = self.board[er][ec]['fish']
-                    all_moves.append({'start': (r, c), 'end': move, 'score': score})
-            if all_moves:
-                best = max(all_moves, key=lambda m: m['score'])
-                self.move_penguin(best['start'], best['end'])
-            else: self.switch_turn()
+        self.ai_request = self.ai_worker.think(self.state.copy(), AI_THINK_TIME)
+        self.timers.every(AI_POLL_INTERVAL, self.execute_ai_turn)
+        self.timers.once(AI_THINK_TIME + AI_DEADLINE_GRACE, self.ai_deadline)
+
+    def ai_deadline(self):
+        self.execute_ai_turn(deadline=True)
+
+    def execute_ai_turn(self, deadline=False):
+        with TRACER.span('execute_ai_turn'): self._execute_ai_turn(deadline)
+
+    def _execute_ai_turn(self, deadline):
+        request = self.ai_worker.poll()
+        if request is None or request is not self.ai_request:
+            # The worker dropped it (e.g. it was restarted): ask again
+            self.cancel_ai()
+            self.begin_ai_turn()
+            return
+        if request.settled is not None:
+            self.cancel_ai()
+            self.end_game(request.settled)
+            return
+        if self.current_player != 'ai':
+            # Nothing more to hear on the human's turn once the game is known to go on
+            if request.checked: self.timers.cancel(self.execute_ai_turn)
+            return
+        elapsed = request.elapsed()
+        if request.done and elapsed >= AI_MIN_DELAY:
+            choice = request.result if request.result.move is not None else request.best
+        elif deadline or elapsed >= AI_THINK_TIME + AI_DEADLINE_GRACE:
+            choice = request.best
+            print("AI deadline hit, playing best move so far")
+        else:
+            return
+        TRACER.add('ai_think', request.started, elapsed, AI_THREAD)
+        self.cancel_ai()
+        if choice is None: choice = self.fallback_player.choose_move(self.state, 0)
+        if choice.move is None:
+            self.switch_turn()
+            return
+        print(choice.report)
+        self.apply_move(choice.move)
 
     def get_unplaced_penguin_at_mouse(self, x, y):
         start_x, start_y = 50, 100
         for i in range(self.unplaced_human_penguins):
-            if (x - start_x) ** 2 + (y - (start_y + i * 30)) ** 2 < 10 ** 2: return True
+            if (x - start_x) ** 2 + (y - (start_y + i * self.unplaced_spacing)) ** 2 < 10 ** 2: return True
         return False
 
     def get_hex_from_mouse(self, x, y):
-        x_adj, y_adj = x - self.offset_x, y - self.offset_y
-        row = round(y_adj / (HEX_SPACING_Y * 0.75))
-        col = round((x_adj - (HEX_SPACING_X / 2 if row % 2 else 0)) / HEX_SPACING_X)
-        if 0 <= row < BOARD_ROWS and 0 <= col < BOARD_COLS:
-            hex_x, hex_y = self.get_hex_center(row, col)
-            if (x - hex_x)**2 + (y - hex_y)**2 < HEX_RADIUS**2: return row, col
-        return -1, -1
+        if not BOTTOM_BAR_HEIGHT <= y <= SCREEN_HEIGHT - TOP_BAR_HEIGHT: return -1, -1
+        x, y, _ = self.camera.unproject((x, y))
+        return self.layout.pick(x, y)
 
     def move_penguin(self, start, end):
-        sr, sc = start
-        er, ec = end
-        player = self.board[sr][sc]['penguin']
-        fish = self.board[sr][sc]['fish']
-        if player == 'human': self.human_score += fish
-        else: self.ai_score += fish
-
-        if self.move_sound: arcade.play_sound(self.move_sound, volume=1.0)
-        if self.score_sound and fish > 1: arcade.play_sound(self.score_sound, volume=1.0)
-
-        self.board[er][ec]['penguin'] = player
-        self.board[sr][sc]['penguin'] = None
-        self.board[sr][sc]['is_hole'] = True
-
-        for fish_sprite in self.fish_sprite_list:
-            sprite_row = fish_sprite.properties.get('grid_row')
-            sprite_col = fish_sprite.properties.get('grid_col')
-            if sprite_row == sr and sprite_col == sc:
-                fish_sprite.remove_from_sprite_lists()
-                break
-        self.switch_turn()
-        if self.check_game_over(): self.end_game()
+        self.apply_move((self.state.index(*start), self.state.index(*end)))
+
+    def apply_move(self, move):
+        self.session.play(move)
 
     def switch_turn(self):
-        self.current_player = 'ai' if self.current_player == 'human' else 'human'
-        self.turn_timer = TURN_TIME_LIMIT
+        self.session.pass_turn()
+
+    def undo_turn(self):
+        # Take back the human's last move and the AI's replies; Y plays them again
+        if self.game_over: return
+        self.placement_selected = False
+        if not self.session.undo_turn(HUMAN): self.audio.play('invalid')
+
+    def redo_turn(self):
+        if self.game_over: return
+        if not self.session.redo_turn(HUMAN): self.audio.play('invalid')
+
+    def on_game_event(self, event):
+        # Sounds and sprites follow the session's events; the rules never touch them
+        self.play_event_sound(event)
+        if event.kind == 'moved':
+            fish_sprite = self.fish_sprites.get(event.move[0])
+            if fish_sprite: fish_sprite.remove_from_sprite_lists()
+        elif event.kind == 'undone' and event.move is not None and event.move[0] != PLACE:
+            fish_sprite = self.fish_sprites.get(event.move[0])
+            if fish_sprite: self.fish_sprite_list.append(fish_sprite)
+        self.start_turn()
+
+    def play_event_sound(self, event):
+        if event.kind == 'moved':
+            self.audio.play('move')
+            if event.fish > 1: self.audio.play('score')
+
+    def cancel_ai(self):
+        self.timers.cancel(self.execute_ai_turn)
+        self.timers.cancel(self.ai_deadline)
+        self.ai_worker.cancel()  # also stops pondering
+        self.ai_request = None
+
+    def start_turn(self):
+        self.cancel_ai()
+        self.board_version += 1
+        self.arm_turn_clock(TURN_TIME_LIMIT)
         self.selected_penguin = None
-        if self.game_phase == 'game_in_progress':
-            if not self.player_has_moves(self.current_player):
-                other_player = 'ai' if self.current_player == 'human' else 'human'
-                if not self.player_has_moves(other_player): self.end_game()
-                else: self.switch_turn()
+        if self.state.is_terminal():
+            self.end_game()
+            return
+        self.wake()
+        self.begin_ai_turn()
 
     def get_hex_center(self, row, col):
-        x = col * HEX_SPACING_X
-        y = row * HEX_SPACING_Y * 0.75
-        if row % 2 == 1: x += HEX_SPACING_X / 2
-        return x + self.offset_x, y + self.offset_y
-
-    def get_hex_points(self, center_x, center_y, radius=HEX_RADIUS):
-        points = []
-        for i in range(6):
-            angle_rad = math.radians(60 * i)
-            x = center_x + radius * math.cos(angle_rad)
-            y = center_y + radius * math.sin(angle_rad)
-            points.append((x, y))
-        return points
+        return self.layout.hex_center(row, col)
+
+    def get_hex_points(self, center_x, center_y, radius=None):
+        return self.layout.hex_points(center_x, center_y, radius)
 
     def draw_highlights(self):
-        if self.selected_penguin and self.show_highlight:
-            sr, sc = self.selected_penguin
-            x, y = self.get_hex_center(sr, sc)
-            arcade.draw_polygon_filled(self.get_hex_points(x, y, HEX_RADIUS - 2), arcade.color.YELLOW_ORANGE)
-            valid_moves = self.get_valid_moves(sr, sc)
-            for (r, c) in valid_moves:
-                x, y = self.get_hex_center(r, c)
-                points = self.get_hex_points(x, y, HEX_RADIUS - 4)
-                color = arcade.color.LIME_GREEN
-                arcade.draw_polygon_filled(points, color)
-
-    def offset_to_cube(self, row, col):
-        x = col - (row - (row & 1)) / 2; z = row; y = -x - z
-        return x, y, z
-
-    def cube_to_offset(self, x, y, z):
-        col = int(x + (z - (z & 1)) / 2); row = int(z)
-        return row, col
+        # The selection can't outlive the turn, so its moves only need computing when it changes
+        selected = self.state.index(*self.selected_penguin) if self.selected_penguin else None
+        key = self.renderer.highlight_key
+        if key is None or key[0] != selected:
+            with TRACER.span('get_valid_moves'): moves = self.state.moves_from(selected) if selected is not None else ()
+        else: moves = key[1]
+        hints = solved_depth = None
+        if self.hint_request is not None and self.hint_request == (self.board_version, self.selected_penguin):
+            hints, solved_depth = self.hint_analyzer.scores(), self.hint_analyzer.solved_depth
+        self.renderer.set_highlight(selected, moves, hints, solved_depth)
+        if self.show_highlight: self.renderer.draw_highlights()
+        if hints: self.renderer.draw_hints()
+
+    def toggle_hints(self):
+        self.hints = not self.hints
+        if self.hints and self.shown: self.timers.every(HINT_POLL_INTERVAL, self.update_hints)
+        if not self.hints:
+            self.timers.cancel(self.update_hints)
+            self.stop_hints()
+
+    def update_hints(self):
+        # Point the analyzer at the selected penguin (or stop it), then take in its scores;
+        # the highlights pick them up on the next frame
+        if self.hint_analyzer is None:
+            from fish_hints import shared_analyzer
+            self.hint_analyzer = shared_analyzer()
+            self.renderer.warm_hints()
+        wanted = None
+        if self.selected_penguin and self.current_player == 'human' and not self.game_over:
+            wanted = (self.board_version, self.selected_penguin)
+        if wanted != self.hint_request:
+            self.hint_request = wanted
+            if wanted: self.hint_analyzer.analyze(self.state, self.state.index(*self.selected_penguin))
+            else: self.hint_analyzer.stop()
+        self.hint_analyzer.poll()
+
+    def stop_hints(self):
+        self.hint_request = None
+        if self.hint_analyzer is not None: self.hint_analyzer.stop()
 
     def get_valid_moves(self, row, col):
-        moves = []
-        start_cube = self.offset_to_cube(row, col)
-        directions = [(1, -1, 0), (-1, 1, 0), (1, 0, -1), (-1, 0, 1), (0, 1, -1), (0, -1, 1)]
-        for dx, dy, dz in directions:
-            cur = list(start_cube)
-            while True:
-                cur[0] += dx; cur[1] += dy; cur[2] += dz
-                r, c = self.cube_to_offset(*cur)
-                if not (0 <= r < BOARD_ROWS and 0 <= c < BOARD_COLS): break
-                if self.board[r][c]['is_hole'] or self.board[r][c]['penguin']: break
-                moves.append((r, c))
-        return moves
+        return [self.state.cell(i) for i in self.state.moves_from(self.state.index(row, col))]
 
     def player_has_moves(self, player):
-        for r in range(BOARD_ROWS):
-            for c in range(BOARD_COLS):
-                if self.board[r][c]['penguin'] == player:
-                    if self.get_valid_moves(r, c): return True
-        return False
+        return self.state.player_has_moves(PLAYERS.index(player))
 
     def check_game_over(self):
-        if not self.player_has_moves('human') and not self.player_has_moves('ai'): return True
-        return False
+        return self.state.is_terminal()
 
     def draw_hex_grid(self):
-        gap = 2
-        draw_radius = HEX_RADIUS - gap
-        for r in range(BOARD_ROWS):
-            for c in range(BOARD_COLS):
-                if self.board[r][c]['is_hole']: continue
-                x, y = self.get_hex_center(r, c)
-                points = self.get_hex_points(x, y, draw_radius)
-                arcade.draw_polygon_filled(points, arcade.color.POWDER_BLUE)
+        self.renderer.draw_tiles()
 
     def draw_penguins(self):
-        for r in range(BOARD_ROWS):
-            for c in range(BOARD_COLS):
-                x, y = self.get_hex_center(r, c)
-                if self.board[r][c]['penguin'] == 'human':
-                    arcade.draw_circle_filled(x, y, 12, arcade.color.DARK_BLUE)
-                    arcade.draw_circle_outline(x, y, 12, arcade.color.BLACK, 2)
-                elif self.board[r][c]['penguin'] == 'ai':
-                    arcade.draw_circle_filled(x, y, 12, arcade.color.GREEN)
-                    arcade.draw_circle_outline(x, y, 12, arcade.color.BLACK, 2)
+        self.renderer.draw_penguins()
 
     def draw_ui(self):
-        top_bar_points = [(0, SCREEN_HEIGHT - TOP_BAR_HEIGHT),(SCREEN_WIDTH, SCREEN_HEIGHT - TOP_BAR_HEIGHT),(SCREEN_WIDTH, SCREEN_HEIGHT),(0, SCREEN_HEIGHT)]
-        arcade.draw_polygon_filled(top_bar_points, arcade.color.BLACK)
-        bottom_bar_points = [(0, 0),(SCREEN_WIDTH, 0),(SCREEN_WIDTH, BOTTOM_BAR_HEIGHT),(0, BOTTOM_BAR_HEIGHT)]
-        arcade.draw_polygon_filled(bottom_bar_points, arcade.color.BLACK)
-        arcade.draw_text(f"Your Score: {self.human_score}", 100, SCREEN_HEIGHT - 30, arcade.color.WHITE, 16, anchor_x="center")
-        arcade.draw_text(f"AI Score: {self.ai_score}", SCREEN_WIDTH - 100, SCREEN_HEIGHT - 30, arcade.color.WHITE, 16, anchor_x="center")
-        turn_text = "Your Turn!" if self.current_player == 'human' else "AI's Turn!"
-        if self.game_phase == 'placement': turn_text = f"Placement: {turn_text}"
-        arcade.draw_text(turn_text, SCREEN_WIDTH / 2, SCREEN_HEIGHT - 30, arcade.color.WHITE, 18, anchor_x="center")
-        timer_color = arcade.color.RED_ORANGE if self.turn_timer < 5 else arcade.color.WHITE
-        arcade.draw_text(f"Time: {int(max(0, self.turn_timer))}", SCREEN_WIDTH / 2, SCREEN_HEIGHT - 60, timer_color, 14, anchor_x="center")
-
-    def end_game(self):
-        if self.human_score > self.ai_score:
-            if self.win_sound:
-                arcade.play_sound(self.win_sound, volume=1.0)
-        elif self.ai_score > self.human_score:
-            if self.lose_sound:
-                arcade.play_sound(self.lose_sound, volume=1.0)
+        self.bars.draw()
+        seconds = int(max(0, self.turn_timer))
+        key = (self.human_score, self.ai_score, self.current_player, self.game_phase, seconds)
+        if key != self.hud_key:
+            self.hud_key = key
+            self.human_score_text.text = f"Your Score: {self.human_score}"
+            self.ai_score_text.text = f"AI Score: {self.ai_score}"
+            turn_text = "Your Turn!" if self.current_player == 'human' else "AI's Turn!"
+            if self.game_phase == PLACEMENT: turn_text = f"Placement: {turn_text}"
+            self.turn_text.text = turn_text
+            self.timer_text.text = f"Time: {seconds}"
+            self.timer_text.color = arcade.color.RED_ORANGE if self.turn_timer < 5 else arcade.color.WHITE
+        self.hud_batch.draw()
+
+    def end_game(self, scores=None):
+        if self.game_over: return
+        self.game_over = True
+        if self.recorder: self.recorder.end(settled=scores)
+        human_score, ai_score = scores or (self.human_score, self.ai_score)
+        if human_score > ai_score:
+            self.audio.play('win')
+        elif ai_score > human_score:
+            self.audio.play('lose')
         self.ui_manager.disable()
-        game_over_view = GameOverView(self.human_score, self.ai_score, self)
+        game_over_view = GameOverView(human_score, ai_score, self)
         self.window.show_view(game_over_view)
 
     def exit_game(self, event):
-        if self.button_click_sound:
-            arcade.play_sound(self.button_click_sound, volume=1.0)
+        self.audio.play('click')
         self.ui_manager.disable()
+        self.cancel_ai()
         confirmation_view = ExitConfirmationView(self)
         self.window.show_view(confirmation_view)
 
+class SpectatorView(MyGame):
+    # Both seats played by AIs. fish_spectate plays the games in its own process as fast as
+    # the engine allows; this view only replays the moves it streams, at the chosen speed,
+    # so nothing here waits on the frame rate or the turn clock. ] and [ change speed,
+    # space pauses.
+
+    def __init__(self, rows=BOARD_ROWS, cols=BOARD_COLS, penguins_per_player=PENGUINS_PER_PLAYER, seed=None,
+                 players=SPECTATE_PLAYERS, speed=1, sample_every=1):
+        self.players = tuple(players)
+        self.names = tuple(spec.partition(':')[0] for spec in self.players)
+        self.first_seed = seed if seed is not None else random.getrandbits(32)
+        self.speed_index = SPECTATE_SPEEDS.index(speed)
+        self.sample_every = max(1, sample_every)
+        self.paused = False
+        self.stream = None
+        self.games_finished = 0
+        self.wins = [0, 0, 0]  # first seat, second seat, draws
+        self.due = 0.0  # moves the playback clock has let through but not yet applied
+        self.last_tick = time.perf_counter()
+        self.hold_until = 0.0  # a finished game stays on screen until then
+        self.started = None
+        super().__init__(rows, cols, penguins_per_player, self.first_seed)
+
+    @property
+    def speed(self): return SPECTATE_SPEEDS[self.speed_index]
+
+    def setup_players(self):
+        # Both seats are played in fish_spectate's process and nothing watched is recorded
+        self.ai_worker = self.fallback_player = self.recorder = None
+
+    def view_options(self):
+        return dict(players=self.players, speed=self.speed, sample_every=self.sample_every)
+
+    def cancel_ai(self):
+        pass
+
+    def on_show_view(self):
+        # Game i is dealt from first_seed + i, so a stream restarted after the exit
+        # dialog picks up where the last finished game left off
+        from fish_spectate import MatchStream
+        self.shown = True
+        self.ui_manager.enable()
+        self.audio.play_music()
+        self.window.set_draw_rate(1 / SPECTATE_FPS)
+        self.stream = MatchStream(self.players, self.board_config, self.first_seed + self.games_finished, SPECTATE_AI_TIME)
+        self.last_tick = time.perf_counter()
+        self.timers.every(PLAYBACK_TICK, self.advance)
+
+    def on_hide_view(self):
+        super().on_hide_view()
+        self.window.set_draw_rate(ACTIVE_DRAW_RATE)
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def set_speed(self, index):
+        self.speed_index = min(max(index, 0), len(SPECTATE_SPEEDS) - 1)
+        self.due = 0.0
+
+    def advance(self):
+        # Apply the moves the playback clock has let through, in whole samples of
+        # sample_every moves (unthrottled: everything the simulation has sent), spending
+        # at most PLAYBACK_SLICE per tick
+        now = time.perf_counter()
+        elapsed, self.last_tick = now - self.last_tick, now
+        if self.paused or now < self.hold_until or self.stream is None: return
+        budget = None
+        if self.speed is not None:
+            self.due += elapsed * self.speed / SPECTATE_MOVE_TIME
+            budget = int(self.due // self.sample_every) * self.sample_every
+            if budget == 0: return
+        applied = 0
+        stop = now + PLAYBACK_SLICE
+        while (budget is None or applied < budget) and self.stream.poll():
+            kind, *payload = self.stream.recv()
+            if kind == 'move':
+                self.session.play(payload[0])
+                applied += 1
+            elif kind == 'game':
+                self.begin_game(*payload)
+            else:
+                self.finish_game(*payload)
+                return
+            if time.perf_counter() > stop: break
+        if budget is not None:
+            # Moves the simulation hadn't played yet aren't made up later in one burst
+            self.due = self.due - applied if applied == budget else min(self.due - applied, float(self.sample_every))
+
+    def begin_game(self, index, seed):
+        if self.started is None: self.started = time.perf_counter()
+        self.seed = seed
+        self.setup_board()
+        self.start_turn()
+
+    def finish_game(self, scores):
+        first, second = scores
+        self.games_finished += 1
+        self.wins[0 if first > second else 1 if second > first else 2] += 1
+        print(f"Game {self.games_finished} (seed {self.seed}): {self.players[0]} {first} - {second} {self.players[1]}")
+        self.hold_until = time.perf_counter() + (SPECTATE_RESULT_TIME / self.speed if self.speed else 0.0)
+        self.due = 0.0
+
+    def start_turn(self):
+        # Moves come from the stream: no turn clock, AI request or early finish here
+        self.board_version += 1
+        self.selected_penguin = None
+
+    def play_event_sound(self, event):
+        if self.speed == 1: super().play_event_sound(event)
+
+    def fall_idle(self):
+        pass
+
+    def on_mouse_press(self, x, y, button, modifiers):
+        self.wake()
+        self.ui_manager.on_mouse_press(x, y, button, modifiers)
+
+    def on_key_press(self, symbol, modifiers):
+        if symbol == arcade.key.BRACKETRIGHT: self.set_speed(self.speed_index + 1)
+        elif symbol == arcade.key.BRACKETLEFT: self.set_speed(self.speed_index - 1)
+        elif symbol == arcade.key.SPACE: self.paused = not self.paused
+        elif symbol not in (arcade.key.Z, arcade.key.Y, arcade.key.H): super().on_key_press(symbol, modifiers)
+
+    def draw_ui(self):
+        self.bars.draw()
+        hours = (time.perf_counter() - self.started) / 3600 if self.started else 0
+        rate = int(self.games_finished / hours) if hours else 0
+        key = (self.human_score, self.ai_score, self.state.current, self.games_finished, self.speed_index, self.paused, rate)
+        if key != self.hud_key:
+            self.hud_key = key
+            self.human_score_text.text = f"{self.names[HUMAN]}: {self.human_score}"
+            self.ai_score_text.text = f"{self.names[AI]}: {self.ai_score}"
+            self.turn_text.text = f"Game {self.games_finished + 1}: {self.names[self.state.current]} to move"
+            speed = "paused" if self.paused else "unthrottled" if self.speed is None else f"{self.speed}x"
+            self.timer_text.text = f"{speed}   wins {self.wins[0]}-{self.wins[1]}, {self.wins[2]} drawn   {rate} games/h"
+            self.timer_text.color = arcade.color.WHITE
+        self.hud_batch.draw()
+
+class LoadingView(arcade.View):
+    # Shown from the first frame while the first game's AI, endgame tables, fish art,
+    # sounds and GUI widgets load on a background thread; the game view takes over once
+    # they are in. Whatever fails to load here is simply loaded (or reported) by the
+    # game view as before.
+    def __init__(self, board_config, seed=None, view_type=MyGame, **view_options):
+        super().__init__()
+        self.board_config = board_config
+        self.seed = seed
+        self.view_type = view_type
+        self.view_options = view_options
+        self.steps = self.loading_steps()
+        self.done = 0
+        self.label = self.steps[0][0]
+        self.first_frame = None
+        self.thread = threading.Thread(target=self.load, name="fish-loader", daemon=True)
+        self.title = arcade.Text(SCREEN_TITLE, SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + 60, arcade.color.WHITE, 36, anchor_x="center")
+        self.status = arcade.Text("", SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 - 50, arcade.color.GRAY, 14, anchor_x="center")
+
+    def loading_steps(self):
+        rows, cols, _ = self.board_config
+        audio = shared_audio()
+
+        def import_ai():
+            import fish_ai, fish_regions, fish_worker  # noqa: F401
+
+        def start_ai():
+            from fish_worker import shared_worker
+            shared_worker(AI_ENGINE)
+
+        def open_tables():
+            from fish_tablebase import shared_tablebase
+            shared_tablebase()
+
+        def import_gui():
+            import arcade.gui  # noqa: F401
+
+        steps = [("Waking the AI", import_ai)]
+        # A spectator's AIs run in fish_spectate's own process, which opens its own tables
+        if not issubclass(self.view_type, SpectatorView):
+            steps += [("Starting the AI", start_ai), ("Opening endgame tables", open_tables)]
+        steps.append(("Catching fish", lambda: fish_textures(fish_size(board_layout(rows, cols).radius))))
+        steps += [("Tuning sounds", lambda name=name: audio.sound(name)) for name in SOUND_FILES]
+        if not arcade.headless: steps.append(("Building the menus", import_gui))  # see HeadlessUI
+        return steps
+
+    def load(self):
+        for label, step in self.steps:
+            self.label = label
+            try:
+                step()
+            except Exception as e:
+                print(f"WARNING: loading step '{label}' failed: {e}")
+            self.done += 1
+
+    def on_show_view(self):
+        arcade.set_background_color(arcade.color.BLACK)
+        if not self.thread.is_alive() and self.done == 0: self.thread.start()
+
+    def on_update(self, delta_time):
+        if self.done < len(self.steps) or self.window.current_view is not self: return
+        game_view = self.view_type(*self.board_config, self.seed, **self.view_options)
+        game_view.startup = (STARTED, self.first_frame or time.perf_counter())
+        self.window.show_view(game_view)
+
+    def on_draw(self):
+        self.clear()
+        if self.first_frame is None: self.first_frame = time.perf_counter()
+        self.title.draw()
+        width, height = SCREEN_WIDTH * 0.4, 16
+        left, bottom = (SCREEN_WIDTH - width) / 2, SCREEN_HEIGHT / 2 - 20
+        arcade.draw_lrbt_rectangle_filled(left, left + width * self.done / len(self.steps), bottom, bottom + height, arcade.color.POWDER_BLUE)
+        arcade.draw_lrbt_rectangle_outline(left, left + width, bottom, bottom + height, arcade.color.WHITE, 2)
+        self.status.text = f"{self.label}..."
+        self.status.draw()
+
 class GameOverView(arcade.View):
     def __init__(self, human_score, ai_score, game_view):
         super().__init__()
-        self.game_view = game_view
+        # Only the board size and the kind of view are kept, so the finished game can be
+        # freed; a spectator session plays on as one
+        self.board_config = game_view.board_config
+        self.view_type = type(game_view)
+        self.view_options = game_view.view_options()
         self.human_score = human_score
         self.ai_score = ai_score
         if human_score > ai_score:
@@ -469,14 +904,14 @@ class GameOverView(arcade.View):
         arcade.draw_text("Click to Restart", SCREEN_WIDTH / 2, 100, arcade.color.GRAY, 18, anchor_x="center")
 
     def on_mouse_press(self, _x, _y, _button, _modifiers):
-        if self.game_view and hasattr(self.game_view, 'button_click_sound') and self.game_view.button_click_sound:
-            arcade.play_sound(self.game_view.button_click_sound, volume=1.0)
-        new_game_view = MyGame()
+        shared_audio().play('click')
+        new_game_view = self.view_type(*self.board_config, **self.view_options)
         self.window.show_view(new_game_view)
 
 class ExitConfirmationView(arcade.View):
     def __init__(self, game_view):
         super().__init__()
+        from arcade.gui import UIManager, UIFlatButton
         self.game_view = game_view
         self.ui_manager = UIManager()
         self.ui_manager.enable()
@@ -498,22 +933,47 @@ class ExitConfirmationView(arcade.View):
         self.ui_manager.draw()
 
     def on_yes_click(self, event):
-        if self.game_view and hasattr(self.game_view, 'button_click_sound') and self.game_view.button_click_sound:
-            arcade.play_sound(self.game_view.button_click_sound, volume=1.0)
+        shared_audio().play('click')
         game_over_view = GameOverView(self.game_view.human_score, self.game_view.ai_score, self.game_view)
         self.window.show_view(game_over_view)
 
     def on_no_click(self, event):
-        if self.game_view and hasattr(self.game_view, 'button_click_sound') and self.game_view.button_click_sound:
-            arcade.play_sound(self.game_view.button_click_sound, volume=1.0)
+        shared_audio().play('click')
         self.window.show_view(self.game_view)
         if hasattr(self.game_view, 'ui_manager'): self.game_view.ui_manager.enable()
 
 def main():
+    parser = argparse.ArgumentParser(description=SCREEN_TITLE)
+    parser.add_argument('--rows', type=int, default=BOARD_ROWS)
+    parser.add_argument('--cols', type=int, default=BOARD_COLS)
+    parser.add_argument('--penguins', type=int, default=PENGUINS_PER_PLAYER, help="penguins per player")
+    parser.add_argument('--seed', type=int, help="deal the first game from this seed (as recorded)")
+    parser.add_argument('--record', default=DEFAULT_RECORD_PATH, help="game record file to append to")
+    parser.add_argument('--no-record', action='store_true', help="don't record games")
+    parser.add_argument('--trace', nargs='?', const=DEFAULT_TRACE_PATH,
+                        help="time frames and AI turns from the start and write a Chrome trace here on exit")
+    parser.add_argument('--spectate', nargs='*', metavar='PLAYER',
+                        help=f"watch AI against AI (default: {' '.join(SPECTATE_PLAYERS)}); --seed deals the first game")
+    parser.add_argument('--speed', default='1', choices=[str(s) for s in SPECTATE_SPEEDS if s] + ['max'],
+                        help="spectator playback speed")
+    parser.add_argument('--sample-every', type=int, default=1, help="spectator: move the board on N moves at a time")
+    args = parser.parse_args()
+    if args.spectate and len(args.spectate) != 2: parser.error("--spectate takes two players")
+    global RECORD_PATH, TRACE_PATH
+    RECORD_PATH = None if args.no_record else args.record
+    if args.trace:
+        TRACE_PATH = args.trace
+        TRACER.enabled = True
     window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, resizable=False)
-    game_view = MyGame()
-    window.show_view(game_view)
+    board_config = (args.rows, args.cols, args.penguins)
+    if args.spectate is None:
+        window.show_view(LoadingView(board_config, args.seed))
+    else:
+        speed = None if args.speed == 'max' else int(args.speed)
+        window.show_view(LoadingView(board_config, args.seed, SpectatorView, players=args.spectate or SPECTATE_PLAYERS,
+                                     speed=speed, sample_every=args.sample_every))
     arcade.run()
+    if args.trace: print(f"Trace written to {TRACER.export(TRACE_PATH)}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,143 @@
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import random
+import time
+
+from fish_ai import make_player, parse_player
+from fish_engine import GameState, BOARD_ROWS, BOARD_COLS, PENGUINS_PER_PLAYER, HUMAN, AI
+
+# Headless self-play: python tournament.py -n 1000 greedy alphabeta:max_depth=2
+#
+# Every game deals its board from its own seed (the same 60/30/10 fish layout
+# and 1-fish placement rules as the game window), so a run is reproducible as
+# long as the players are bounded by depth/playouts rather than the clock.
+# Seats alternate: player A moves first in even games, player B in odd ones.
+
+FIELDS = ('game', 'seed', 'first', 'player_a', 'player_b', 'score_a', 'score_b', 'winner', 'plies', 'seconds')
+
+
+def play_game(task):
+    index, seed, spec_a, spec_b, move_time, board = task
+    rng = random.Random(seed)
+    state = GameState.new_game(rng, *board)
+    players = []
+    for spec in (spec_a, spec_b):
+        name, options = parse_player(spec)
+        # The tournament already uses every core, and its pool's processes can't start more
+        if name in ('mcts', 'alphabeta'): options['workers'] = 1
+        players.append(make_player(name, seed=rng.getrandbits(32), **options))
+    a_first = index % 2 == 0
+    seats = {HUMAN: players[0], AI: players[1]} if a_first else {HUMAN: players[1], AI: players[0]}
+
+    start = time.perf_counter()
+    plies = 0
+    while not state.is_terminal():
+        choice = seats[state.current].choose_move(state, move_time)
+        if choice.move is None: state.pass_turn()
+        else: state.apply_move(choice.move)
+        plies += 1
+    score_a, score_b = (state.scores[HUMAN], state.scores[AI]) if a_first else (state.scores[AI], state.scores[HUMAN])
+    winner = 'a' if score_a > score_b else 'b' if score_b > score_a else 'draw'
+    return {'game': index, 'seed': seed, 'first': 'a' if a_first else 'b', 'player_a': spec_a,
+            'player_b': spec_b, 'score_a': score_a, 'score_b': score_b, 'winner': winner,
+            'plies': plies, 'seconds': round(time.perf_counter() - start, 4)}
+
+
+def wilson_interval(points, games, z=1.96):
+    # 95% interval for a score fraction (draws count half)
+    if not games: return 0.0, 0.0
+    p = points / games
+    denom = 1 + z * z / games
+    centre = (p + z * z / (2 * games)) / denom
+    half = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denom
+    return centre - half, centre + half
+
+
+class Tally:
+    def __init__(self):
+        self.games = self.wins_a = self.wins_b = self.draws = 0
+        self.fish_a = self.fish_b = 0
+
+    def add(self, row):
+        self.games += 1
+        self.fish_a += row['score_a']
+        self.fish_b += row['score_b']
+        if row['winner'] == 'a': self.wins_a += 1
+        elif row['winner'] == 'b': self.wins_b += 1
+        else: self.draws += 1
+
+    def summary(self, spec_a, spec_b, elapsed):
+        points = self.wins_a + 0.5 * self.draws
+        low, high = wilson_interval(points, self.games)
+        rate = points / self.games if self.games else 0.0
+        return (f"{self.games} games in {elapsed:.1f}s ({self.games / max(elapsed, 1e-9):.1f} games/s)\n"
+                f"  {spec_a}: {self.wins_a} wins, score {rate:.3f} [95% CI {low:.3f}-{high:.3f}], "
+                f"avg fish {self.fish_a / max(self.games, 1):.1f}\n"
+                f"  {spec_b}: {self.wins_b} wins, score {1 - rate:.3f} [95% CI {1 - high:.3f}-{1 - low:.3f}], "
+                f"avg fish {self.fish_b / max(self.games, 1):.1f}\n"
+                f"  draws: {self.draws}")
+
+
+class ResultWriter:
+    # Appends one row per finished game, flushed immediately, as CSV or JSON lines
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.jsonl = path.endswith('.jsonl')
+        if not self.jsonl:
+            self.csv = csv.DictWriter(self.file, fieldnames=FIELDS)
+            self.csv.writeheader()
+
+    def write(self, row):
+        if self.jsonl: self.file.write(json.dumps(row) + '\n')
+        else: self.csv.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def run(games, spec_a, spec_b, seed=0, move_time=0.1, workers=None, output=None, report_every=10.0,
+        board=(BOARD_ROWS, BOARD_COLS, PENGUINS_PER_PLAYER)):
+    workers = workers or os.cpu_count() or 1
+    tasks = [(i, seed + i, spec_a, spec_b, move_time, board) for i in range(games)]
+    writer = ResultWriter(output) if output else None
+    tally = Tally()
+    start = last_report = time.perf_counter()
+    try:
+        with multiprocessing.Pool(workers) as pool:
+            for row in pool.imap_unordered(play_game, tasks, chunksize=max(1, games // (workers * 16))):
+                tally.add(row)
+                if writer: writer.write(row)
+                now = time.perf_counter()
+                if now - last_report >= report_every:
+                    print(tally.summary(spec_a, spec_b, now - start), flush=True)
+                    last_report = now
+    finally:
+        if writer: writer.close()
+    print(tally.summary(spec_a, spec_b, time.perf_counter() - start))
+    return tally
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play AI-vs-AI games headlessly across all cores.")
+    parser.add_argument('player_a', help="e.g. greedy, alphabeta:max_depth=2, mcts:max_playouts=200")
+    parser.add_argument('player_b')
+    parser.add_argument('-n', '--games', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0, help="game i is dealt from seed + i")
+    parser.add_argument('--move-time', type=float, default=0.1, help="seconds per move for clock-bound players")
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument('-o', '--output', help="results file, .csv or .jsonl")
+    parser.add_argument('--rows', type=int, default=BOARD_ROWS)
+    parser.add_argument('--cols', type=int, default=BOARD_COLS)
+    parser.add_argument('--penguins', type=int, default=PENGUINS_PER_PLAYER, help="penguins per player")
+    args = parser.parse_args()
+    run(args.games, args.player_a, args.player_b, args.seed, args.move_time, args.workers, args.output,
+        board=(args.rows, args.cols, args.penguins))
+
+
+if __name__ == "__main__":
+    main()